@@ -3,39 +3,49 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, date, timedelta
 import json
+from typing import Optional
 from app.core.database import get_db
-from app.models.card import Card
+from app.core.study_day import current_study_day
 from app.models.study_session import StudySession
-from app.models.calendar import DailyActivity, StudyReminder
+from app.models.calendar import StudyReminder, LearningStreak
 from app.models.schemas import (
     DailyDueCountResponse, WeeklyProgressResponse, LearningStreakResponse,
     MonthlyHeatmapResponse, DeckProgressResponse, ReminderCreate, 
-    ReminderResponse, UpcomingReviewsResponse
+    ReminderResponse, UpcomingReviewsResponse, RangeAnalyticsResponse
 )
+from app.services.activity_index import activity_index
+from app.services.deck_snapshots import deck_progress
+from app.services.due_forecast import due_counts_by_deck, upcoming_forecast
+from app.services.streaks import STREAK_ID
+from app.services.analytics_cache import analytics_cache, CARDS, REVIEWS, SESSIONS
+from app.services.reminders import reminder_scheduler
 
 router = APIRouter()
 
 
 @router.get("/due-count", response_model=DailyDueCountResponse)
 def get_daily_due_count(date: str, db: Session = Depends(get_db)):
-    """Get count of due cards for a specific date"""
+    """
+    Get count of due cards for a specific date
+
+    Counts whole study days: every card due on or before the study day
+    `date`, including those due later that day, per deck.
+    """
     target_date = datetime.fromisoformat(date).date()
-    target_datetime = datetime.combine(target_date, datetime.min.time())
-    
-    # Get due cards for the date
-    due_cards = db.query(Card).filter(Card.next_review <= target_datetime).all()
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("due-count", (date,))
+    if cached is not None:
+        return cached
     
-    # Count by deck
-    by_deck = {}
-    for card in due_cards:
-        deck = card.deck_name or "default"
-        by_deck[deck] = by_deck.get(deck, 0) + 1
+    # Cards due on or before the date, per deck, from the due forecast
+    by_deck = due_counts_by_deck(db, target_date)
     
-    return DailyDueCountResponse(
+    response = DailyDueCountResponse(
         date=date,
-        due_count=len(due_cards),
+        due_count=sum(by_deck.values()),
         by_deck=by_deck
     )
+    return analytics_cache.set("due-count", (date,), response, depends_on=(CARDS,), generation=generation)
 
 
 @router.get("/weekly-progress", response_model=WeeklyProgressResponse)
@@ -43,75 +53,85 @@ def get_weekly_progress(start_date: str, db: Session = Depends(get_db)):
     """Get weekly learning progress"""
     start = datetime.fromisoformat(start_date).date()
     end = start + timedelta(days=6)
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("weekly-progress", (start,))
+    if cached is not None:
+        return cached
+    
+    # Aggregate the week's sessions per study day in one range scan
+    activities = db.query(
+        StudySession.study_day,
+        func.count(StudySession.id).label('sessions'),
+        func.sum(StudySession.cards_studied).label('cards_studied'),
+        func.sum(StudySession.cards_correct).label('cards_correct')
+    ).filter(
+        and_(
+            StudySession.study_day >= start,
+            StudySession.study_day <= end
+        )
+    ).group_by(StudySession.study_day).all()
+    by_day = {activity.study_day: activity for activity in activities}
     
     daily_stats = []
     for i in range(7):
         current_date = start + timedelta(days=i)
-        sessions = db.query(StudySession).filter(
-            func.date(StudySession.started_at) == current_date
-        ).all()
+        activity = by_day.get(current_date)
         
-        total_studied = sum(s.cards_studied for s in sessions)
-        total_correct = sum(s.cards_correct for s in sessions)
+        sessions = activity.sessions if activity else 0
+        total_studied = (activity.cards_studied or 0) if activity else 0
+        total_correct = (activity.cards_correct or 0) if activity else 0
         accuracy = (total_correct / total_studied * 100) if total_studied > 0 else 0
         
         daily_stats.append({
             "date": current_date.isoformat(),
-            "sessions": len(sessions),
+            "sessions": sessions,
             "cards_studied": total_studied,
             "accuracy": round(accuracy, 1)
         })
     
-    return WeeklyProgressResponse(
+    response = WeeklyProgressResponse(
         start_date=start.isoformat(),
         end_date=end.isoformat(),
         daily_stats=daily_stats
     )
+    return analytics_cache.set("weekly-progress", (start,), response, depends_on=(SESSIONS,), generation=generation)
 
 
 @router.get("/streak", response_model=LearningStreakResponse)
 def get_learning_streak(db: Session = Depends(get_db)):
     """Get current learning streak"""
-    # Get all study dates in descending order
-    study_dates = db.query(func.date(StudySession.started_at).label('study_date')).distinct().order_by(func.date(StudySession.started_at).desc()).all()
-    
-    if not study_dates:
-        return LearningStreakResponse(current_streak=0, longest_streak=0, last_study_date=None)
-    
-    dates = [d.study_date for d in study_dates]
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 1
-    
-    # Calculate current streak
-    today = date.today()
-    if dates[0] == today or dates[0] == today - timedelta(days=1):
-        current_streak = 1
-        for i in range(1, len(dates)):
-            if dates[i-1] - dates[i] == timedelta(days=1):
-                current_streak += 1
-            else:
-                break
-    
-    # Calculate longest streak
-    for i in range(1, len(dates)):
-        if dates[i-1] - dates[i] == timedelta(days=1):
-            temp_streak += 1
-        else:
-            longest_streak = max(longest_streak, temp_streak)
-            temp_streak = 1
-    longest_streak = max(longest_streak, temp_streak)
-    
-    return LearningStreakResponse(
+    today = current_study_day()
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("streak", (today,))
+    if cached is not None:
+        return cached
+    
+    streak = db.get(LearningStreak, STREAK_ID)
+    if streak is None or streak.last_study_date is None:
+        response = LearningStreakResponse(current_streak=0, longest_streak=0, last_study_date=None)
+        return analytics_cache.set("streak", (today,), response, depends_on=(SESSIONS, REVIEWS), generation=generation)
+    
+    # The stored streak is only still running if it reaches today or yesterday
+    current_streak = streak.current_streak
+    if streak.last_study_date < today - timedelta(days=1):
+        current_streak = 0
+    
+    response = LearningStreakResponse(
         current_streak=current_streak,
-        longest_streak=longest_streak,
-        last_study_date=str(dates[0]) if dates else None
+        longest_streak=streak.longest_streak,
+        last_study_date=str(streak.last_study_date)
     )
+    return analytics_cache.set("streak", (today,), response, depends_on=(SESSIONS, REVIEWS), generation=generation)
 
 
 @router.get("/heatmap", response_model=MonthlyHeatmapResponse)
 def get_monthly_heatmap(year_month: str, db: Session = Depends(get_db)):
     """Get monthly activity heatmap data"""
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("heatmap", (year_month,))
+    if cached is not None:
+        return cached
+    
     year, month = map(int, year_month.split('-'))
     start_date = date(year, month, 1)
     
@@ -123,15 +143,15 @@ def get_monthly_heatmap(year_month: str, db: Session = Depends(get_db)):
     
     # Get daily activity data
     activities = db.query(
-        func.date(StudySession.started_at).label('date'),
+        StudySession.study_day.label('date'),
         func.count(StudySession.id).label('sessions'),
         func.sum(StudySession.cards_studied).label('cards_studied')
     ).filter(
         and_(
-            func.date(StudySession.started_at) >= start_date,
-            func.date(StudySession.started_at) < end_date
+            StudySession.study_day >= start_date,
+            StudySession.study_day < end_date
         )
-    ).group_by(func.date(StudySession.started_at)).all()
+    ).group_by(StudySession.study_day).all()
     
     activity_data = []
     for activity in activities:
@@ -142,46 +162,84 @@ def get_monthly_heatmap(year_month: str, db: Session = Depends(get_db)):
             "intensity": min(activity.cards_studied or 0, 50) / 50  # Normalize to 0-1
         })
     
-    return MonthlyHeatmapResponse(
+    response = MonthlyHeatmapResponse(
         year_month=year_month,
         activity_data=activity_data
     )
+    return analytics_cache.set("heatmap", (year_month,), response, depends_on=(SESSIONS,), generation=generation)
+
+
+@router.get("/range", response_model=RangeAnalyticsResponse)
+def get_range_analytics(
+    start: str,
+    end: str,
+    deck: Optional[str] = None,
+    daily: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get activity totals for any date range, optionally with per-day heatmap data"""
+    start_date = datetime.fromisoformat(start).date()
+    end_date = datetime.fromisoformat(end).date()
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    
+    # Sums come from the in-memory prefix-sum index, not a table scan
+    series = activity_index.series(db, deck)
+    totals = series.totals(start_date, end_date)
+    days = (end_date - start_date).days + 1
+    cards_studied = totals["cards_studied"]
+    
+    activity_data = None
+    if daily:
+        activity_data = [
+            {
+                "date": day.isoformat(),
+                **values,
+                "intensity": min(values["cards_studied"], 50) / 50  # Normalize to 0-1
+            }
+            for day, values in series.daily(start_date, end_date)
+        ]
+    
+    return RangeAnalyticsResponse(
+        start_date=start_date.isoformat(),
+        end_date=end_date.isoformat(),
+        deck_name=deck,
+        days=days,
+        cards_studied=cards_studied,
+        cards_correct=totals["cards_correct"],
+        sessions_completed=totals.get("sessions_completed"),
+        study_time_minutes=totals.get("study_time_minutes"),
+        average_cards_per_day=round(cards_studied / days, 2),
+        accuracy=round(totals["cards_correct"] / cards_studied * 100, 2) if cards_studied else 0.0,
+        activity_data=activity_data
+    )
 
 
 @router.get("/deck-progress", response_model=DeckProgressResponse)
 def get_deck_progress(deck_name: str, days: int = 30, db: Session = Depends(get_db)):
     """Get deck progress over time"""
-    end_date = date.today()
+    end_date = current_study_day()
     start_date = end_date - timedelta(days=days-1)
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("deck-progress", (end_date, days), deck=deck_name)
+    if cached is not None:
+        return cached
     
-    # Get daily progress for the deck
-    progress_data = []
-    for i in range(days):
-        current_date = start_date + timedelta(days=i)
-        
-        # Count cards in deck
-        total_cards = db.query(Card).filter(Card.deck_name == deck_name).count()
-        
-        # Count cards reviewed on this date
-        reviewed_cards = db.query(Card).filter(
-            and_(
-                Card.deck_name == deck_name,
-                func.date(Card.last_reviewed) == current_date
-            )
-        ).count()
-        
-        progress_data.append({
-            "date": current_date.isoformat(),
-            "total_cards": total_cards,
-            "reviewed_cards": reviewed_cards,
-            "progress_percent": (reviewed_cards / total_cards * 100) if total_cards > 0 else 0
-        })
+    # Daily history comes from the deck snapshots in a single range query
+    progress_data = deck_progress(db, deck_name, start_date, end_date)
     
-    return DeckProgressResponse(
+    response = DeckProgressResponse(
         deck_name=deck_name,
         period_days=days,
         progress_data=progress_data
     )
+    return analytics_cache.set(
+        "deck-progress", (end_date, days), response,
+        deck=deck_name, depends_on=(CARDS, REVIEWS), generation=generation
+    )
 
 
 @router.post("/reminder", response_model=ReminderResponse, status_code=status.HTTP_201_CREATED)
@@ -195,6 +253,7 @@ def create_reminder(reminder: ReminderCreate, db: Session = Depends(get_db)):
     db.add(db_reminder)
     db.commit()
     db.refresh(db_reminder)
+    reminder_scheduler.notify_changed(db_reminder.id)
     
     reminder_dict = db_reminder.__dict__.copy()
     reminder_dict['deck_names'] = json.loads(db_reminder.deck_names or "[]")
@@ -203,47 +262,33 @@ def create_reminder(reminder: ReminderCreate, db: Session = Depends(get_db)):
 
 @router.get("/upcoming", response_model=UpcomingReviewsResponse)
 def get_upcoming_reviews(days: int = 7, db: Session = Depends(get_db)):
-    """Get upcoming review schedule"""
-    start_date = datetime.now()
+    """
+    Get upcoming review schedule
+
+    One entry per study day from today through `days` days ahead. Today's
+    entry counts every card due today, including those already due.
+    """
+    start_date = current_study_day()
     end_date = start_date + timedelta(days=days)
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("upcoming", (start_date, days))
+    if cached is not None:
+        return cached
     
-    # Get cards due in the period
-    upcoming_cards = db.query(Card).filter(
-        and_(
-            Card.next_review >= start_date,
-            Card.next_review <= end_date
-        )
-    ).order_by(Card.next_review).all()
-    
-    # Group by date
+    # Group the forecast buckets by date
     upcoming_reviews = []
-    current_date = None
-    daily_cards = []
-    
-    for card in upcoming_cards:
-        review_date = card.next_review.date()
-        
-        if current_date != review_date:
-            if current_date is not None:
-                upcoming_reviews.append({
-                    "date": current_date.isoformat(),
-                    "card_count": len(daily_cards),
-                    "decks": list(set(c.deck_name for c in daily_cards))
-                })
-            current_date = review_date
-            daily_cards = []
-        
-        daily_cards.append(card)
-    
-    # Add the last group
-    if current_date is not None:
-        upcoming_reviews.append({
-            "date": current_date.isoformat(),
-            "card_count": len(daily_cards),
-            "decks": list(set(c.deck_name for c in daily_cards))
-        })
+    for due_date, deck_name, card_count in upcoming_forecast(db, start_date, end_date):
+        if not upcoming_reviews or upcoming_reviews[-1]["date"] != due_date.isoformat():
+            upcoming_reviews.append({
+                "date": due_date.isoformat(),
+                "card_count": 0,
+                "decks": []
+            })
+        upcoming_reviews[-1]["card_count"] += card_count
+        upcoming_reviews[-1]["decks"].append(deck_name)
     
-    return UpcomingReviewsResponse(
+    response = UpcomingReviewsResponse(
         period_days=days,
         upcoming_reviews=upcoming_reviews
     )
+    return analytics_cache.set("upcoming", (start_date, days), response, depends_on=(CARDS,), generation=generation)
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.core.database import get_db
+from app.core.study_day import study_day_for
 from app.models.card import Card
-from app.models.schemas import CardCreate, CardResponse, CardUpdate, CardListResponse, CardReview
+from app.models.study_session import CardReview as CardReviewRecord, CardStats
+from app.models.schemas import (
+    CardCreate, CardResponse, CardUpdate, CardListResponse, CardReview,
+    CardBulkCreate, CardBulkCreateResponse, CardStatsResponse, CardReviewHistoryResponse,
+    SpreadBacklogRequest, SpreadBacklogResponse
+)
+from app.services.backlog import spread_backlog
+from app.services.card_stats import review_history
+from app.services.retrievability import DUE_ORDER, RETRIEVABILITY_ORDER, at_risk_due_cards
+from app.services.schedule_cache import active_schedule_cache, cards_by_id
 from app.services.spaced_repetition import SM2Algorithm
+from app.services.load_balancer import interval_balancer
+from app.services.events import card_state, card_changed, cards_changed, review_logged
 from math import ceil
 
 router = APIRouter()
@@ -18,14 +30,43 @@ def create_card(card: CardCreate, db: Session = Depends(get_db)):
     db_card = Card(
         front=card.front,
         back=card.back,
-        deck_name=card.deck_name
+        deck_name=card.deck_name,
+        next_review=datetime.now()
     )
     db.add(db_card)
+    db.flush()
+    card_changed(db, None, card_state(db_card))
     db.commit()
     db.refresh(db_card)
     return db_card
 
 
+@router.post("/bulk", response_model=CardBulkCreateResponse, status_code=status.HTTP_201_CREATED)
+def create_cards_bulk(payload: CardBulkCreate, db: Session = Depends(get_db)):
+    """Create many cards in a single transaction"""
+    now = datetime.now()
+    db_cards = [
+        Card(front=card.front, back=card.back, deck_name=card.deck_name, next_review=now)
+        for card in payload.cards
+    ]
+    db.add_all(db_cards)
+    db.flush()
+    cards_changed(db, [(None, card_state(db_card)) for db_card in db_cards])
+    db.commit()
+    return CardBulkCreateResponse(
+        created=len(db_cards),
+        ids=[db_card.id for db_card in db_cards]
+    )
+
+
+@router.post("/spread-backlog", response_model=SpreadBacklogResponse)
+def spread_overdue_cards(payload: SpreadBacklogRequest, db: Session = Depends(get_db)):
+    """Spread overdue cards over the coming days, most at risk first"""
+    result = spread_backlog(db, datetime.now(), payload.days, payload.deck_name, payload.deck_priorities)
+    db.commit()
+    return SpreadBacklogResponse(**result)
+
+
 @router.get("/", response_model=CardListResponse)
 def get_cards(
     page: int = 1,
@@ -55,16 +96,16 @@ def get_cards(
 def get_due_cards(
     deck_name: str = None,
     limit: int = 20,
+    order: str = Query(DUE_ORDER, pattern="^(due|retrievability)$"),
     db: Session = Depends(get_db)
 ):
-    """Get cards that are due for review"""
-    query = db.query(Card).filter(Card.next_review <= datetime.now())
-    
-    if deck_name:
-        query = query.filter(Card.deck_name == deck_name)
-    
-    total = query.count()
-    cards = query.order_by(Card.next_review).limit(limit).all()
+    """Get cards that are due for review, oldest due or most at risk first"""
+    now = datetime.now()
+    if order == RETRIEVABILITY_ORDER:
+        total, card_ids = at_risk_due_cards(db, now, [deck_name] if deck_name else None, limit)
+        cards = cards_by_id(db, card_ids)
+    else:
+        total, cards = _due_cards_by_date(db, now, deck_name, limit)
     
     return CardListResponse(
         cards=cards,
@@ -74,6 +115,22 @@ def get_due_cards(
         pages=1
     )
 
+def _due_cards_by_date(db: Session, now: datetime, deck_name: Optional[str], limit: int):
+    """Due cards, earliest next_review first, with the total number due"""
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        # Select the due IDs in memory and only load the cards returned
+        total, card_ids = cache.due_cards(now, deck_name or None, limit)
+        return total, cards_by_id(db, card_ids)
+    
+    query = db.query(Card).filter(Card.next_review <= now)
+    if deck_name:
+        query = query.filter(Card.deck_name == deck_name)
+    
+    total = query.count()
+    return total, query.order_by(Card.next_review).limit(limit).all()
+
+
 @router.get("/{card_id}", response_model=CardResponse)
 def get_card(card_id: int, db: Session = Depends(get_db)):
     """Get a specific card by ID"""
@@ -96,10 +153,13 @@ def update_card(card_id: int, card_update: CardUpdate, db: Session = Depends(get
             detail="Card not found"
         )
     
+    before = card_state(card)
     update_data = card_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(card, field, value)
     
+    db.flush()
+    card_changed(db, before, card_state(card))
     db.commit()
     db.refresh(card)
     return card
@@ -115,7 +175,14 @@ def delete_card(card_id: int, db: Session = Depends(get_db)):
             detail="Card not found"
         )
     
+    before = card_state(card)
+    # SQLite hands a deleted card's ID to the next card created, so its history
+    # goes with it rather than being inherited
+    db.query(CardReviewRecord).filter(CardReviewRecord.card_id == card_id).delete()
+    db.query(CardStats).filter(CardStats.card_id == card_id).delete()
     db.delete(card)
+    db.flush()
+    card_changed(db, before, None, reviewed=True)
     db.commit()
     return None
 
@@ -130,14 +197,18 @@ def review_card(card_id: int, review: CardReview, db: Session = Depends(get_db))
             detail="Card not found"
         )
     
+    before = card_state(card)
+    
     # Use SM-2 algorithm to calculate next review
+    reviewed_at = datetime.now()
     algorithm = SM2Algorithm()
     next_review_date, new_ease_factor, new_interval, new_repetitions = algorithm.calculate_next_review_date(
         quality=review.quality,
         ease_factor=card.ease_factor,
         interval=card.interval,
         repetitions=card.repetitions,
-        base_date=datetime.now()
+        base_date=reviewed_at,
+        balance=interval_balancer(db, card.deck_name)
     )
     
     # Update card with new values
@@ -145,9 +216,79 @@ def review_card(card_id: int, review: CardReview, db: Session = Depends(get_db))
     card.interval = new_interval
     card.repetitions = new_repetitions
     card.next_review = next_review_date
-    card.last_reviewed = datetime.now()
+    card.last_reviewed = reviewed_at
     
+    # Log the review outside of any session
+    db.add(CardReviewRecord(
+        session_id=None, card_id=card.id,
+        quality=review.quality, response_time=review.response_time,
+        reviewed_at=reviewed_at, study_day=study_day_for(reviewed_at)
+    ))
+    db.flush()
+    card_changed(db, before, card_state(card), reviewed=True)
+    review_logged(
+        db, card, review.quality, review.response_time, reviewed_at,
+        introduced=before.last_reviewed is None
+    )
     db.commit()
     db.refresh(card)
     return card
 
+
+@router.get("/{card_id}/stats", response_model=CardStatsResponse)
+def get_card_stats(card_id: int, db: Session = Depends(get_db)):
+    """Get a card's review totals"""
+    card = db.query(Card).filter(Card.id == card_id).first()
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Card not found"
+        )
+    return _card_stats_response(card_id, db.get(CardStats, card_id))
+
+
+@router.get("/{card_id}/reviews", response_model=CardReviewHistoryResponse)
+def get_card_reviews(
+    card_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get a card's review history, newest first, one page per cursor"""
+    card = db.query(Card).filter(Card.id == card_id).first()
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Card not found"
+        )
+    
+    try:
+        reviews, next_cursor = review_history(db, card_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return CardReviewHistoryResponse(
+        card_id=card_id,
+        stats=_card_stats_response(card_id, db.get(CardStats, card_id)),
+        reviews=reviews,
+        next_cursor=next_cursor
+    )
+
+
+def _card_stats_response(card_id: int, stats: Optional[CardStats]) -> CardStatsResponse:
+    """Build the stats response, with zeros for a card never reviewed"""
+    if stats is None:
+        return CardStatsResponse(
+            card_id=card_id, review_count=0, lapse_count=0,
+            average_response_time=0.0, last_reviewed_at=None
+        )
+    return CardStatsResponse(
+        card_id=card_id,
+        review_count=stats.review_count,
+        lapse_count=stats.lapse_count,
+        average_response_time=round(stats.total_response_time / stats.review_count, 3) if stats.review_count else 0.0,
+        last_reviewed_at=stats.last_reviewed_at
+    )
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.study_day import current_study_day
+from app.models.schemas import (
+    DeckStatsResponse, DeckNodeResponse, DeckTreeResponse, DeckLimitsResponse, DeckLimitsUpdate, DeckRetentionResponse, ForgettingCurveResponse, SimulationRequest, SimulationResponse
+)
+from app.services.analytics_cache import analytics_cache, CARDS, REVIEWS
+from app.services.daily_limits import deck_limits, set_deck_limits
+from app.services.deck_stats import deck_stats
+from app.services.deck_tree import deck_node, deck_tree
+from app.services.retention import CURRENT_MODE, current_retention, forgetting_curve
+from app.services.simulator import simulate_deck
+
+router = APIRouter()
+
+
+@router.get("/tree", response_model=DeckTreeResponse)
+def get_deck_tree(root: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get nested decks ("Parent::Child") with card, new and due counts rolled up to every level"""
+    return DeckTreeResponse(root=root, decks=deck_tree(db, current_study_day(), root))
+
+
+@router.get("/{deck_name}/counts", response_model=DeckNodeResponse)
+def get_deck_counts(deck_name: str, db: Session = Depends(get_db)):
+    """Get a deck's card, new and due counts including every deck nested below it"""
+    node = deck_node(db, deck_name, current_study_day())
+    if node is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deck not found"
+        )
+    return DeckNodeResponse(**node)
+
+
+@router.get("/{deck_name}/stats", response_model=DeckStatsResponse)
+def get_deck_stats(deck_name: str, db: Session = Depends(get_db)):
+    """Get maturity, ease and interval statistics for a deck"""
+    today = current_study_day()
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("deck-stats", (today,), deck=deck_name)
+    if cached is not None:
+        return cached
+
+    stats = deck_stats(db, deck_name, today)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deck not found"
+        )
+
+    response = DeckStatsResponse(**stats)
+    return analytics_cache.set(
+        "deck-stats", (today,), response,
+        deck=deck_name, depends_on=(CARDS, REVIEWS), generation=generation
+    )
+
+
+@router.get("/{deck_name}/limits", response_model=DeckLimitsResponse)
+def get_deck_limits(deck_name: str, db: Session = Depends(get_db)):
+    """Get a deck's daily new-card and review limits and today's usage"""
+    return DeckLimitsResponse(**deck_limits(db, deck_name, current_study_day())._asdict())
+
+
+@router.put("/{deck_name}/limits", response_model=DeckLimitsResponse)
+def update_deck_limits(deck_name: str, limits: DeckLimitsUpdate, db: Session = Depends(get_db)):
+    """Override a deck's daily limits"""
+    set_deck_limits(db, deck_name, limits.new_cards_per_day, limits.reviews_per_day)
+    db.commit()
+    return DeckLimitsResponse(**deck_limits(db, deck_name, current_study_day())._asdict())
+
+
+@router.get("/{deck_name}/retention", response_model=Union[DeckRetentionResponse, ForgettingCurveResponse])
+def get_deck_retention(
+    deck_name: str,
+    mode: str = Query(CURRENT_MODE, pattern="^(current|curve)$"),
+    db: Session = Depends(get_db)
+):
+    """Get a deck's predicted recall right now, or its fitted forgetting curve"""
+    # Predicted recall drifts slowly, so it is computed as of the current hour
+    as_of = datetime.now().replace(minute=0, second=0, microsecond=0)
+    params = (mode, as_of) if mode == CURRENT_MODE else (mode,)
+    generation = analytics_cache.generation()
+    cached = analytics_cache.get("deck-retention", params, deck=deck_name)
+    if cached is not None:
+        return cached
+
+    if mode == CURRENT_MODE:
+        result = current_retention(db, deck_name, as_of)
+        response = DeckRetentionResponse(**result) if result else None
+    else:
+        result = forgetting_curve(db, deck_name)
+        response = ForgettingCurveResponse(**result) if result else None
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deck not found"
+        )
+    return analytics_cache.set(
+        "deck-retention", params, response,
+        deck=deck_name, depends_on=(CARDS, REVIEWS), generation=generation
+    )
+
+
+@router.post("/{deck_name}/simulate", response_model=SimulationResponse)
+def simulate_deck_workload(deck_name: str, request: SimulationRequest, db: Session = Depends(get_db)):
+    """Simulate a deck's future daily workload, time cost and retention"""
+    result = simulate_deck(db, deck_name, current_study_day(), **request.model_dump())
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deck not found"
+        )
+    return SimulationResponse(**result)
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import datetime
+from typing import Optional
 from app.core.database import get_db
+from app.core.study_day import study_day_for
 from app.models.card import Card
 from app.models.study_session import StudySession, CardReview
 from app.models.schemas import (
     StudySessionCreate, StudySessionResponse, SessionReview, 
-    NextCardResponse, StudyStatsResponse, CardResponse
+    NextCardResponse, StudyStatsResponse, CardResponse, SessionSummaryResponse,
+    CramResultsRequest, CramResultsResponse
 )
+from app.services.cram import CRAM_BATCH_SIZE, CRAM_SESSION, cram_stream, log_cram_results
+from app.services.deck_tree import subtree_decks
 from app.services.spaced_repetition import SM2Algorithm
+from app.services.load_balancer import interval_balancer
+from app.services.schedule_cache import cards_by_id
+from app.services.session_budget import plan_session_size, within_budget
+from app.services.session_queue import session_queue
+from app.services.session_summary import get_session_summary
+from app.services.study_totals import get_study_totals
+from app.services.events import (
+    card_state, card_changed, review_logged, session_started, session_ended
+)
 
 router = APIRouter()
 
@@ -17,11 +32,40 @@ router = APIRouter()
 @router.post("/sessions/", response_model=StudySessionResponse, status_code=status.HTTP_201_CREATED)
 def start_study_session(session_data: StudySessionCreate, db: Session = Depends(get_db)):
     """Start a new study session"""
-    session = StudySession(**session_data.model_dump())
+    scopes = (session_data.deck_name, session_data.deck_names, session_data.deck_tree)
+    if sum(bool(scope) for scope in scopes) > 1:
+        raise HTTPException(status_code=400, detail="Give only one of deck_name, deck_names or deck_tree")
+    
+    deck_names = session_data.deck_names
+    if session_data.deck_tree:
+        deck_names = subtree_decks(db, session_data.deck_tree)
+        if not deck_names:
+            raise HTTPException(status_code=404, detail="Deck not found")
+    
+    started_at = datetime.now()
+    session = StudySession(
+        **session_data.model_dump(exclude={"deck_names", "deck_tree"}),
+        deck_names=json.dumps(sorted(set(deck_names))) if deck_names else None,
+        started_at=started_at,
+        study_day=study_day_for(started_at)
+    )
     db.add(session)
+    db.flush()
+    if session.target_minutes and session.session_type != CRAM_SESSION:
+        # Budgeted sessions plan their size from the per-card time estimates
+        session.max_cards = plan_session_size(db, session, started_at, session.study_day)
+    session_started(db, session)
     db.commit()
     db.refresh(session)
-    return StudySessionResponse(**session.__dict__, session_complete=False)
+    return _session_response(session, session_complete=False)
+
+
+def _session_response(session: StudySession, session_complete: bool) -> StudySessionResponse:
+    """Response for a session, decoding its stored deck list"""
+    return StudySessionResponse(**{
+        **session.__dict__,
+        "deck_names": json.loads(session.deck_names) if session.deck_names else None
+    }, session_complete=session_complete)
 
 
 @router.get("/sessions/{session_id}/next-card", response_model=NextCardResponse)
@@ -30,17 +74,19 @@ def get_next_card(session_id: int, db: Session = Depends(get_db)):
     session = db.query(StudySession).filter(StudySession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    if session.session_type == CRAM_SESSION:
+        raise HTTPException(status_code=400, detail="Cram sessions are studied through the cram stream")
     
-    # Get due cards for the session
-    query = db.query(Card).filter(Card.next_review <= datetime.now())
-    if session.deck_name:
-        query = query.filter(Card.deck_name == session.deck_name)
-    
-    # Check if session is complete
-    if session.cards_studied >= session.max_cards:
+    # Check if session is complete; budgeted sessions run until their time is used up
+    if not session.target_minutes and session.cards_studied >= session.max_cards:
         return NextCardResponse(card=None, session_complete=True)
     
-    card = query.order_by(Card.next_review).first()
+    # Get the next due card in the session's queue order
+    now = datetime.now()
+    card_ids = session_queue(db, session, now, study_day_for(now), 1)
+    card = next(iter(cards_by_id(db, card_ids)), None)
+    if card is not None and session.target_minutes and not within_budget(db, session, card):
+        card = None
     return NextCardResponse(
         card=CardResponse(**card.__dict__) if card else None,
         session_complete=card is None
@@ -53,39 +99,93 @@ def submit_review(session_id: int, review: SessionReview, db: Session = Depends(
     session = db.query(StudySession).filter(StudySession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    if session.session_type == CRAM_SESSION:
+        raise HTTPException(status_code=400, detail="Cram sessions are studied through the cram stream")
     
     card = db.query(Card).filter(Card.id == review.card_id).first()
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
+    before = card_state(card)
+    
     # Update card using SM-2 algorithm
+    reviewed_at = datetime.now()
     algorithm = SM2Algorithm()
     next_review_date, new_ease_factor, new_interval, new_repetitions = algorithm.calculate_next_review_date(
         quality=review.quality, ease_factor=card.ease_factor,
-        interval=card.interval, repetitions=card.repetitions
+        interval=card.interval, repetitions=card.repetitions,
+        base_date=reviewed_at, balance=interval_balancer(db, card.deck_name)
     )
     
     card.ease_factor = new_ease_factor
     card.interval = new_interval
     card.repetitions = new_repetitions
     card.next_review = next_review_date
-    card.last_reviewed = datetime.now()
+    card.last_reviewed = reviewed_at
     
     # Record the review
     card_review = CardReview(
         session_id=session_id, card_id=review.card_id,
-        quality=review.quality, response_time=review.response_time
+        quality=review.quality, response_time=review.response_time,
+        reviewed_at=reviewed_at, study_day=study_day_for(reviewed_at)
     )
     db.add(card_review)
     
     # Update session stats
     session.cards_studied += 1
+    session.seconds_studied = (session.seconds_studied or 0.0) + review.response_time
     if review.quality >= 3:
         session.cards_correct += 1
     
+    db.flush()
+    card_changed(db, before, card_state(card), reviewed=True)
+    review_logged(
+        db, card, review.quality, review.response_time, reviewed_at,
+        session=session, introduced=before.last_reviewed is None
+    )
+    db.commit()
+    db.refresh(session)
+    return _session_response(session, session_complete=False)
+
+
+@router.get("/sessions/{session_id}/cram")
+def stream_cram_cards(
+    session_id: int,
+    after_id: int = Query(0, ge=0),
+    batch_size: int = Query(CRAM_BATCH_SIZE, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Stream a cram session's cards as NDJSON, one batch per line"""
+    session = _cram_session(db, session_id)
+    return StreamingResponse(
+        cram_stream(db.get_bind(), session, after_id, batch_size), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/sessions/{session_id}/cram/results", response_model=CramResultsResponse)
+def submit_cram_results(session_id: int, payload: CramResultsRequest, db: Session = Depends(get_db)):
+    """Log a batch of cram results without rescheduling the cards"""
+    session = _cram_session(db, session_id)
+    try:
+        logged = log_cram_results(db, session, [result.model_dump() for result in payload.results], datetime.now())
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     db.commit()
     db.refresh(session)
-    return StudySessionResponse(**session.__dict__, session_complete=False)
+    return CramResultsResponse(
+        session_id=session.id, logged=logged,
+        cards_studied=session.cards_studied, cards_correct=session.cards_correct
+    )
+
+
+def _cram_session(db: Session, session_id: int) -> StudySession:
+    """Session by ID, which must be a cram session"""
+    session = db.query(StudySession).filter(StudySession.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if session.session_type != CRAM_SESSION:
+        raise HTTPException(status_code=400, detail="Not a cram session")
+    return session
 
 
 @router.put("/sessions/{session_id}/end", response_model=StudySessionResponse)
@@ -95,23 +195,35 @@ def end_study_session(session_id: int, db: Session = Depends(get_db)):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    was_open = session.ended_at is None
     session.ended_at = datetime.now()
+    if was_open:
+        session_ended(db, session)
     db.commit()
     db.refresh(session)
-    return StudySessionResponse(**session.__dict__, session_complete=True)
+    return _session_response(session, session_complete=True)
+
+
+@router.get("/sessions/{session_id}/summary", response_model=SessionSummaryResponse)
+def get_study_session_summary(session_id: int, db: Session = Depends(get_db)):
+    """Get a study session's quality, timing and per-deck summary"""
+    session = db.query(StudySession).filter(StudySession.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return SessionSummaryResponse(**get_session_summary(db, session))
 
 
 @router.get("/stats", response_model=StudyStatsResponse)
-def get_study_stats(db: Session = Depends(get_db)):
-    """Get overall study statistics"""
-    total_sessions = db.query(StudySession).count()
-    total_cards_studied = db.query(func.sum(StudySession.cards_studied)).scalar() or 0
-    total_cards_correct = db.query(func.sum(StudySession.cards_correct)).scalar() or 0
+def get_study_stats(deck_name: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get overall (or per-deck) study statistics"""
+    # Running totals are maintained by the session write hooks
+    totals = get_study_totals(db, deck_name)
     
-    average_accuracy = (total_cards_correct / total_cards_studied * 100) if total_cards_studied > 0 else 0
+    average_accuracy = (totals.cards_correct / totals.cards_studied * 100) if totals.cards_studied > 0 else 0
     
     return StudyStatsResponse(
-        total_sessions=total_sessions,
-        total_cards_studied=total_cards_studied,
+        total_sessions=totals.sessions_started,
+        total_cards_studied=totals.cards_studied,
         average_accuracy=round(average_accuracy, 2)
     )
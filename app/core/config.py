@@ -21,6 +21,36 @@ class Settings(BaseSettings):
     secret_key: Optional[str] = None
     access_token_expire_minutes: int = 30
     
+    # Study Day Settings
+    user_timezone: Optional[str] = None  # IANA name, e.g. "Europe/Berlin"; None uses server time
+    day_rollover_hour: int = 0  # Local hour at which a new study day starts
+    
+    # Analytics Cache Settings
+    analytics_cache_ttl_seconds: float = 300.0
+    analytics_cache_max_entries: int = 1024
+    
+    # Reminder Settings
+    reminder_sink: str = "outbox"  # log, webhook or outbox
+    reminder_webhook_url: Optional[str] = None
+    
+    # Outbox Settings
+    outbox_webhook_url: Optional[str] = None  # None logs events instead
+    outbox_batch_size: int = 50
+    outbox_concurrency: int = 4
+    outbox_max_attempts: int = 8
+    
+    # Schedule Cache Settings
+    schedule_cache_enabled: bool = False  # Serve due queries from in-memory NumPy arrays
+    
+    # Load Balancing Settings
+    load_balance_enabled: bool = False  # Spread review intervals over the least-loaded nearby day
+    load_balance_seed: Optional[int] = None  # Fixed seed makes tie-breaking reproducible
+    
+    # Daily Limit Settings
+    new_cards_per_day: int = 20  # Default per deck, overridable per deck
+    reviews_per_day: int = 200  # Default per deck, overridable per deck
+    new_card_interleave: int = 4  # Mixed sessions serve one new card after this many reviews
+    
     # CORS Settings
     allowed_origins: list = ["*"]  # Configure properly for production
     
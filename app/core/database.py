@@ -1,8 +1,13 @@
-from sqlalchemy import create_engine
+import logging
+from typing import Callable
+from sqlalchemy import create_engine, event, inspect, literal, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create SQLite database URL
 SQLALCHEMY_DATABASE_URL = settings.database_url or "sqlite:///./mnemosyne.db"
 
@@ -28,12 +33,111 @@ def get_db():
         db.close()
 
 
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+_AFTER_END_KEY = "after_transaction_end_callbacks"
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Run a callback once the session's current transaction commits
+
+    Used to update in-process state (caches, indexes, wake-ups) only after the
+    write it mirrors is durable. Callbacks are dropped if the transaction
+    rolls back.
+    """
+    db.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(db: Session) -> None:
+    for callback in db.info.pop(_AFTER_COMMIT_KEY, ()):
+        try:
+            callback()
+        except Exception:
+            logger.exception("After-commit callback failed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit_callbacks(db: Session) -> None:
+    db.info.pop(_AFTER_COMMIT_KEY, None)
+
+
+def after_transaction_end(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Run a callback once the session's current transaction ends
+
+    Runs whether the transaction commits, rolls back or is closed, and after
+    any after_commit callbacks, so it suits releasing state taken for a write.
+    """
+    db.info.setdefault(_AFTER_END_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_after_transaction_end_callbacks(db: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    db.info.pop(_AFTER_COMMIT_KEY, None)
+    for callback in db.info.pop(_AFTER_END_KEY, ()):
+        try:
+            callback()
+        except Exception:
+            logger.exception("After-transaction-end callback failed")
+
+
 def create_tables():
     """Create all tables in the database"""
-    # Import all models to ensure they're registered with Base
-    from app.models.card import Card
-    from app.models.study_session import StudySession, CardReview
-    from app.models.calendar import DailyActivity, StudyReminder
+    # Import all models to ensure they're registered with their Base
+    from app.models.card import Base as ModelBase, Card, DeckLimits
+    from app.models.study_session import (
+        StudySession, CardReview, CardStats, DeckResponseTime, SessionSummary, StudyTotals
+    )
+    from app.models.calendar import (
+        DailyActivity, StudyReminder, DeckSnapshot, DueForecast, LearningStreak,
+        OutboxEvent, CacheGeneration, MaintenanceCheckpoint, DeckTreeTotals, DeckTreeForecast
+    )
     
-    # Create all tables using the shared Base
-    Base.metadata.create_all(bind=engine)
+    # Create all tables using the Base the models are declared on
+    ModelBase.metadata.create_all(bind=engine)
+    add_missing_columns(engine, ModelBase.metadata)
+
+
+def add_missing_columns(bind: Engine, metadata) -> int:
+    """
+    Bring tables created by an older version up to the current models
+
+    create_all only creates missing tables, so columns and indexes added to
+    an existing table are added here: each missing column with an
+    ALTER TABLE ... ADD COLUMN carrying its scalar default, then any missing
+    index.
+
+    Args:
+        bind: Engine of the database to upgrade
+        metadata: Metadata the models are declared on
+
+    Returns:
+        Number of columns added
+    """
+    inspector = inspect(bind)
+    added = 0
+    with bind.begin() as connection:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    value = literal(column.default.arg, type_=column.type).compile(
+                        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    ddl += f" DEFAULT {value}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                connection.execute(text(ddl))
+                logger.info("Added column %s.%s", table.name, column.name)
+                added += 1
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return added
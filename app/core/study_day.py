@@ -0,0 +1,84 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from zoneinfo import ZoneInfo
+from app.core.config import settings
+
+
+def _user_timezone() -> Optional[ZoneInfo]:
+    """Configured learner timezone, or None to use server time"""
+    return ZoneInfo(settings.user_timezone) if settings.user_timezone else None
+
+
+def study_day_for(moment: datetime) -> date:
+    """
+    Study day a moment belongs to in the learner's timezone
+
+    Naive datetimes are taken to be server-local time, which is how the API
+    stores them. Moments before the rollover hour count towards the previous
+    day, so a late-night session stays on the day it started.
+
+    Args:
+        moment: Point in time to classify
+
+    Returns:
+        The learner's study day
+    """
+    tz = _user_timezone()
+    if tz is not None:
+        moment = moment.astimezone(tz)
+    return (moment - timedelta(hours=settings.day_rollover_hour)).date()
+
+
+def current_study_day() -> date:
+    """The learner's study day right now"""
+    return study_day_for(datetime.now())
+
+
+def study_day_start(day: date) -> datetime:
+    """
+    Server-local naive datetime at which a study day begins
+
+    Args:
+        day: Study day
+
+    Returns:
+        Start of the study day in server-local time
+    """
+    start = datetime.combine(day, time(hour=settings.day_rollover_hour))
+    tz = _user_timezone()
+    if tz is not None:
+        start = start.replace(tzinfo=tz).astimezone().replace(tzinfo=None)
+    return start
+
+
+# Rows given a study day per batch when backfilling
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_study_days(db: Session) -> int:
+    """
+    Fill in the study day of sessions and reviews written before it was stored
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rows updated
+    """
+    from app.models.study_session import CardReview, StudySession
+
+    updated = 0
+    for model, timestamp in ((StudySession, StudySession.started_at), (CardReview, CardReview.reviewed_at)):
+        while True:
+            rows = db.query(model.id, timestamp).filter(
+                model.study_day.is_(None),
+                timestamp.isnot(None)
+            ).limit(BACKFILL_BATCH_SIZE).all()
+            if not rows:
+                break
+            db.execute(update(model), [{"id": row_id, "study_day": study_day_for(moment)} for row_id, moment in rows])
+            db.commit()
+            updated += len(rows)
+    return updated
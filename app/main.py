@@ -1,20 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import cards, study, calendar
-from app.core.database import create_tables
+from app.api.routes import cards, study, calendar, decks
+from app.core.database import SessionLocal, create_tables
+from app.core.study_day import backfill_study_days
+from app.services.deck_snapshots import run_snapshot_rollover
+from app.services.due_forecast import rebuild_due_forecast
+from app.services.deck_tree import rebuild_deck_tree
+from app.services.streaks import rebuild_streak
+from app.services.card_stats import backfill_card_stats, backfill_deck_response_times
+from app.services.study_totals import ensure_study_totals
+from app.services.schedule_cache import active_schedule_cache
+from app.services.analytics_cache import analytics_cache
+from app.services.reminders import reminder_scheduler
+from app.services.outbox import outbox_dispatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create database tables and run background jobs for the app's lifetime"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        # Reconcile derived state with any changes made outside the API
+        backfill_study_days(db)
+        rebuild_due_forecast(db)
+        rebuild_deck_tree(db)
+        rebuild_streak(db)
+        backfill_card_stats(db)
+        backfill_deck_response_times(db)
+        ensure_study_totals(db)
+        # Build the in-memory schedule cache up front when it is enabled
+        active_schedule_cache(db)
+    finally:
+        db.close()
+    tasks = [
+        asyncio.create_task(run_snapshot_rollover(SessionLocal)),
+        asyncio.create_task(reminder_scheduler.run()),
+        asyncio.create_task(outbox_dispatcher.run()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+
 
 # Create FastAPI instance
 app = FastAPI(
     title="Mnemosyne API",
     description="A spaced repetition learning system API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Create database tables on startup
-@app.on_event("startup")
-def startup_event():
-    create_tables()
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -46,11 +84,19 @@ async def api_info():
             "health": "/health",
             "docs": "/docs",
             "redoc": "/redoc",
-            "cards": "/api/cards"
+            "cards": "/api/cards",
+            "decks": "/api/decks",
+            "cache_stats": "/api/cache/stats"
         }
     }
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Analytics response cache counters"""
+    return analytics_cache.stats()
+
 # Include routers
 app.include_router(cards.router, prefix="/api/cards", tags=["cards"])
 app.include_router(study.router, prefix="/api/study", tags=["study"])
 app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"])
+app.include_router(decks.router, prefix="/api/decks", tags=["decks"])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from datetime import datetime, date
 from app.models.card import Base
@@ -25,5 +25,109 @@ class StudyReminder(Base):
     time = Column(String(5), nullable=False)  # HH:MM format
     enabled = Column(Boolean, default=True)
     deck_names = Column(Text, nullable=True)  # JSON array of deck names
+    last_fired_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class DeckSnapshot(Base):
+    """Daily per-deck snapshot of collection size and review activity"""
+    __tablename__ = "deck_snapshots"
+    __table_args__ = (
+        UniqueConstraint("deck_name", "date", name="uq_deck_snapshots_deck_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    deck_name = Column(String(100), nullable=False)
+    date = Column(Date, nullable=False)
+    card_count = Column(Integer, default=0)
+    reviewed_count = Column(Integer, default=0)  # Reviews logged on this day
+    correct_count = Column(Integer, default=0)   # Reviews with quality >= 3
+    introduced_count = Column(Integer, default=0)  # Reviews that were a card's first
+    new_count = Column(Integer, default=0)       # Cards never reviewed
+    mature_count = Column(Integer, default=0)    # Cards with a mature interval
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DueForecast(Base):
+    """Number of cards per deck whose next review falls on a given day"""
+    __tablename__ = "due_forecast"
+    __table_args__ = (
+        UniqueConstraint("deck_name", "due_date", name="uq_due_forecast_deck_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    deck_name = Column(String(100), nullable=False)
+    due_date = Column(Date, nullable=False, index=True)
+    card_count = Column(Integer, default=0)
+
+
+class LearningStreak(Base):
+    """Persisted learning streak, kept as a single row"""
+    __tablename__ = "learning_streaks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    current_streak = Column(Integer, default=0)
+    longest_streak = Column(Integer, default=0)
+    last_study_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class OutboxEvent(Base):
+    """Notification written with its triggering change, delivered later"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON document
+    status = Column(String(20), nullable=False, default="pending")  # pending, delivered, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CacheGeneration(Base):
+    """Counter bumped with every write to data that workers cache in memory"""
+    __tablename__ = "cache_generations"
+
+    name = Column(String(50), primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+
+
+class MaintenanceCheckpoint(Base):
+    """Progress of a resumable maintenance job, committed with each finished batch"""
+    __tablename__ = "maintenance_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)  # Last key fully processed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DeckTreeTotals(Base):
+    """Card counts of a deck path and everything nested below it"""
+    __tablename__ = "deck_tree_totals"
+
+    path = Column(String(100), primary_key=True)  # e.g. "Languages::Spanish"
+    parent = Column(String(100), nullable=True, index=True)  # None for top-level decks
+    depth = Column(Integer, nullable=False, default=0)
+    deck_card_count = Column(Integer, default=0)  # Cards whose deck is exactly this path
+    card_count = Column(Integer, default=0)       # Cards in the whole subtree
+    new_count = Column(Integer, default=0)        # Subtree cards never reviewed
+
+
+class DeckTreeForecast(Base):
+    """Number of cards in a deck subtree whose next review falls on a given day"""
+    __tablename__ = "deck_tree_forecast"
+    __table_args__ = (
+        UniqueConstraint("path", "due_date", name="uq_deck_tree_forecast_path_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(100), nullable=False)
+    due_date = Column(Date, nullable=False)
+    card_count = Column(Integer, default=0)
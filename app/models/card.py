@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -12,6 +12,14 @@ class Card(Base):
     Card model for spaced repetition learning system
     """
     __tablename__ = "cards"
+    __table_args__ = (
+        # Serve a deck's / every deck's unseen cards in creation order without sorting. Partial,
+        # as lapsed cards are reset to repetitions = 0 too and would otherwise have to be skipped
+        Index("ix_cards_unseen_deck_name_id", "deck_name", "id", sqlite_where=text("last_reviewed IS NULL")),
+        Index("ix_cards_unseen_id", "id", sqlite_where=text("last_reviewed IS NULL")),
+        # Serves each deck's due cards in next_review order for merged multi-deck queues
+        Index("ix_cards_deck_name_next_review", "deck_name", "next_review"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     front = Column(Text, nullable=False)  # Question/prompt side
@@ -31,3 +39,12 @@ class Card(Base):
 
     def __repr__(self):
         return f"<Card(id={self.id}, front='{self.front[:50]}...', deck='{self.deck_name}')>"
+
+
+class DeckLimits(Base):
+    """Per-deck daily study limits overriding the configured defaults"""
+    __tablename__ = "deck_limits"
+
+    deck_name = Column(String(100), primary_key=True)
+    new_cards_per_day = Column(Integer, nullable=True)  # None uses the default
+    reviews_per_day = Column(Integer, nullable=True)    # None uses the default
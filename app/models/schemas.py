@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 
 
 class CardBase(BaseModel):
@@ -15,6 +15,34 @@ class CardCreate(CardBase):
     pass
 
 
+class CardBulkCreate(BaseModel):
+    """Schema for creating many cards at once"""
+    cards: list[CardCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class CardBulkCreateResponse(BaseModel):
+    """Schema for bulk card creation responses"""
+    created: int
+    ids: list[int]
+
+
+class SpreadBacklogRequest(BaseModel):
+    """Schema for spreading overdue cards over the coming days"""
+    days: int = Field(default=7, ge=1, le=365)
+    deck_name: Optional[str] = None
+    deck_priorities: dict[str, Annotated[float, Field(gt=0, allow_inf_nan=False)]] = Field(
+        default={}, description="Positive weight per deck, higher is reviewed sooner"
+    )
+
+
+class SpreadBacklogResponse(BaseModel):
+    """Schema for spread backlog results"""
+    overdue_cards: int
+    rescheduled_cards: int
+    days: int
+    per_day: list[dict]
+
+
 class CardUpdate(BaseModel):
     """Schema for updating an existing card"""
     front: Optional[str] = Field(None, min_length=1, max_length=2000)
@@ -43,6 +71,35 @@ class CardReview(BaseModel):
     response_time: float = Field(default=0.0, ge=0, description="Response time in seconds")
 
 
+class ReviewRecordResponse(BaseModel):
+    """Schema for one logged review of a card"""
+    id: int
+    session_id: Optional[int]
+    quality: int
+    response_time: float
+    reviewed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CardStatsResponse(BaseModel):
+    """Schema for a card's running review totals"""
+    card_id: int
+    review_count: int
+    lapse_count: int
+    average_response_time: float
+    last_reviewed_at: Optional[datetime]
+
+
+class CardReviewHistoryResponse(BaseModel):
+    """Schema for a page of a card's review history"""
+    card_id: int
+    stats: CardStatsResponse
+    reviews: list[ReviewRecordResponse]
+    next_cursor: Optional[str]
+
+
 class CardListResponse(BaseModel):
     """Schema for paginated card list responses"""
     cards: list[CardResponse]
@@ -55,18 +112,32 @@ class CardListResponse(BaseModel):
 class StudySessionCreate(BaseModel):
     """Schema for creating a study session"""
     deck_name: Optional[str] = None
-    session_type: str = Field(default="review", pattern="^(review|new|mixed)$")
-    max_cards: int = Field(default=20, ge=1, le=100)
+    deck_names: Optional[list[str]] = Field(None, min_length=1, max_length=100, description="Study several decks at once")
+    deck_tree: Optional[str] = Field(None, max_length=100, description="Study a deck and every deck nested below it")
+    session_type: str = Field(default="review", pattern="^(review|new|mixed|cram)$")
+    max_cards: int = Field(default=20, ge=1, le=10000, description="At most 100 except for cram sessions")
+    target_minutes: Optional[int] = Field(None, ge=1, le=240, description="Size the session to a time budget instead of max_cards")
+    queue_order: str = Field(default="due", pattern="^(due|retrievability)$")
+
+    @model_validator(mode="after")
+    def check_max_cards(self):
+        if self.session_type != "cram" and self.max_cards > 100:
+            raise ValueError("max_cards above 100 is only allowed for cram sessions")
+        return self
 
 
 class StudySessionResponse(BaseModel):
     """Schema for study session responses"""
     id: int
     deck_name: Optional[str]
+    deck_names: Optional[list[str]] = None
     session_type: str
     max_cards: int
+    target_minutes: Optional[int] = None
+    queue_order: Optional[str] = "due"
     cards_studied: int
     cards_correct: int
+    seconds_studied: Optional[float] = 0.0
     started_at: datetime
     ended_at: Optional[datetime]
     session_complete: bool = False
@@ -75,6 +146,43 @@ class StudySessionResponse(BaseModel):
         from_attributes = True
 
 
+class CramResult(BaseModel):
+    """Schema for one card result of a cram session"""
+    card_id: int
+    quality: int = Field(..., ge=0, le=5)
+    response_time: float = Field(default=0.0, ge=0)
+
+
+class CramResultsRequest(BaseModel):
+    """Schema for a batch of cram results"""
+    results: list[CramResult] = Field(..., min_length=1, max_length=1000)
+
+
+class CramResultsResponse(BaseModel):
+    """Schema for logged cram results"""
+    session_id: int
+    logged: int
+    cards_studied: int
+    cards_correct: int
+
+
+class SessionSummaryResponse(BaseModel):
+    """Schema for a study session summary"""
+    session_id: int
+    deck_name: Optional[str]
+    session_type: Optional[str]
+    started_at: Optional[datetime]
+    ended_at: Optional[datetime]
+    reviews: int
+    correct: int
+    accuracy: float
+    quality_distribution: dict[str, int]
+    response_time: dict[str, float]
+    decks: list[dict]
+    failed_cards: list[dict]
+    frozen: bool
+
+
 class SessionReview(BaseModel):
     """Schema for reviewing a card within a session"""
     card_id: int
@@ -122,6 +230,21 @@ class MonthlyHeatmapResponse(BaseModel):
     activity_data: list[dict]
 
 
+class RangeAnalyticsResponse(BaseModel):
+    """Schema for activity totals over a date range"""
+    start_date: str
+    end_date: str
+    deck_name: Optional[str]
+    days: int
+    cards_studied: int
+    cards_correct: int
+    sessions_completed: Optional[int]
+    study_time_minutes: Optional[int]
+    average_cards_per_day: float
+    accuracy: float
+    activity_data: Optional[list[dict]] = None
+
+
 class DeckProgressResponse(BaseModel):
     """Schema for deck progress over time"""
     deck_name: str
@@ -129,6 +252,97 @@ class DeckProgressResponse(BaseModel):
     progress_data: list[dict]
 
 
+class DeckStatsResponse(BaseModel):
+    """Schema for deck health statistics"""
+    deck_name: str
+    total_cards: int
+    new_cards: int
+    young_cards: int
+    mature_cards: int
+    overdue_cards: int
+    due_today: int
+    ease_histogram: list[dict]
+    interval_histogram: list[dict]
+    retention_window_days: int
+    recent_reviews: int
+    average_retention: Optional[float]
+
+
+class DeckNodeResponse(BaseModel):
+    """Schema for a deck path's rolled-up counts"""
+    path: str
+    name: str
+    deck_card_count: int
+    card_count: int
+    new_count: int
+    due_count: int
+
+
+class DeckTreeResponse(BaseModel):
+    """Schema for nested decks with rolled-up counts"""
+    root: Optional[str]
+    decks: list[dict]
+
+
+class DeckLimitsUpdate(BaseModel):
+    """Schema for overriding a deck's daily limits (null restores the default)"""
+    new_cards_per_day: Optional[int] = Field(None, ge=0, le=10000)
+    reviews_per_day: Optional[int] = Field(None, ge=0, le=100000)
+
+
+class DeckLimitsResponse(BaseModel):
+    """Schema for a deck's daily limits and today's usage"""
+    deck_name: str
+    new_cards_per_day: int
+    reviews_per_day: int
+    new_cards_today: int
+    reviews_today: int
+
+
+class DeckRetentionResponse(BaseModel):
+    """Schema for a deck's predicted recall right now"""
+    deck_name: str
+    as_of: datetime
+    total_cards: int
+    reviewed_cards: int
+    new_cards: int
+    expected_recalled: float
+    average_retrievability: Optional[float]
+    distribution: list[dict]
+
+
+class ForgettingCurveResponse(BaseModel):
+    """Schema for a deck's empirical forgetting curve"""
+    deck_name: str
+    reviews: int
+    stability_days: Optional[float]
+    curve: list[dict]
+
+
+class SimulationRequest(BaseModel):
+    """Schema for deck workload simulation parameters"""
+    days: int = Field(default=365, ge=1, le=3650)
+    new_cards_per_day: int = Field(default=20, ge=0, le=1000)
+    additional_new_cards: int = Field(default=0, ge=0, le=100000)
+    recall_model: str = Field(default="retrievability", pattern="^(retrievability|constant)$")
+    recall_probability: float = Field(default=0.9, ge=0.0, le=1.0)
+    seed: Optional[int] = None
+
+
+class SimulationResponse(BaseModel):
+    """Schema for simulated deck workload"""
+    deck_name: str
+    days: int
+    cards: int
+    seconds_per_review: float
+    total_reviews: int
+    average_daily_reviews: float
+    peak_daily_reviews: int
+    total_time_minutes: float
+    average_retention: Optional[float]
+    daily: list[dict]
+
+
 class ReminderCreate(BaseModel):
     """Schema for creating study reminders"""
     time: str = Field(..., pattern="^([01]?[0-9]|2[0-3]):[0-5][0-9]$")
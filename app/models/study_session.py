@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Date, Index, Text
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.models.card import Base
@@ -10,21 +10,73 @@ class StudySession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     deck_name = Column(String(100), nullable=True)
-    session_type = Column(String(50), default="review")  # review, new, mixed
+    deck_names = Column(Text, nullable=True)  # JSON array of deck names for multi-deck sessions
+    session_type = Column(String(50), default="review")  # review, new, mixed, cram
     max_cards = Column(Integer, default=20)
+    target_minutes = Column(Integer, nullable=True)  # Time budget the session was sized to
+    queue_order = Column(String(20), default="due")  # due, retrievability
     cards_studied = Column(Integer, default=0)
     cards_correct = Column(Integer, default=0)
+    seconds_studied = Column(Float, default=0.0)  # Sum of submitted response times
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     ended_at = Column(DateTime(timezone=True), nullable=True)
+    study_day = Column(Date, nullable=True, index=True)  # Learner's local day of started_at
 
 
 class CardReview(Base):
     """Card review record within a session"""
     __tablename__ = "card_reviews"
+    __table_args__ = (
+        # Serves per-card history pages newest first without touching other cards' reviews
+        Index("ix_card_reviews_card_id_reviewed_at", "card_id", "reviewed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("study_sessions.id"))
+    session_id = Column(Integer, ForeignKey("study_sessions.id"), index=True)
     card_id = Column(Integer, ForeignKey("cards.id"))
     quality = Column(Integer, nullable=False)
     response_time = Column(Float, default=0.0)
     reviewed_at = Column(DateTime(timezone=True), server_default=func.now())
+    study_day = Column(Date, nullable=True, index=True)  # Learner's local day of reviewed_at
+    cram = Column(Boolean, default=False, nullable=False)  # Logged by a cram session; never replayed into schedules
+
+
+class CardStats(Base):
+    """Running review totals for one card, maintained on every review"""
+    __tablename__ = "card_stats"
+
+    card_id = Column(Integer, ForeignKey("cards.id"), primary_key=True)
+    review_count = Column(Integer, default=0, nullable=False)
+    lapse_count = Column(Integer, default=0, nullable=False)  # Reviews graded below 3
+    total_response_time = Column(Float, default=0.0, nullable=False)
+    response_time_ewma = Column(Float, nullable=True)  # Recent seconds per review, None until timed
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class DeckResponseTime(Base):
+    """Moving average of seconds per review in one deck, maintained on every timed review"""
+    __tablename__ = "deck_response_times"
+
+    deck_name = Column(String(100), primary_key=True)
+    response_time_ewma = Column(Float, nullable=False)
+    review_count = Column(Integer, default=0, nullable=False)  # Timed reviews folded in
+
+
+class SessionSummary(Base):
+    """Summary of a study session, frozen when the session ends"""
+    __tablename__ = "session_summaries"
+
+    session_id = Column(Integer, ForeignKey("study_sessions.id"), primary_key=True)
+    summary = Column(Text, nullable=False)  # JSON document
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class StudyTotals(Base):
+    """Running session totals for all decks ("all") or one deck ("deck:<name>")"""
+    __tablename__ = "study_totals"
+
+    scope = Column(String(110), primary_key=True)
+    sessions_started = Column(Integer, default=0, nullable=False)
+    cards_studied = Column(Integer, default=0, nullable=False)
+    cards_correct = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
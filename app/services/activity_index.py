@@ -0,0 +1,214 @@
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.database import after_commit, after_transaction_end
+from app.models.calendar import DailyActivity, DeckSnapshot
+
+# Metrics tracked for all decks together, from the daily activity rollups
+GLOBAL_METRICS = ("cards_studied", "cards_correct", "sessions_completed", "study_time_minutes")
+# Metrics tracked per deck, from the deck snapshots
+DECK_METRICS = ("cards_studied", "cards_correct")
+
+# Session info key marking a transaction that has activity waiting to be recorded
+_PENDING_KEY = "activity_index_pending"
+
+
+class FenwickTree:
+    """Binary indexed tree over integers: point add and prefix sum in O(log n)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    @classmethod
+    def from_values(cls, values: List[int]) -> "FenwickTree":
+        """Build a tree from a list of values in O(n)"""
+        tree = cls(len(values))
+        tree._tree[1:] = values
+        for i in range(1, tree.size + 1):
+            parent = i + (i & -i)
+            if parent <= tree.size:
+                tree._tree[parent] += tree._tree[i]
+        return tree
+
+    def add(self, index: int, delta: int) -> None:
+        """Add delta to the value at a zero-based index"""
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end: int) -> int:
+        """Sum of the values at indexes [0, end)"""
+        total = 0
+        i = min(end, self.size)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, start: int, end: int) -> int:
+        """Sum of the values at indexes [start, end)"""
+        if end <= start:
+            return 0
+        return self.prefix_sum(end) - self.prefix_sum(max(start, 0))
+
+
+class ActivitySeries:
+    """Daily metric values over a contiguous range of days, one tree per metric"""
+
+    def __init__(self, metrics: Tuple[str, ...], rows: Iterable[Tuple[date, Tuple[int, ...]]]):
+        self.metrics = metrics
+        rows = list(rows)
+        self.origin = min((day for day, _ in rows), default=date.today())
+        last = max((day for day, _ in rows), default=self.origin)
+        self._build(self.origin, (last - self.origin).days + 1, rows)
+
+    def add(self, day: date, deltas: Dict[str, int]) -> None:
+        """Add metric deltas to a day, growing the range if needed"""
+        if day < self.origin or (day - self.origin).days >= self.size:
+            self._grow(day)
+        index = (day - self.origin).days
+        for metric, delta in deltas.items():
+            if delta and metric in self._values:
+                self._values[metric][index] += delta
+                self._trees[metric].add(index, delta)
+
+    def totals(self, start: date, end: date) -> Dict[str, int]:
+        """Metric sums for the days in [start, end] in O(log n)"""
+        first = (start - self.origin).days
+        last = (end - self.origin).days + 1
+        return {
+            metric: tree.range_sum(max(first, 0), min(last, self.size))
+            for metric, tree in self._trees.items()
+        }
+
+    def daily(self, start: date, end: date) -> List[Tuple[date, Dict[str, int]]]:
+        """Per-day values for the days in [start, end] that have any activity"""
+        days = []
+        first = max((start - self.origin).days, 0)
+        last = min((end - self.origin).days + 1, self.size)
+        for index in range(first, last):
+            values = {metric: self._values[metric][index] for metric in self.metrics}
+            if any(values.values()):
+                days.append((self.origin + timedelta(days=index), values))
+        return days
+
+    def _build(self, origin: date, size: int, rows) -> None:
+        self.origin = origin
+        self.size = size
+        self._values = {metric: [0] * size for metric in self.metrics}
+        for day, values in rows:
+            index = (day - origin).days
+            for metric, value in zip(self.metrics, values):
+                self._values[metric][index] += value or 0
+        self._trees = {
+            metric: FenwickTree.from_values(values) for metric, values in self._values.items()
+        }
+
+    def _grow(self, day: date) -> None:
+        # Double the covered range so repeated growth stays amortised O(1) per day
+        origin = min(self.origin, day)
+        end = max(self.origin + timedelta(days=self.size - 1), day)
+        size = max((end - origin).days + 1, self.size * 2)
+        if day < self.origin:
+            origin = end - timedelta(days=size - 1)
+        rows = [
+            (self.origin + timedelta(days=index), tuple(self._values[metric][index] for metric in self.metrics))
+            for index in range(self.size)
+        ]
+        self._build(origin, size, rows)
+
+
+class ActivityIndex:
+    """
+    In-memory range index over daily study activity
+
+    One series covers all decks (from daily_activities) and one per deck is
+    loaded on first use (from deck_snapshots). After loading, series are kept
+    current by the write hooks, so range queries never touch the database.
+
+    A load cannot tell whether a write that committed around it is already
+    in the rows it read, so a series is only cached when no write is in
+    flight: registering a write takes the same lock as loading, and the
+    write stays in flight until its transaction ends.
+    """
+
+    def __init__(self):
+        self._series: Dict[Optional[str], ActivitySeries] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0  # Transactions with activity registered but not yet ended
+
+    def series(self, db: Session, deck_name: Optional[str] = None) -> ActivitySeries:
+        """Series for a deck (or all decks), loading it from the database once"""
+        with self._lock:
+            series = self._series.get(deck_name)
+            if series is None:
+                series = self._load(db, deck_name)
+                if not self._in_flight:
+                    self._series[deck_name] = series
+            return series
+
+    def record_on_commit(self, db: Session, day: date, deck_name: Optional[str], **deltas: int) -> None:
+        """
+        Record activity once the session's transaction commits
+
+        Args:
+            db: Database session holding the write
+            day: Study day of the activity
+            deck_name: Deck of the activity, or None for the all-decks series only
+            **deltas: Metric deltas, as accepted by record
+        """
+        if not db.info.get(_PENDING_KEY):
+            with self._lock:
+                self._in_flight += 1
+            db.info[_PENDING_KEY] = True
+            after_transaction_end(db, lambda: self._write_ended(db))
+        after_commit(db, lambda: self.record(day, deck_name, **deltas))
+
+    def _write_ended(self, db: Session) -> None:
+        db.info.pop(_PENDING_KEY, None)
+        with self._lock:
+            self._in_flight -= 1
+
+    def record(self, day: date, deck_name: Optional[str], cards_studied: int = 0, cards_correct: int = 0,
+               sessions_completed: int = 0, study_time_minutes: int = 0) -> None:
+        """
+        Apply committed activity to the loaded series
+
+        Series that are not loaded yet are skipped; they will read the
+        committed rows when first queried.
+        """
+        deltas = {
+            "cards_studied": cards_studied,
+            "cards_correct": cards_correct,
+            "sessions_completed": sessions_completed,
+            "study_time_minutes": study_time_minutes
+        }
+        with self._lock:
+            for key in {None, deck_name}:
+                series = self._series.get(key)
+                if series is not None:
+                    series.add(day, deltas)
+
+    def clear(self) -> None:
+        """Forget every loaded series"""
+        with self._lock:
+            self._series.clear()
+
+    def _load(self, db: Session, deck_name: Optional[str]) -> ActivitySeries:
+        if deck_name is None:
+            rows = db.query(
+                DailyActivity.date, DailyActivity.cards_studied, DailyActivity.cards_correct,
+                DailyActivity.sessions_completed, DailyActivity.study_time_minutes
+            )
+            return ActivitySeries(GLOBAL_METRICS, ((row[0], tuple(row[1:])) for row in rows))
+
+        rows = db.query(
+            DeckSnapshot.date, DeckSnapshot.reviewed_count, DeckSnapshot.correct_count
+        ).filter(DeckSnapshot.deck_name == deck_name)
+        return ActivitySeries(DECK_METRICS, ((row[0], tuple(row[1:])) for row in rows))
+
+
+activity_index = ActivityIndex()
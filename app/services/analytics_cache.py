@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, NamedTuple, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import after_commit
+
+# Write topics an analytics response can depend on
+CARDS = "cards"        # Cards created, edited, deleted or rescheduled
+REVIEWS = "reviews"    # Reviews logged
+SESSIONS = "sessions"  # Study sessions started, updated or ended
+
+CacheKey = Tuple[str, Tuple[Hashable, ...], Optional[str]]
+
+
+class CacheEntry(NamedTuple):
+    """Cached response with its expiry time and invalidation topics"""
+    value: Any
+    expires_at: float
+    topics: Tuple[str, ...]
+
+
+class AnalyticsCache:
+    """
+    In-process LRU cache for analytics responses
+
+    Entries are keyed by endpoint, parameters and deck, expire after a TTL and
+    are dropped as soon as a committed write touches one of the topics they
+    depend on. Entries with no deck cover all decks and are invalidated by
+    writes to any deck.
+
+    Each invalidation also bumps its topics' generations. A reader takes the
+    generations before computing a response and passes them to set(), which
+    drops the response if a write to one of its topics committed in between,
+    so a response computed from pre-write data is never cached after the
+    write's invalidation has run.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._by_topic: Dict[str, Set[CacheKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    def generation(self) -> Dict[str, int]:
+        """Current write generation of every topic, to pass to set()"""
+        with self._lock:
+            return dict(self._generations)
+
+    def get(self, endpoint: str, params: Tuple[Hashable, ...] = (), deck: Optional[str] = None) -> Any:
+        """
+        Look up a cached response
+
+        Args:
+            endpoint: Endpoint name
+            params: Request parameters that shape the response
+            deck: Deck the response is scoped to, if any
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        key = (endpoint, params, deck)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(
+        self,
+        endpoint: str,
+        params: Tuple[Hashable, ...],
+        value: Any,
+        deck: Optional[str] = None,
+        depends_on: Iterable[str] = (CARDS,),
+        generation: Optional[Dict[str, int]] = None
+    ) -> Any:
+        """
+        Store a response and return it
+
+        Args:
+            endpoint: Endpoint name
+            params: Request parameters that shape the response
+            value: Response to cache
+            deck: Deck the response is scoped to, if any
+            depends_on: Write topics that invalidate the response
+            generation: Topic generations taken before the response was
+                computed; the response is not stored if any of its topics
+                has been invalidated since
+
+        Returns:
+            The response, whether or not it was stored
+        """
+        key = (endpoint, params, deck)
+        topics = tuple(depends_on)
+        with self._lock:
+            if generation is not None and any(
+                self._generations.get(topic, 0) != generation.get(topic, 0) for topic in topics
+            ):
+                self.stale_sets += 1
+                return value
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, self._clock() + self.ttl_seconds, topics)
+            for topic in topics:
+                self._by_topic.setdefault(topic, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, topics: Iterable[str], decks: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop entries that depend on any of the written topics
+
+        Args:
+            topics: Write topics touched
+            decks: Decks touched (None when the write is not deck-specific)
+
+        Returns:
+            Number of entries dropped
+        """
+        decks = None if decks is None else set(decks)
+        dropped = 0
+        with self._lock:
+            for topic in topics:
+                self._generations[topic] = self._generations.get(topic, 0) + 1
+                for key in list(self._by_topic.get(topic, ())):
+                    entry_deck = key[2]
+                    if decks is None or entry_deck is None or entry_deck in decks:
+                        self._remove(key)
+                        dropped += 1
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._by_topic.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = self.stale_sets = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets
+            }
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for topic in entry.topics:
+            keys = self._by_topic.get(topic)
+            if keys is not None:
+                keys.discard(key)
+
+
+analytics_cache = AnalyticsCache(
+    max_entries=settings.analytics_cache_max_entries,
+    ttl_seconds=settings.analytics_cache_ttl_seconds
+)
+
+
+def invalidate_on_commit(db: Session, topics: Iterable[str], decks: Optional[Iterable[str]] = None) -> None:
+    """
+    Queue an invalidation to run once the session's transaction commits
+
+    Invalidating after the commit keeps a concurrent reader from caching the
+    pre-write state between invalidation and commit; the generation check in
+    AnalyticsCache.set() covers a reader that stores it after the invalidation.
+
+    Args:
+        db: Database session performing the write
+        topics: Write topics touched
+        decks: Decks touched (None when the write is not deck-specific)
+    """
+    topics = tuple(topics)
+    decks = None if decks is None else tuple(decks)
+    after_commit(db, lambda: analytics_cache.invalidate(topics, decks))
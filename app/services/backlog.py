@@ -0,0 +1,129 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.study_day import study_day_for, study_day_start
+from app.models.card import Card
+from app.services.events import card_state, cards_changed
+from app.services.retrievability import SECONDS_PER_DAY, retrievability
+
+# Cards moved per UPDATE statement, well under SQLite's bound-parameter limit
+UPDATE_CHUNK_SIZE = 500
+
+
+def spread_order(
+    interval: np.ndarray,
+    last_reviewed: np.ndarray,
+    next_review: np.ndarray,
+    priority: np.ndarray,
+    now: datetime
+) -> np.ndarray:
+    """
+    Order overdue cards from most to least urgent
+
+    Urgency is the predicted chance of forgetting, 1 - retrievability,
+    scaled by the deck's priority. Cards never reviewed have nothing to
+    forget and, as in most_at_risk, come after every reviewed card. Ties go
+    to the card that has been due longest.
+
+    Args:
+        interval: Interval of each card in days
+        last_reviewed: Last review as epoch seconds, NaN if never
+        next_review: Next review as epoch seconds
+        priority: Priority weight of each card's deck
+        now: Current server-local time
+
+    Returns:
+        Indices of the cards, most urgent first
+    """
+    elapsed = (now.timestamp() - last_reviewed) / SECONDS_PER_DAY
+    risk = 1.0 - retrievability(np.nan_to_num(elapsed), interval)
+    risk[np.isnan(last_reviewed)] = -np.inf
+    return np.lexsort((next_review, -risk * priority))
+
+
+def spread_backlog(
+    db: Session,
+    now: datetime,
+    days: int,
+    deck_name: Optional[str] = None,
+    deck_priorities: Optional[Dict[str, float]] = None
+) -> dict:
+    """
+    Spread every overdue card evenly over the next `days` study days
+
+    Only cards that have been reviewed are a backlog; new cards are due from
+    creation and are left for the daily new-card limit to pace.
+
+    The most urgent share stays due today and the rest move to the start of
+    later days, so the backlog drains at a steady pace instead of as one
+    spike. Cards are ranked in one vectorised pass, moved with one
+    set-based UPDATE per target day and chunk of IDs, and the derived
+    tables, including the due forecast, are updated with a single batch of
+    changes in the same transaction. The caller commits.
+
+    Args:
+        db: Database session
+        now: Current server-local time
+        days: Number of study days to spread over, starting today
+        deck_name: Restrict to one deck
+        deck_priorities: Positive weight per deck (default 1); higher-priority decks
+            are reviewed sooner
+
+    Returns:
+        Number of overdue and rescheduled cards, and cards due per day
+    """
+    # Plain rows carry the attributes card_state reads, without hydrating cards
+    query = db.query(
+        Card.id, Card.deck_name, Card.interval, Card.ease_factor, Card.next_review, Card.last_reviewed
+    ).filter(Card.next_review <= now, Card.last_reviewed.isnot(None))
+    if deck_name:
+        query = query.filter(Card.deck_name == deck_name)
+    cards = query.order_by(Card.id).all()
+    today = study_day_for(now)
+    if not cards:
+        return {"overdue_cards": 0, "rescheduled_cards": 0, "days": days, "per_day": _per_day(today, Counter(), days)}
+
+    priorities = deck_priorities or {}
+    order = spread_order(
+        np.array([card.interval or 0 for card in cards], dtype=np.int32),
+        np.array([card.last_reviewed.timestamp() if card.last_reviewed else np.nan for card in cards]),
+        np.array([card.next_review.timestamp() for card in cards]),
+        np.array([priorities.get(card.deck_name or "default", 1.0) for card in cards]),
+        now
+    )
+    # Rank r of n goes to day r * days // n, so every day gets an equal share
+    offsets = np.empty(len(cards), dtype=np.int64)
+    offsets[order] = np.arange(len(cards)) * days // len(cards)
+
+    moved: Dict[int, List[int]] = {}
+    for index in np.flatnonzero(offsets):
+        moved.setdefault(int(offsets[index]), []).append(int(index))
+
+    changes = []
+    for offset, indices in moved.items():
+        next_review = study_day_start(today + timedelta(days=offset))
+        for start in range(0, len(indices), UPDATE_CHUNK_SIZE):
+            chunk = [cards[index] for index in indices[start:start + UPDATE_CHUNK_SIZE]]
+            db.execute(
+                update(Card).where(Card.id.in_([card.id for card in chunk])).values(next_review=next_review),
+                execution_options={"synchronize_session": False}
+            )
+            changes.extend((card_state(card), card_state(card)._replace(next_review=next_review)) for card in chunk)
+
+    cards_changed(db, changes)
+    return {
+        "overdue_cards": len(cards),
+        "rescheduled_cards": len(changes),
+        "days": days,
+        "per_day": _per_day(today, Counter(offsets.tolist()), days)
+    }
+
+
+def _per_day(today: date, counts: Counter, days: int) -> List[dict]:
+    return [
+        {"date": (today + timedelta(days=offset)).isoformat(), "card_count": counts.get(offset, 0)}
+        for offset in range(days)
+    ]
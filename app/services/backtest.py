@@ -0,0 +1,265 @@
+import argparse
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.retrievability import retrievability
+from app.services.spaced_repetition import SM2Algorithm
+
+# Reviews replayed per batch; memory stays proportional to this
+DEFAULT_CHUNK_SIZE = 50000
+
+# Predictions are clipped away from 0 and 1 so log-loss stays finite
+EPSILON = 1e-6
+
+SECONDS_PER_DAY = 86400.0
+
+
+class SM2Scheduler:
+    """SM-2 as used by the review endpoints, replayed in batches"""
+    name = "sm2"
+
+    def __init__(self):
+        self._algorithm = SM2Algorithm()
+
+    def initial_state(self, size: int) -> Dict[str, np.ndarray]:
+        return {
+            "interval": np.ones(size, dtype=np.int64),
+            "ease_factor": np.full(size, 2.5),
+            "repetitions": np.zeros(size, dtype=np.int64)
+        }
+
+    def update(self, state: Dict[str, np.ndarray], cards: np.ndarray, quality: np.ndarray) -> None:
+        state["interval"][cards], state["ease_factor"][cards], state["repetitions"][cards] = (
+            self._algorithm.calculate_next_review_batch(
+                quality, state["ease_factor"][cards], state["interval"][cards], state["repetitions"][cards]
+            )
+        )
+
+
+class LeitnerScheduler:
+    """Leitner boxes: the interval doubles on success and resets on a lapse"""
+    name = "leitner"
+    MAX_BOX = 8
+
+    def initial_state(self, size: int) -> Dict[str, np.ndarray]:
+        return {
+            "interval": np.ones(size, dtype=np.int64),
+            "box": np.zeros(size, dtype=np.int64)
+        }
+
+    def update(self, state: Dict[str, np.ndarray], cards: np.ndarray, quality: np.ndarray) -> None:
+        box = np.where(quality >= 3, np.minimum(state["box"][cards] + 1, self.MAX_BOX), 0)
+        state["box"][cards] = box
+        state["interval"][cards] = 2 ** box
+
+
+SCHEDULERS = {scheduler.name: scheduler for scheduler in (SM2Scheduler, LeitnerScheduler)}
+
+
+class BacktestResult(NamedTuple):
+    """Prediction quality and workload of one scheduler over the review log"""
+    scheduler: str
+    cards: int
+    reviews: int
+    predictions: int
+    log_loss: Optional[float]
+    rmse: Optional[float]
+    observed_retention: Optional[float]
+    predicted_retention: Optional[float]
+    projected_daily_reviews: float
+
+
+class _Replay:
+    """Running metrics and the carried-over state of one scheduler"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.cards = 0
+        self.reviews = 0
+        self.predictions = 0
+        self.log_loss = 0.0
+        self.squared_error = 0.0
+        self.recalled = 0
+        self.predicted = 0.0
+        self.daily_reviews = 0.0
+        self.carry: Optional[Dict[str, np.ndarray]] = None
+
+    def finish_cards(self, interval: np.ndarray) -> None:
+        """Count cards whose history is complete and their steady-state review rate"""
+        self.cards += len(interval)
+        self.daily_reviews += float(np.sum(1.0 / interval))
+
+    def result(self) -> BacktestResult:
+        if self.carry is not None:
+            self.finish_cards(self.carry["interval"])
+            self.carry = None
+        count = self.predictions
+        return BacktestResult(
+            scheduler=self.scheduler.name,
+            cards=self.cards,
+            reviews=self.reviews,
+            predictions=count,
+            log_loss=round(self.log_loss / count, 4) if count else None,
+            rmse=round(float(np.sqrt(self.squared_error / count)), 4) if count else None,
+            observed_retention=round(self.recalled / count * 100, 2) if count else None,
+            predicted_retention=round(self.predicted / count * 100, 2) if count else None,
+            projected_daily_reviews=round(self.daily_reviews, 2)
+        )
+
+
+def _review_chunks(
+    db: Session,
+    deck_name: Optional[str],
+    chunk_size: int
+) -> Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Stream the review log in (card_id, reviewed_at) order as column arrays"""
+    query = db.query(CardReview.card_id, CardReview.reviewed_at, CardReview.quality).filter(
+        CardReview.card_id.isnot(None),
+        CardReview.reviewed_at.isnot(None),
+        CardReview.cram.isnot(True)
+    )
+    if deck_name:
+        query = query.join(Card, Card.id == CardReview.card_id).filter(Card.deck_name == deck_name)
+    rows = query.order_by(CardReview.card_id, CardReview.reviewed_at, CardReview.id).yield_per(chunk_size)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield _columns(chunk)
+            chunk = []
+    if chunk:
+        yield _columns(chunk)
+
+
+def _columns(chunk: List[tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk)),
+        np.fromiter((row[1].timestamp() for row in chunk), dtype=np.float64, count=len(chunk)),
+        np.fromiter((row[2] for row in chunk), dtype=np.int64, count=len(chunk))
+    )
+
+
+def _replay_chunk(
+    replays: List[_Replay],
+    card_ids: np.ndarray,
+    reviewed_at: np.ndarray,
+    quality: np.ndarray,
+    carried_card: Optional[int]
+) -> None:
+    """Replay one chunk of reviews through every scheduler"""
+    starts = np.flatnonzero(np.r_[True, card_ids[1:] != card_ids[:-1]])
+    lengths = np.diff(np.r_[starts, len(card_ids)])
+    continues = carried_card is not None and card_ids[0] == carried_card
+
+    for replay in replays:
+        state = replay.scheduler.initial_state(len(starts))
+        last_review = np.full(len(starts), np.nan)
+        if continues:
+            # The first card's history started in the previous chunk
+            for column in state:
+                state[column][0] = replay.carry[column][0]
+            last_review[0] = replay.carry["last_review"][0]
+        elif replay.carry is not None:
+            replay.finish_cards(replay.carry["interval"])
+
+        # Step through the k-th review of every card at once
+        for k in range(int(lengths.max())):
+            cards = np.flatnonzero(lengths > k)
+            rows = starts[cards] + k
+            outcome = (quality[rows] >= 3).astype(np.float64)
+
+            seen = ~np.isnan(last_review[cards])
+            if seen.any():
+                elapsed = (reviewed_at[rows][seen] - last_review[cards][seen]) / SECONDS_PER_DAY
+                predicted = np.clip(retrievability(elapsed, state["interval"][cards][seen]), EPSILON, 1 - EPSILON)
+                observed = outcome[seen]
+                replay.predictions += len(predicted)
+                replay.log_loss -= float(np.sum(observed * np.log(predicted) + (1 - observed) * np.log(1 - predicted)))
+                replay.squared_error += float(np.sum((predicted - observed) ** 2))
+                replay.recalled += int(np.sum(observed))
+                replay.predicted += float(np.sum(predicted))
+
+            replay.scheduler.update(state, cards, quality[rows])
+            last_review[cards] = reviewed_at[rows]
+
+        replay.reviews += len(card_ids)
+        replay.finish_cards(state["interval"][:-1])
+        replay.carry = {column: values[-1:].copy() for column, values in state.items()}
+        replay.carry["last_review"] = last_review[-1:].copy()
+
+
+def run_backtest(
+    db: Session,
+    scheduler_names: Iterable[str] = ("sm2",),
+    deck_name: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[BacktestResult]:
+    """
+    Replay the review log through schedulers and score their recall predictions
+
+    Reviews are streamed in (card_id, reviewed_at) order, which the
+    card_reviews index serves without sorting, and replayed one chunk at a
+    time: within a chunk the k-th review of every card is scheduled in one
+    batch, and the state of the card cut off by the chunk boundary is
+    carried into the next chunk, so memory is bounded by the chunk size.
+
+    Before each review after a card's first, a scheduler predicts recall
+    from the forgetting curve, taking its current interval as stability.
+    The prediction is scored against the review's outcome (quality >= 3).
+    Projected workload is the steady-state reviews per day implied by each
+    card's final interval.
+
+    Args:
+        db: Database session
+        scheduler_names: Names from SCHEDULERS to compare
+        deck_name: Restrict to one deck
+        chunk_size: Reviews replayed per batch
+
+    Returns:
+        One result per scheduler, in the order given
+    """
+    replays = [_Replay(SCHEDULERS[name]()) for name in scheduler_names]
+    carried_card = None
+    for card_ids, reviewed_at, quality in _review_chunks(db, deck_name, chunk_size):
+        _replay_chunk(replays, card_ids, reviewed_at, quality, carried_card)
+        carried_card = int(card_ids[-1])
+    return [replay.result() for replay in replays]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compare schedulers on the review log from the command line"""
+    from app.core.database import SessionLocal, create_tables
+
+    parser = argparse.ArgumentParser(description="Backtest schedulers against the card_reviews log")
+    parser.add_argument("--scheduler", action="append", choices=sorted(SCHEDULERS),
+                        help="scheduler to replay (repeatable, default: all)")
+    parser.add_argument("--deck", help="only replay reviews of this deck")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="reviews replayed per batch")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        results = run_backtest(db, args.scheduler or list(SCHEDULERS), args.deck, args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"{'scheduler':<10} {'reviews':>10} {'log-loss':>9} {'rmse':>7} {'observed':>9} {'predicted':>10} {'daily':>9}")
+    for result in results:
+        print(
+            f"{result.scheduler:<10} {result.reviews:>10} {_format(result.log_loss):>9} {_format(result.rmse):>7} "
+            f"{_format(result.observed_retention):>9} {_format(result.predicted_retention):>10} "
+            f"{result.projected_daily_reviews:>9}"
+        )
+    return 0
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else str(value)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
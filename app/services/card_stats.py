@@ -0,0 +1,256 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import CardReview, CardStats, DeckResponseTime
+
+# Reviews graded below this quality count as lapses
+LAPSE_QUALITY = 3
+
+# Weight of the newest review in the response time moving averages
+RESPONSE_TIME_ALPHA = 0.3
+
+# Seconds per review assumed when a deck has no review history
+DEFAULT_RESPONSE_SECONDS = 8.0
+
+
+def _ewma(previous: Optional[float], response_time: float) -> float:
+    if previous is None:
+        return response_time
+    return RESPONSE_TIME_ALPHA * response_time + (1 - RESPONSE_TIME_ALPHA) * previous
+
+
+def record_card_review(
+    db: Session,
+    card_id: int,
+    quality: int,
+    response_time: float,
+    reviewed_at: datetime
+) -> CardStats:
+    """
+    Add a review to a card's running totals
+
+    Args:
+        db: Database session
+        card_id: Reviewed card
+        quality: Quality of recall (0-5)
+        response_time: Response time in seconds
+        reviewed_at: When the review happened
+
+    Returns:
+        The updated stats row
+    """
+    stats = db.get(CardStats, card_id)
+    if stats is None:
+        stats = _new_stats(db, card_id)
+    _add_review(stats, quality, response_time, reviewed_at)
+    return stats
+
+
+def record_card_reviews(
+    db: Session,
+    reviews: List[Tuple[int, int, float]],
+    reviewed_at: datetime,
+    count_lapses: bool = True
+) -> None:
+    """
+    Add a batch of reviews to their cards' running totals
+
+    Loads every affected stats row with one query rather than one per review.
+
+    Args:
+        db: Database session
+        reviews: (card_id, quality, response_time) of each review
+        reviewed_at: When the reviews happened
+        count_lapses: Whether failed reviews add to the lapse count; cram
+            reviews do not, as they are not scheduled recalls
+    """
+    card_ids = {card_id for card_id, _, _ in reviews}
+    rows = {stats.card_id: stats for stats in db.query(CardStats).filter(CardStats.card_id.in_(card_ids))}
+    for card_id, quality, response_time in reviews:
+        stats = rows.get(card_id)
+        if stats is None:
+            stats = rows[card_id] = _new_stats(db, card_id)
+        _add_review(stats, quality, response_time, reviewed_at, count_lapses)
+
+
+def _new_stats(db: Session, card_id: int) -> CardStats:
+    stats = CardStats(card_id=card_id, review_count=0, lapse_count=0, total_response_time=0.0)
+    db.add(stats)
+    return stats
+
+
+def _add_review(
+    stats: CardStats,
+    quality: int,
+    response_time: float,
+    reviewed_at: datetime,
+    count_lapses: bool = True
+) -> None:
+    stats.review_count = (stats.review_count or 0) + 1
+    stats.lapse_count = (stats.lapse_count or 0) + int(count_lapses and quality < LAPSE_QUALITY)
+    stats.total_response_time = (stats.total_response_time or 0.0) + (response_time or 0.0)
+    if response_time:
+        stats.response_time_ewma = _ewma(stats.response_time_ewma, response_time)
+    stats.last_reviewed_at = reviewed_at
+
+
+def record_deck_response_time(db: Session, deck_name: str, response_time: float) -> None:
+    """
+    Fold a review's response time into its deck's moving average
+
+    Untimed reviews (response time 0) are skipped so they do not drag the
+    average towards zero.
+
+    Args:
+        db: Database session
+        deck_name: Deck of the reviewed card
+        response_time: Response time in seconds
+    """
+    record_deck_response_times(db, deck_name, [response_time])
+
+
+def record_deck_response_times(db: Session, deck_name: str, response_times: List[float]) -> None:
+    """Fold several reviews' response times, oldest first, into their deck's moving average"""
+    response_times = [response_time for response_time in response_times if response_time]
+    if not response_times:
+        return
+    deck = db.get(DeckResponseTime, deck_name)
+    if deck is None:
+        deck = DeckResponseTime(deck_name=deck_name, response_time_ewma=None, review_count=0)
+        db.add(deck)
+    for response_time in response_times:
+        deck.response_time_ewma = _ewma(deck.response_time_ewma, response_time)
+    deck.review_count = (deck.review_count or 0) + len(response_times)
+
+
+def backfill_card_stats(db: Session) -> int:
+    """
+    Build the stats of cards that have reviews but no stats row yet
+
+    Runs as one grouped INSERT ... SELECT over the review log, so databases
+    created before the stats table existed are caught up on start-up. The
+    response time average of backfilled cards starts at their mean.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of stats rows created
+    """
+    missing = db.query(
+        CardReview.card_id,
+        func.count(CardReview.id),
+        func.sum(case((and_(CardReview.quality < LAPSE_QUALITY, CardReview.cram.isnot(True)), 1), else_=0)),
+        func.coalesce(func.sum(CardReview.response_time), 0.0),
+        func.avg(case((CardReview.response_time > 0, CardReview.response_time))),
+        func.max(CardReview.reviewed_at)
+    ).outerjoin(
+        CardStats, CardStats.card_id == CardReview.card_id
+    ).filter(
+        CardReview.card_id.isnot(None),
+        CardStats.card_id.is_(None)
+    ).group_by(CardReview.card_id)
+
+    result = db.execute(
+        CardStats.__table__.insert().from_select(
+            ["card_id", "review_count", "lapse_count", "total_response_time", "response_time_ewma", "last_reviewed_at"],
+            missing
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def backfill_deck_response_times(db: Session) -> int:
+    """
+    Seed the response time average of decks that have timed reviews but no row yet
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of deck rows created
+    """
+    deck_name = func.coalesce(Card.deck_name, "default")
+    missing = db.query(
+        deck_name,
+        func.avg(CardReview.response_time),
+        func.count(CardReview.id)
+    ).join(
+        Card, Card.id == CardReview.card_id
+    ).outerjoin(
+        DeckResponseTime, DeckResponseTime.deck_name == deck_name
+    ).filter(
+        CardReview.response_time > 0,
+        DeckResponseTime.deck_name.is_(None)
+    ).group_by(deck_name)
+
+    result = db.execute(
+        DeckResponseTime.__table__.insert().from_select(
+            ["deck_name", "response_time_ewma", "review_count"],
+            missing
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def encode_cursor(reviewed_at: datetime, review_id: int) -> str:
+    """Opaque pagination cursor for the position after a review"""
+    raw = f"{reviewed_at.isoformat()}|{review_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Position encoded in a pagination cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        reviewed_at, review_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(reviewed_at), int(review_id)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def review_history(
+    db: Session,
+    card_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[CardReview], Optional[str]]:
+    """
+    One page of a card's reviews, newest first
+
+    Pages are addressed by keyset on (reviewed_at, id) rather than by offset,
+    so every page is a range scan of the (card_id, reviewed_at) index however
+    deep into the history it is.
+
+    Args:
+        db: Database session
+        card_id: Card whose reviews to list
+        limit: Maximum number of reviews to return
+        cursor: Cursor returned with the previous page, if any
+
+    Returns:
+        The reviews and the cursor of the next page (None on the last page)
+    """
+    query = db.query(CardReview).filter(CardReview.card_id == card_id)
+    if cursor is not None:
+        reviewed_at, review_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            CardReview.reviewed_at < reviewed_at,
+            and_(CardReview.reviewed_at == reviewed_at, CardReview.id < review_id)
+        ))
+
+    reviews = query.order_by(CardReview.reviewed_at.desc(), CardReview.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor(reviews[-1].reviewed_at, reviews[-1].id)
+    return reviews, next_cursor
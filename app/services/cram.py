@@ -0,0 +1,117 @@
+import json
+from datetime import datetime
+from typing import Iterator, List
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.study_day import study_day_for
+from app.models.card import Card
+from app.models.study_session import CardReview, StudySession
+from app.services.deck_queue import session_deck_names
+from app.services.events import cram_reviews_logged
+
+# Session type of cram sessions
+CRAM_SESSION = "cram"
+
+# Cards per streamed NDJSON line unless the client asks otherwise
+CRAM_BATCH_SIZE = 200
+
+
+def cram_batches(
+    db: Session,
+    session: StudySession,
+    after_id: int = 0,
+    batch_size: int = CRAM_BATCH_SIZE
+) -> Iterator[List[dict]]:
+    """
+    The cards of a cram session in batches, ordered by ID
+
+    Cramming ignores due dates: every card in the session's decks is served,
+    up to max_cards per stream. Each batch is its own keyset query on the
+    primary key, so only one batch is held in memory at a time and a client
+    can resume a broken stream from the last ID it received.
+
+    Args:
+        db: Database session
+        session: Cram session
+        after_id: Only serve cards with a higher ID
+        batch_size: Cards per batch
+
+    Yields:
+        Lists of card dicts with id, front, back and deck_name
+    """
+    deck_names = session_deck_names(session)
+    remaining = session.max_cards
+    while remaining > 0:
+        query = db.query(Card.id, Card.front, Card.back, Card.deck_name).filter(Card.id > after_id)
+        if deck_names is not None:
+            query = query.filter(Card.deck_name.in_(deck_names))
+        rows = query.order_by(Card.id).limit(min(batch_size, remaining)).all()
+        if not rows:
+            return
+        yield [row._asdict() for row in rows]
+        after_id = rows[-1].id
+        remaining -= len(rows)
+
+
+def cram_stream(bind: Engine, session: StudySession, after_id: int, batch_size: int) -> Iterator[str]:
+    """
+    NDJSON lines of a cram session's card batches
+
+    The body streams after the endpoint has returned, when the request's
+    database session may already be closed, so the batches are read through
+    a session of the stream's own that is closed once the stream ends.
+    """
+    db = Session(bind=bind, autoflush=False)
+    try:
+        for cards in cram_batches(db, session, after_id, batch_size):
+            yield json.dumps({"cards": cards}) + "\n"
+    finally:
+        db.close()
+
+
+def log_cram_results(db: Session, session: StudySession, results: List[dict], reviewed_at: datetime) -> int:
+    """
+    Write a batch of cram results to the review log
+
+    The reviews are inserted with one bulk INSERT and flagged as cram, and
+    the scheduler is not run: card intervals, ease factors and due dates are
+    left as they were. The caller commits.
+
+    Args:
+        db: Database session
+        session: Cram session
+        results: Dicts with card_id, quality and response_time
+        reviewed_at: When the batch was submitted
+
+    Returns:
+        Number of reviews logged
+
+    Raises:
+        LookupError: If a result names a card that does not exist
+    """
+    card_ids = {result["card_id"] for result in results}
+    decks = dict(db.query(Card.id, Card.deck_name).filter(Card.id.in_(card_ids)).all())
+    missing = card_ids - decks.keys()
+    if missing:
+        raise LookupError(f"Card not found: {min(missing)}")
+
+    study_day = study_day_for(reviewed_at)
+    db.execute(insert(CardReview), [
+        {
+            "session_id": session.id, "card_id": result["card_id"],
+            "quality": result["quality"], "response_time": result["response_time"],
+            "reviewed_at": reviewed_at, "study_day": study_day, "cram": True
+        }
+        for result in results
+    ])
+
+    session.cards_studied += len(results)
+    session.cards_correct += sum(result["quality"] >= 3 for result in results)
+    session.seconds_studied = (session.seconds_studied or 0.0) + sum(result["response_time"] for result in results)
+    db.flush()
+    cram_reviews_logged(db, [
+        (result["card_id"], decks[result["card_id"]] or "default", result["quality"], result["response_time"])
+        for result in results
+    ], reviewed_at, session)
+    return len(results)
@@ -0,0 +1,186 @@
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.calendar import DeckSnapshot
+from app.models.card import Card, DeckLimits
+from app.models.study_session import StudySession
+from app.services.deck_queue import merged_due_cards, merged_new_cards, session_deck_names
+
+# Session types
+REVIEW_SESSION = "review"  # Every due card, earliest first; limits do not apply
+NEW_SESSION = "new"        # Unseen cards only, within the new-card limit
+MIXED_SESSION = "mixed"    # Reviews interleaved with new cards, within both limits
+
+
+class DailyLimits(NamedTuple):
+    """A deck's daily limits and how much of them today has used"""
+    deck_name: str
+    new_cards_per_day: int
+    reviews_per_day: int
+    new_cards_today: int
+    reviews_today: int
+
+
+def deck_limits(db: Session, deck_name: str, day: date) -> DailyLimits:
+    """
+    Daily limits of a deck and the counts studied on a day
+
+    The counts come from the deck's snapshot for the day, which the review
+    hook keeps current: reviews that were a card's first count as new cards,
+    all others as reviews.
+
+    Args:
+        db: Database session
+        deck_name: Deck to look up
+        day: Study day
+
+    Returns:
+        The deck's limits and today's counts
+    """
+    limits = db.get(DeckLimits, deck_name)
+    snapshot = db.query(DeckSnapshot.reviewed_count, DeckSnapshot.introduced_count).filter(
+        DeckSnapshot.deck_name == deck_name,
+        DeckSnapshot.date == day
+    ).first()
+    reviewed, introduced = (snapshot[0] or 0, snapshot[1] or 0) if snapshot else (0, 0)
+    return DailyLimits(
+        deck_name=deck_name,
+        new_cards_per_day=_limit(limits and limits.new_cards_per_day, settings.new_cards_per_day),
+        reviews_per_day=_limit(limits and limits.reviews_per_day, settings.reviews_per_day),
+        new_cards_today=introduced,
+        reviews_today=reviewed - introduced
+    )
+
+
+def set_deck_limits(
+    db: Session,
+    deck_name: str,
+    new_cards_per_day: Optional[int],
+    reviews_per_day: Optional[int]
+) -> None:
+    """Override a deck's daily limits (None restores the default); the caller commits"""
+    limits = db.get(DeckLimits, deck_name)
+    if limits is None:
+        limits = DeckLimits(deck_name=deck_name)
+        db.add(limits)
+    limits.new_cards_per_day = new_cards_per_day
+    limits.reviews_per_day = reviews_per_day
+    db.flush()
+
+
+def exhausted_decks(db: Session, day: date) -> Tuple[Set[str], Set[str]]:
+    """
+    Decks that have used up their new-card or review limit on a day
+
+    Only decks studied on the day or with an override can be exhausted, so
+    this reads today's snapshots and the override table, both small.
+
+    Args:
+        db: Database session
+        day: Study day
+
+    Returns:
+        Tuple of (decks out of new cards, decks out of reviews)
+    """
+    counts = {
+        deck: (reviewed or 0, introduced or 0)
+        for deck, reviewed, introduced in db.query(
+            DeckSnapshot.deck_name, DeckSnapshot.reviewed_count, DeckSnapshot.introduced_count
+        ).filter(DeckSnapshot.date == day)
+    }
+    overrides = {limits.deck_name: limits for limits in db.query(DeckLimits)}
+
+    no_new: Set[str] = set()
+    no_reviews: Set[str] = set()
+    for deck in set(counts) | set(overrides):
+        reviewed, introduced = counts.get(deck, (0, 0))
+        limits = overrides.get(deck)
+        if introduced >= _limit(limits and limits.new_cards_per_day, settings.new_cards_per_day):
+            no_new.add(deck)
+        if reviewed - introduced >= _limit(limits and limits.reviews_per_day, settings.reviews_per_day):
+            no_reviews.add(deck)
+    return no_new, no_reviews
+
+
+def _new_card_ids(db: Session, deck_names: Optional[List[str]], excluded: Set[str], limit: int) -> List[int]:
+    """
+    Oldest unseen cards
+
+    A deck list is merged from per-deck scans of the partial (deck_name, id)
+    index of unseen cards; without one, the partial (id) index is walked in
+    ID order, skipping excluded decks.
+    """
+    if deck_names is not None:
+        return merged_new_cards(db, [deck for deck in deck_names if deck not in excluded], limit)
+
+    query = db.query(Card.id).filter(Card.last_reviewed.is_(None))
+    if excluded:
+        query = query.filter(Card.deck_name.notin_(excluded))
+    return [row[0] for row in query.order_by(Card.id).limit(limit)]
+
+
+def _review_card_ids(
+    db: Session,
+    now: datetime,
+    deck_names: Optional[List[str]],
+    excluded: Set[str],
+    limit: int
+) -> List[int]:
+    """Earliest due cards that have been studied before"""
+    if deck_names is not None:
+        allowed = [deck for deck in deck_names if deck not in excluded]
+        return merged_due_cards(db, allowed, now, limit, studied_only=True)
+
+    query = db.query(Card.id).filter(Card.next_review <= now, Card.last_reviewed.isnot(None))
+    if excluded:
+        query = query.filter(Card.deck_name.notin_(excluded))
+    return [row[0] for row in query.order_by(Card.next_review).limit(limit)]
+
+
+def upcoming_limited_cards(
+    db: Session,
+    session: StudySession,
+    now: datetime,
+    day: date,
+    limit: int
+) -> List[int]:
+    """
+    Cards a new or mixed session serves next, within the daily limits
+
+    Mixed sessions serve one new card after every `new_card_interleave`
+    reviews, falling back to the other kind when one runs out. The order
+    runs on from the session's current position, assuming every served card
+    is reviewed.
+
+    Args:
+        db: Database session
+        session: A session of type NEW_SESSION or MIXED_SESSION
+        now: Current server-local time
+        day: Current study day
+        limit: Maximum number of card IDs to return
+
+    Returns:
+        Up to `limit` card IDs
+    """
+    no_new, no_reviews = exhausted_decks(db, day)
+    deck_names = session_deck_names(session)
+    new_ids = _new_card_ids(db, deck_names, no_new, limit)
+    if session.session_type == NEW_SESSION:
+        return new_ids
+
+    queues = [iter(new_ids), iter(_review_card_ids(db, now, deck_names, no_reviews, limit))]
+    card_ids: List[int] = []
+    position = session.cards_studied
+    while len(card_ids) < limit:
+        position += 1
+        new_turn = position % (settings.new_card_interleave + 1) == 0
+        card_id = next((card_id for queue in (queues if new_turn else queues[::-1]) for card_id in queue), None)
+        if card_id is None:
+            break
+        card_ids.append(card_id)
+    return card_ids
+
+
+def _limit(override: Optional[int], default: int) -> int:
+    return default if override is None else override
@@ -0,0 +1,101 @@
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import StudySession
+
+
+def session_deck_names(session: StudySession) -> Optional[List[str]]:
+    """
+    Decks a session studies
+
+    Args:
+        session: Study session
+
+    Returns:
+        The session's deck names, or None when it covers every deck
+    """
+    if session.deck_names:
+        return json.loads(session.deck_names)
+    if session.deck_name:
+        return [session.deck_name]
+    return None
+
+
+def _deck_due_scan(
+    db: Session,
+    deck_name: str,
+    now: datetime,
+    limit: int,
+    studied_only: bool
+) -> List[Tuple[datetime, int]]:
+    """Earliest due cards of one deck, read from its (deck_name, next_review) index"""
+    query = db.query(Card.next_review, Card.id).filter(
+        Card.deck_name == deck_name,
+        Card.next_review <= now
+    )
+    if studied_only:
+        query = query.filter(Card.last_reviewed.isnot(None))
+    return [tuple(row) for row in query.order_by(Card.next_review, Card.id).limit(limit)]
+
+
+def merged_due_cards(
+    db: Session,
+    deck_names: List[str],
+    now: datetime,
+    limit: int,
+    studied_only: bool = False
+) -> List[int]:
+    """
+    Earliest due cards across a set of decks
+
+    Each deck contributes at most `limit` cards from a scan of its due
+    index and the sorted scans are combined with a k-way heap merge, so the
+    work grows with the number of decks and `limit`, not with the total
+    number of due cards.
+
+    Args:
+        db: Database session
+        deck_names: Decks to merge
+        now: Current server-local time
+        limit: Number of card IDs to return
+        studied_only: Skip cards that have never been reviewed
+
+    Returns:
+        Up to `limit` card IDs, earliest next_review first
+    """
+    if limit <= 0:
+        return []
+    scans = [_deck_due_scan(db, deck_name, now, limit, studied_only) for deck_name in sorted(set(deck_names))]
+    return [card_id for _, card_id in islice(heapq.merge(*scans), limit)]
+
+
+def merged_new_cards(db: Session, deck_names: List[str], limit: int) -> List[int]:
+    """
+    Oldest unseen cards across a set of decks
+
+    Each deck is read in ID order from the partial (deck_name, id) index of
+    unseen cards and the scans are merged, so no deck's unseen cards are
+    sorted and lapsed cards are never stepped over.
+
+    Args:
+        db: Database session
+        deck_names: Decks to merge
+        limit: Number of card IDs to return
+
+    Returns:
+        Up to `limit` card IDs, lowest first
+    """
+    if limit <= 0:
+        return []
+    scans = [
+        [row[0] for row in db.query(Card.id).filter(
+            Card.deck_name == deck_name,
+            Card.last_reviewed.is_(None)
+        ).order_by(Card.id).limit(limit)]
+        for deck_name in sorted(set(deck_names))
+    ]
+    return list(islice(heapq.merge(*scans), limit))
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+from app.core.study_day import current_study_day, study_day_start
+from app.models.card import Card
+from app.models.calendar import DeckSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Cards whose interval reaches this many days count as mature
+MATURE_INTERVAL_DAYS = 21
+
+# Seconds to wait before retrying a failed rollover
+ROLLOVER_RETRY_SECONDS = 60
+
+
+def deck_counts(db: Session, deck_names: Optional[Iterable[str]] = None) -> Dict[str, Tuple[int, int, int]]:
+    """
+    Current (card_count, new_count, mature_count) per deck in one grouped query
+
+    Args:
+        db: Database session
+        deck_names: Restrict the counts to these decks (defaults to all decks)
+
+    Returns:
+        Mapping of deck name to its (card_count, new_count, mature_count)
+    """
+    query = db.query(
+        Card.deck_name,
+        func.count(Card.id),
+        func.sum(case((Card.last_reviewed.is_(None), 1), else_=0)),
+        func.sum(case((Card.interval >= MATURE_INTERVAL_DAYS, 1), else_=0)),
+    )
+    if deck_names is not None:
+        query = query.filter(Card.deck_name.in_(list(deck_names)))
+
+    return {
+        deck: (total, new or 0, mature or 0)
+        for deck, total, new, mature in query.group_by(Card.deck_name)
+    }
+
+
+def apply_snapshot_deltas(db: Session, day: date, deltas: Dict[str, Counter]) -> None:
+    """
+    Apply per-deck count deltas to the snapshots of a day
+
+    Decks without a snapshot for the day are seeded from the live cards table,
+    so the change being recorded must already be flushed when this is called.
+
+    Args:
+        db: Database session
+        day: Snapshot date
+        deltas: Mapping of deck name to a Counter keyed by snapshot column
+    """
+    deltas = {deck: delta for deck, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+
+    snapshots = {
+        snapshot.deck_name: snapshot
+        for snapshot in db.query(DeckSnapshot).filter(
+            DeckSnapshot.date == day,
+            DeckSnapshot.deck_name.in_(list(deltas))
+        )
+    }
+    missing = [deck for deck in deltas if deck not in snapshots]
+    seeds = deck_counts(db, missing) if missing else {}
+
+    for deck, delta in deltas.items():
+        snapshot = snapshots.get(deck)
+        if snapshot is None:
+            card_count, new_count, mature_count = seeds.get(deck, (0, 0, 0))
+            db.add(DeckSnapshot(
+                deck_name=deck, date=day, card_count=card_count,
+                reviewed_count=delta["reviewed_count"],
+                correct_count=delta["correct_count"],
+                introduced_count=delta["introduced_count"],
+                new_count=new_count, mature_count=mature_count
+            ))
+            continue
+
+        for column, value in delta.items():
+            setattr(snapshot, column, (getattr(snapshot, column) or 0) + value)
+
+    db.flush()
+
+
+def roll_over_snapshots(db: Session, day: date) -> int:
+    """
+    Write the opening snapshot of a day for every deck that has none yet
+
+    Args:
+        db: Database session
+        day: Snapshot date
+
+    Returns:
+        Number of snapshots created
+    """
+    existing = {
+        deck for (deck,) in db.query(DeckSnapshot.deck_name).filter(DeckSnapshot.date == day)
+    }
+
+    created = 0
+    for deck, (card_count, new_count, mature_count) in deck_counts(db).items():
+        if deck in existing:
+            continue
+        db.add(DeckSnapshot(
+            deck_name=deck, date=day, card_count=card_count,
+            reviewed_count=0, correct_count=0, new_count=new_count, mature_count=mature_count
+        ))
+        created += 1
+
+    db.commit()
+    return created
+
+
+async def run_snapshot_rollover(session_factory) -> None:
+    """
+    Roll snapshots over now and then at the start of every following study day
+
+    A failed rollover is logged and retried shortly rather than ending the task.
+    """
+    loop = asyncio.get_running_loop()
+
+    def roll_over_today():
+        db = session_factory()
+        try:
+            roll_over_snapshots(db, current_study_day())
+        finally:
+            db.close()
+
+    while True:
+        try:
+            await loop.run_in_executor(None, roll_over_today)
+        except Exception:
+            logger.exception("Failed to roll deck snapshots over")
+            await asyncio.sleep(ROLLOVER_RETRY_SECONDS)
+            continue
+        tomorrow = study_day_start(current_study_day() + timedelta(days=1))
+        await asyncio.sleep(max((tomorrow - datetime.now()).total_seconds(), 1))
+
+
+def deck_progress(db: Session, deck_name: str, start: date, end: date) -> List[dict]:
+    """
+    Daily deck history between two dates from the stored snapshots
+
+    Days without a snapshot carry the previous day's collection counts forward
+    with no reviews. Today falls back to live counts if nothing has been
+    written for it yet.
+
+    Args:
+        db: Database session
+        deck_name: Deck to report on
+        start: First day (inclusive)
+        end: Last day (inclusive)
+
+    Returns:
+        One progress entry per day
+    """
+    snapshots = {
+        snapshot.date: snapshot
+        for snapshot in db.query(DeckSnapshot).filter(
+            DeckSnapshot.deck_name == deck_name,
+            DeckSnapshot.date >= start,
+            DeckSnapshot.date <= end
+        )
+    }
+    previous = db.query(DeckSnapshot).filter(
+        DeckSnapshot.deck_name == deck_name,
+        DeckSnapshot.date < start
+    ).order_by(DeckSnapshot.date.desc()).first()
+
+    counts = (0, 0, 0)
+    if previous is not None:
+        counts = (previous.card_count, previous.new_count, previous.mature_count)
+
+    today = current_study_day()
+    progress_data = []
+    for offset in range((end - start).days + 1):
+        current_date = start + timedelta(days=offset)
+        snapshot = snapshots.get(current_date)
+        reviewed = 0
+
+        if snapshot is not None:
+            counts = (snapshot.card_count, snapshot.new_count, snapshot.mature_count)
+            reviewed = snapshot.reviewed_count
+        elif current_date == today:
+            counts = deck_counts(db, [deck_name]).get(deck_name, (0, 0, 0))
+
+        total_cards, new_cards, mature_cards = counts
+        progress_data.append({
+            "date": current_date.isoformat(),
+            "total_cards": total_cards,
+            "reviewed_cards": reviewed,
+            "new_cards": new_cards,
+            "mature_cards": mature_cards,
+            "progress_percent": (reviewed / total_cards * 100) if total_cards > 0 else 0
+        })
+
+    return progress_data
@@ -0,0 +1,134 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Integer, case, cast, func
+from sqlalchemy.orm import Session
+from app.core.study_day import study_day_start
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.deck_snapshots import MATURE_INTERVAL_DAYS
+
+# Width of the ease factor histogram bins
+EASE_BIN_WIDTH = 0.25
+
+# Upper bounds (inclusive, in days) of the interval histogram bins
+INTERVAL_BINS: Tuple[Tuple[int, str], ...] = (
+    (1, "1"),
+    (3, "2-3"),
+    (7, "4-7"),
+    (14, "8-14"),
+    (30, "15-30"),
+    (90, "31-90"),
+    (180, "91-180"),
+    (365, "181-365"),
+)
+INTERVAL_OVERFLOW_LABEL = "366+"
+
+# Reviews older than this many days do not count towards retention
+RETENTION_WINDOW_DAYS = 30
+
+
+def _interval_bin():
+    """SQL expression mapping a card's interval to its histogram bin index"""
+    return case(
+        *[(Card.interval <= upper, index) for index, (upper, _) in enumerate(INTERVAL_BINS)],
+        else_=len(INTERVAL_BINS)
+    )
+
+
+def deck_stats(db: Session, deck_name: str, today: date) -> Optional[dict]:
+    """
+    Maturity, ease, interval and overdue statistics for a deck
+
+    The schedule columns are read in a single grouped pass: the database
+    returns one row per combination of ease bin, interval bin, maturity and
+    overdue state, which is folded into the histograms here. Retention comes
+    from one aggregate over the deck's recent reviews.
+
+    Args:
+        db: Database session
+        deck_name: Deck to describe
+        today: Current study day
+
+    Returns:
+        Statistics dictionary, or None if the deck has no cards
+    """
+    today_start = study_day_start(today)
+    tomorrow_start = study_day_start(today + timedelta(days=1))
+    is_new = Card.last_reviewed.is_(None)
+    ease_bin = cast(func.coalesce(Card.ease_factor, 2.5) / EASE_BIN_WIDTH, Integer)
+    maturity = case(
+        (is_new, "new"),
+        (Card.interval >= MATURE_INTERVAL_DAYS, "mature"),
+        else_="young"
+    )
+
+    groups = db.query(
+        ease_bin.label("ease_bin"),
+        _interval_bin().label("interval_bin"),
+        maturity.label("maturity"),
+        func.count(Card.id),
+        func.sum(case((Card.next_review < today_start, 1), else_=0)),
+        func.sum(case((Card.next_review < tomorrow_start, 1), else_=0)),
+    ).filter(
+        Card.deck_name == deck_name
+    ).group_by("ease_bin", "interval_bin", "maturity").all()
+
+    if not groups:
+        return None
+
+    total = 0
+    maturity_counts = Counter()
+    ease_counts = Counter()
+    interval_counts = Counter()
+    overdue = 0
+    due_today = 0
+    for ease, interval, state, count, overdue_count, due_count in groups:
+        total += count
+        maturity_counts[state] += count
+        if state != "new":
+            # New cards have no meaningful ease, interval or backlog yet
+            ease_counts[ease] += count
+            interval_counts[interval] += count
+            overdue += overdue_count or 0
+            due_today += due_count or 0
+
+    retention = db.query(
+        func.count(CardReview.id),
+        func.sum(case((CardReview.quality >= 3, 1), else_=0))
+    ).join(Card, Card.id == CardReview.card_id).filter(
+        Card.deck_name == deck_name,
+        CardReview.study_day > today - timedelta(days=RETENTION_WINDOW_DAYS),
+        CardReview.cram.isnot(True)
+    ).one()
+    review_count, correct_count = retention[0], retention[1] or 0
+
+    return {
+        "deck_name": deck_name,
+        "total_cards": total,
+        "new_cards": maturity_counts["new"],
+        "young_cards": maturity_counts["young"],
+        "mature_cards": maturity_counts["mature"],
+        "overdue_cards": overdue,
+        "due_today": due_today,
+        "ease_histogram": _ease_histogram(ease_counts),
+        "interval_histogram": _interval_histogram(interval_counts),
+        "retention_window_days": RETENTION_WINDOW_DAYS,
+        "recent_reviews": review_count,
+        "average_retention": round(correct_count / review_count * 100, 2) if review_count else None,
+    }
+
+
+def _ease_histogram(counts: Dict[int, int]) -> List[dict]:
+    return [
+        {"ease_factor": round(index * EASE_BIN_WIDTH, 2), "card_count": counts[index]}
+        for index in sorted(counts)
+    ]
+
+
+def _interval_histogram(counts: Dict[int, int]) -> List[dict]:
+    labels = [label for _, label in INTERVAL_BINS] + [INTERVAL_OVERFLOW_LABEL]
+    return [
+        {"interval_days": label, "card_count": counts.get(index, 0)}
+        for index, label in enumerate(labels)
+    ]
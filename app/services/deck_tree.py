@@ -0,0 +1,225 @@
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.models.calendar import DeckTreeForecast, DeckTreeTotals, DueForecast
+from app.services.deck_snapshots import deck_counts
+
+# Separator between the levels of a nested deck name, e.g. "Languages::Spanish::Verbs"
+SEPARATOR = "::"
+
+
+def deck_ancestors(deck_name: str) -> List[str]:
+    """
+    Materialized paths of a deck and every deck above it, top level first
+
+    Args:
+        deck_name: Nested deck name
+
+    Returns:
+        e.g. ["Languages", "Languages::Spanish", "Languages::Spanish::Verbs"]
+    """
+    parts = deck_name.split(SEPARATOR)
+    return [SEPARATOR.join(parts[:depth + 1]) for depth in range(len(parts))]
+
+
+def _parent(path: str) -> Optional[str]:
+    head, separator, _ = path.rpartition(SEPARATOR)
+    return head if separator else None
+
+
+def _subtree_filter(column, root: str):
+    """
+    Filter for a path and its descendants
+
+    Descendants are matched as the range of paths starting with "root::" (up
+    to "root:;", the next string after every such prefix), which compares
+    exactly and case-sensitively where LIKE would treat "_" and "%" in deck
+    names as wildcards and ignore case.
+    """
+    prefix = root + SEPARATOR
+    return or_(column == root, and_(column > prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+
+
+def apply_tree_deltas(db: Session, deck_deltas: Dict[str, Counter], forecast_deltas: Counter) -> None:
+    """
+    Roll card count deltas of leaf decks up to every ancestor path
+
+    Args:
+        db: Database session
+        deck_deltas: Mapping of deck name to a Counter with card_count and
+            new_count changes
+        forecast_deltas: Counter keyed by (deck_name, due_date) holding the
+            change in number of cards due on that day
+    """
+    totals = defaultdict(Counter)
+    for deck, delta in deck_deltas.items():
+        if not (delta["card_count"] or delta["new_count"]):
+            continue
+        for path in deck_ancestors(deck):
+            totals[path]["card_count"] += delta["card_count"]
+            totals[path]["new_count"] += delta["new_count"]
+        totals[deck]["deck_card_count"] += delta["card_count"]
+
+    forecast = Counter()
+    for (deck, day), value in forecast_deltas.items():
+        if value:
+            for path in deck_ancestors(deck):
+                forecast[(path, day)] += value
+
+    if totals:
+        nodes = {
+            node.path: node
+            for node in db.query(DeckTreeTotals).filter(DeckTreeTotals.path.in_(list(totals)))
+        }
+        for path, delta in totals.items():
+            node = nodes.get(path)
+            if node is None:
+                if delta["card_count"] <= 0:
+                    continue
+                node = DeckTreeTotals(
+                    path=path, parent=_parent(path), depth=path.count(SEPARATOR),
+                    deck_card_count=0, card_count=0, new_count=0
+                )
+                db.add(node)
+            for column, value in delta.items():
+                setattr(node, column, (getattr(node, column) or 0) + value)
+            if not node.card_count:
+                db.delete(node)
+
+    forecast = {key: value for key, value in forecast.items() if value}
+    if forecast:
+        buckets = {
+            (bucket.path, bucket.due_date): bucket
+            for bucket in db.query(DeckTreeForecast).filter(
+                DeckTreeForecast.path.in_({path for path, _ in forecast}),
+                DeckTreeForecast.due_date.in_({day for _, day in forecast})
+            )
+        }
+        for (path, day), value in forecast.items():
+            bucket = buckets.get((path, day))
+            if bucket is None:
+                db.add(DeckTreeForecast(path=path, due_date=day, card_count=value))
+            elif bucket.card_count + value == 0:
+                db.delete(bucket)
+            else:
+                bucket.card_count += value
+
+    db.flush()
+
+
+def rebuild_deck_tree(db: Session) -> int:
+    """
+    Recompute the deck tree rollups from the cards table and due forecast
+
+    Call after rebuild_due_forecast so the forecast it rolls up is current.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of deck paths written
+    """
+    deck_deltas = {
+        deck or "default": Counter(card_count=card_count, new_count=new_count)
+        for deck, (card_count, new_count, _) in deck_counts(db).items()
+    }
+    forecast_deltas = Counter({
+        (bucket.deck_name, bucket.due_date): bucket.card_count
+        for bucket in db.query(DueForecast)
+    })
+
+    db.query(DeckTreeTotals).delete()
+    db.query(DeckTreeForecast).delete()
+    db.flush()
+    apply_tree_deltas(db, deck_deltas, forecast_deltas)
+    db.commit()
+    return db.query(func.count(DeckTreeTotals.path)).scalar()
+
+
+def deck_node(db: Session, path: str, today: date) -> Optional[dict]:
+    """
+    Rolled-up counts of one deck path
+
+    Totals are a primary-key lookup and the due count one range read of the
+    path's forecast buckets, however many cards and sub-decks it has.
+
+    Args:
+        db: Database session
+        path: Deck path
+        today: Current study day
+
+    Returns:
+        Counts of the path's subtree, or None if it has no cards
+    """
+    node = db.get(DeckTreeTotals, path)
+    if node is None:
+        return None
+    due = db.query(func.sum(DeckTreeForecast.card_count)).filter(
+        DeckTreeForecast.path == path,
+        DeckTreeForecast.due_date <= today
+    ).scalar()
+    return _node_dict(node, due or 0)
+
+
+def deck_tree(db: Session, today: date, root: Optional[str] = None) -> List[dict]:
+    """
+    Nested decks with rolled-up card, new and due counts
+
+    Args:
+        db: Database session
+        today: Current study day
+        root: Only return this path and its descendants
+
+    Returns:
+        Top-level nodes (or the root node), each with nested "children"
+    """
+    nodes = db.query(DeckTreeTotals)
+    due = db.query(DeckTreeForecast.path, func.sum(DeckTreeForecast.card_count)).filter(
+        DeckTreeForecast.due_date <= today
+    )
+    if root:
+        nodes = nodes.filter(_subtree_filter(DeckTreeTotals.path, root))
+        due = due.filter(_subtree_filter(DeckTreeForecast.path, root))
+    due_counts = dict(due.group_by(DeckTreeForecast.path).all())
+
+    by_path = {}
+    tops = []
+    for node in nodes.order_by(DeckTreeTotals.depth, DeckTreeTotals.path):
+        entry = _node_dict(node, due_counts.get(node.path, 0))
+        by_path[node.path] = entry
+        parent = by_path.get(node.parent)
+        (parent["children"] if parent is not None else tops).append(entry)
+    return tops
+
+
+def subtree_decks(db: Session, root: str) -> List[str]:
+    """
+    Deck names holding cards at or below a path
+
+    Args:
+        db: Database session
+        root: Deck path
+
+    Returns:
+        Sorted deck names
+    """
+    return [
+        row[0] for row in db.query(DeckTreeTotals.path).filter(
+            _subtree_filter(DeckTreeTotals.path, root),
+            DeckTreeTotals.deck_card_count > 0
+        ).order_by(DeckTreeTotals.path)
+    ]
+
+
+def _node_dict(node: DeckTreeTotals, due_count: int) -> dict:
+    return {
+        "path": node.path,
+        "name": node.path.rpartition(SEPARATOR)[2],
+        "deck_card_count": node.deck_card_count,
+        "card_count": node.card_count,
+        "new_count": node.new_count,
+        "due_count": due_count,
+        "children": []
+    }
@@ -0,0 +1,134 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.study_day import study_day_for, study_day_start
+from app.models.card import Card
+from app.models.calendar import DueForecast
+from app.services.schedule_cache import active_schedule_cache
+
+
+def due_day(next_review: datetime) -> date:
+    """Study day a review timestamp is counted under in the forecast"""
+    return study_day_for(next_review)
+
+
+def apply_forecast_deltas(db: Session, deltas: Counter) -> None:
+    """
+    Apply count deltas to the due-forecast histogram
+
+    Args:
+        db: Database session
+        deltas: Counter keyed by (deck_name, due_date) holding the change in
+            number of cards due on that day
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    decks = {deck for deck, _ in deltas}
+    days = {day for _, day in deltas}
+    buckets = {
+        (bucket.deck_name, bucket.due_date): bucket
+        for bucket in db.query(DueForecast).filter(
+            DueForecast.deck_name.in_(decks),
+            DueForecast.due_date.in_(days)
+        )
+    }
+
+    for (deck, day), value in deltas.items():
+        bucket = buckets.get((deck, day))
+        if bucket is None:
+            db.add(DueForecast(deck_name=deck, due_date=day, card_count=value))
+        elif bucket.card_count + value == 0:
+            db.delete(bucket)
+        else:
+            bucket.card_count += value
+
+    db.flush()
+
+
+def rebuild_due_forecast(db: Session) -> int:
+    """
+    Recompute the whole due-forecast histogram from the cards table
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of histogram buckets written
+    """
+    counts = Counter()
+    for deck, next_review in db.query(Card.deck_name, Card.next_review).yield_per(10000):
+        if next_review is not None:
+            counts[(deck or "default", due_day(next_review))] += 1
+
+    db.query(DueForecast).delete()
+    db.add_all(
+        DueForecast(deck_name=deck, due_date=day, card_count=count)
+        for (deck, day), count in counts.items()
+    )
+    db.commit()
+    return len(counts)
+
+
+def due_counts_by_deck(
+    db: Session,
+    day: date,
+    deck_names: Optional[Iterable[str]] = None
+) -> Dict[str, int]:
+    """
+    Number of cards due on or before a day, per deck
+
+    Args:
+        db: Database session
+        day: Last due day to include
+        deck_names: Restrict the counts to these decks (defaults to all decks)
+
+    Returns:
+        Mapping of deck name to due card count
+    """
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        return cache.due_counts_by_deck(study_day_start(day + timedelta(days=1)), deck_names)
+
+    query = db.query(
+        DueForecast.deck_name, func.sum(DueForecast.card_count)
+    ).filter(DueForecast.due_date <= day)
+    if deck_names is not None:
+        query = query.filter(DueForecast.deck_name.in_(list(deck_names)))
+
+    return {
+        deck: count
+        for deck, count in query.group_by(DueForecast.deck_name)
+        if count
+    }
+
+
+def upcoming_forecast(db: Session, start: date, end: date) -> List[Tuple[date, str, int]]:
+    """
+    Histogram buckets between two days (inclusive), ordered by day
+
+    Args:
+        db: Database session
+        start: First due day
+        end: Last due day
+
+    Returns:
+        List of (due_date, deck_name, card_count)
+    """
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 2)]
+        return [
+            (days[period], deck, count)
+            for period, deck, count in cache.forecast([study_day_start(day) for day in days])
+        ]
+
+    buckets = db.query(DueForecast).filter(
+        DueForecast.due_date >= start,
+        DueForecast.due_date <= end
+    ).order_by(DueForecast.due_date, DueForecast.deck_name)
+
+    return [(bucket.due_date, bucket.deck_name, bucket.card_count) for bucket in buckets]
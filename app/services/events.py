@@ -0,0 +1,221 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.study_day import current_study_day, study_day_for
+from app.models.card import Card
+from app.models.study_session import StudySession
+from app.services.activity_index import activity_index
+from app.services.analytics_cache import CARDS, REVIEWS, SESSIONS, invalidate_on_commit
+from app.services.card_stats import (
+    record_card_review, record_card_reviews, record_deck_response_time, record_deck_response_times
+)
+from app.services.deck_snapshots import MATURE_INTERVAL_DAYS, apply_snapshot_deltas
+from app.services.deck_tree import apply_tree_deltas
+from app.services.due_forecast import apply_forecast_deltas, due_day
+from app.services.outbox import enqueue
+from app.services.schedule_cache import schedule_changed
+from app.services.session_summary import freeze_session_summary
+from app.services.streaks import record_study_activity
+from app.services.study_totals import add_study_totals
+
+
+class CardState(NamedTuple):
+    """Schedule-relevant fields of a card at one point in time"""
+    card_id: int
+    deck_name: str
+    interval: int
+    ease_factor: float
+    next_review: Optional[datetime]
+    last_reviewed: Optional[datetime]
+
+
+def card_state(card: Card) -> CardState:
+    """Capture the current state of a card"""
+    return CardState(
+        card_id=card.id,
+        deck_name=card.deck_name or "default",
+        interval=card.interval or 0,
+        ease_factor=card.ease_factor if card.ease_factor is not None else 2.5,
+        next_review=card.next_review,
+        last_reviewed=card.last_reviewed
+    )
+
+
+def cards_changed(
+    db: Session,
+    changes: Iterable[Tuple[Optional[CardState], Optional[CardState]]],
+    reviewed: bool = False
+) -> None:
+    """
+    Keep derived tables in step with a batch of card changes
+
+    Call after the changes have been flushed and before they are committed,
+    so the derived rows land in the same transaction. Bulk paths should pass
+    all their changes at once so each derived table is touched only once.
+
+    Args:
+        db: Database session
+        changes: Pairs of (before, after) states; before is None for a newly
+            created card and after is None for a deleted one
+        reviewed: Whether the changes added to or removed from the review log
+    """
+    changes = list(changes)
+    snapshot_deltas = defaultdict(Counter)
+    forecast_deltas = Counter()
+
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            delta = snapshot_deltas[state.deck_name]
+            delta["card_count"] += sign
+            delta["new_count"] += sign * (state.last_reviewed is None)
+            delta["mature_count"] += sign * (state.interval >= MATURE_INTERVAL_DAYS)
+            if state.next_review is not None:
+                forecast_deltas[(state.deck_name, due_day(state.next_review))] += sign
+
+    apply_snapshot_deltas(db, current_study_day(), snapshot_deltas)
+    apply_forecast_deltas(db, forecast_deltas)
+    apply_tree_deltas(db, snapshot_deltas, forecast_deltas)
+    schedule_changed(db, changes)
+    invalidate_on_commit(db, (CARDS, REVIEWS) if reviewed else (CARDS,), snapshot_deltas.keys())
+
+
+def card_changed(
+    db: Session,
+    before: Optional[CardState],
+    after: Optional[CardState],
+    reviewed: bool = False
+) -> None:
+    """
+    Keep derived tables in step with a single card change
+
+    Args:
+        db: Database session
+        before: State before the change (None for a newly created card)
+        after: State after the change (None for a deleted card)
+        reviewed: Whether the change added to or removed from the review log
+    """
+    cards_changed(db, [(before, after)], reviewed=reviewed)
+
+
+def _invalidate_session(db: Session, session: StudySession) -> None:
+    """Queue invalidation of analytics that depend on a session"""
+    invalidate_on_commit(db, (SESSIONS,), [session.deck_name] if session.deck_name else None)
+
+
+def review_logged(
+    db: Session,
+    card: Card,
+    quality: int,
+    response_time: float,
+    reviewed_at: datetime,
+    session: Optional[StudySession] = None,
+    introduced: bool = False
+) -> None:
+    """
+    Record a review in the per-card totals and study activity rollups
+
+    Args:
+        db: Database session
+        card: Reviewed card
+        quality: Quality of recall (0-5)
+        response_time: Response time in seconds
+        reviewed_at: When the review happened
+        session: Study session the review belongs to, if any
+        introduced: Whether this was the card's first review, counted
+            towards the deck's daily new-card limit
+    """
+    day = study_day_for(reviewed_at)
+    correct = int(quality >= 3)
+    deck_name = card.deck_name or "default"
+    record_card_review(db, card.id, quality, response_time, reviewed_at)
+    record_deck_response_time(db, deck_name, response_time)
+    record_study_activity(db, day, cards_studied=1, cards_correct=correct)
+    apply_snapshot_deltas(db, day, {
+        deck_name: Counter(reviewed_count=1, correct_count=correct, introduced_count=int(introduced))
+    })
+    activity_index.record_on_commit(db, day, deck_name, cards_studied=1, cards_correct=correct)
+    invalidate_on_commit(db, (REVIEWS,), [deck_name])
+    if session is not None:
+        add_study_totals(db, session.deck_name, cards_studied=1, cards_correct=correct)
+        if session.ended_at is not None:
+            # Late review for an ended session: keep its frozen summary current
+            freeze_session_summary(db, session)
+        _invalidate_session(db, session)
+
+
+def cram_reviews_logged(
+    db: Session,
+    reviews: Iterable[Tuple[int, str, int, float]],
+    reviewed_at: datetime,
+    session: StudySession
+) -> None:
+    """
+    Record a batch of cram reviews in the per-card totals and study activity rollups
+
+    Cram reviews leave card schedules alone, so unlike review_logged they
+    do not touch the deck snapshots and do not count towards the daily
+    new-card and review limits. They count in the all-decks activity only,
+    not in per-deck activity, which is read from the snapshots. They add to
+    each card's review count and response times but not to its lapses.
+
+    Args:
+        db: Database session
+        reviews: (card_id, deck_name, quality, response_time) of each review
+        reviewed_at: When the batch was submitted
+        session: Cram session the reviews belong to
+    """
+    reviews = list(reviews)
+    day = study_day_for(reviewed_at)
+    response_times = defaultdict(list)
+    for _, deck_name, _, response_time in reviews:
+        response_times[deck_name].append(response_time)
+    for deck_name, times in response_times.items():
+        record_deck_response_times(db, deck_name, times)
+    record_card_reviews(
+        db, [(card_id, quality, response_time) for card_id, _, quality, response_time in reviews],
+        reviewed_at, count_lapses=False
+    )
+
+    studied = len(reviews)
+    correct = sum(quality >= 3 for _, _, quality, _ in reviews)
+    record_study_activity(db, day, cards_studied=studied, cards_correct=correct)
+    add_study_totals(db, session.deck_name, cards_studied=studied, cards_correct=correct)
+    # Per-deck series are backed by the deck snapshots, which cram leaves alone
+    activity_index.record_on_commit(db, day, None, cards_studied=studied, cards_correct=correct)
+    invalidate_on_commit(db, (REVIEWS,), response_times.keys())
+    if session.ended_at is not None:
+        freeze_session_summary(db, session)
+    _invalidate_session(db, session)
+
+
+def session_started(db: Session, session: StudySession) -> None:
+    """Record the start of a study session"""
+    record_study_activity(db, session.study_day)
+    add_study_totals(db, session.deck_name, sessions_started=1)
+    _invalidate_session(db, session)
+
+
+def session_ended(db: Session, session: StudySession) -> None:
+    """Record the end of a study session and freeze its summary"""
+    minutes = 0
+    if session.started_at is not None and session.ended_at is not None:
+        minutes = max(round((session.ended_at - session.started_at).total_seconds() / 60), 0)
+    day = session.study_day or study_day_for(session.ended_at)
+    deck_name = session.deck_name
+    record_study_activity(db, day, sessions_completed=1, study_time_minutes=minutes)
+    freeze_session_summary(db, session)
+    activity_index.record_on_commit(db, day, deck_name, sessions_completed=1, study_time_minutes=minutes)
+    _invalidate_session(db, session)
+    enqueue(db, "session_ended", {
+        "session_id": session.id,
+        "deck_name": session.deck_name,
+        "session_type": session.session_type,
+        "cards_studied": session.cards_studied,
+        "cards_correct": session.cards_correct,
+        "started_at": session.started_at,
+        "ended_at": session.ended_at,
+        "study_time_minutes": minutes
+    })
@@ -0,0 +1,92 @@
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.calendar import DueForecast
+from app.services.due_forecast import due_day
+
+# Intervals up to this many days are never moved
+MIN_FUZZ_INTERVAL = 2
+
+# Fraction of the interval a review may move either way (at least one day)
+FUZZ_FACTOR = 0.05
+
+
+def fuzz_range(interval: int) -> Tuple[int, int]:
+    """
+    Smallest and largest interval a review may be moved to
+
+    Args:
+        interval: Interval chosen by SM-2 in days
+
+    Returns:
+        Inclusive (lowest, highest) interval in days
+    """
+    if interval <= MIN_FUZZ_INTERVAL:
+        return interval, interval
+    delta = max(1, round(interval * FUZZ_FACTOR))
+    return max(interval - delta, MIN_FUZZ_INTERVAL), interval + delta
+
+
+class LoadBalancer:
+    """
+    Moves new intervals to the least-loaded day of their fuzz window
+
+    The load of each candidate day is read from the deck's due-forecast
+    histogram in one range query, so a review costs O(window). Ties are
+    broken with a random generator that can be seeded for reproducibility.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+
+    def balance(self, db: Session, deck_name: str, interval: int, base_date: datetime) -> int:
+        """
+        Pick the interval within the fuzz window whose due day has the fewest cards
+
+        Args:
+            db: Database session
+            deck_name: Deck of the reviewed card
+            interval: Interval chosen by SM-2 in days
+            base_date: Time the interval counts from
+
+        Returns:
+            The balanced interval in days
+        """
+        lowest, highest = fuzz_range(interval)
+        if lowest == highest:
+            return interval
+
+        days = {
+            due_day(base_date + timedelta(days=candidate)): candidate
+            for candidate in range(lowest, highest + 1)
+        }
+        loads = dict(db.query(DueForecast.due_date, DueForecast.card_count).filter(
+            DueForecast.deck_name == deck_name,
+            DueForecast.due_date >= min(days),
+            DueForecast.due_date <= max(days)
+        ).all())
+
+        least = min(loads.get(day, 0) for day in days)
+        candidates = [candidate for day, candidate in days.items() if loads.get(day, 0) == least]
+        return self._random.choice(candidates)
+
+
+load_balancer = LoadBalancer(settings.load_balance_seed)
+
+
+def interval_balancer(db: Session, deck_name: str) -> Optional[Callable[[int, datetime], int]]:
+    """
+    Balance callable for SM2Algorithm.calculate_next_review_date
+
+    Args:
+        db: Database session
+        deck_name: Deck of the reviewed card
+
+    Returns:
+        The callable, or None when load balancing is disabled
+    """
+    if not settings.load_balance_enabled:
+        return None
+    return lambda interval, base_date: load_balancer.balance(db, deck_name or "default", interval, base_date)
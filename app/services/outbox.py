@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal, after_commit
+from app.models.calendar import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+
+def enqueue(db: Session, event_type: str, payload: dict) -> OutboxEvent:
+    """
+    Add an event to the outbox in the caller's transaction
+
+    The event only becomes visible to the dispatcher if the surrounding
+    transaction commits, so notifications never describe changes that were
+    rolled back.
+
+    Args:
+        db: Database session performing the triggering change
+        event_type: Event name, e.g. "session_ended"
+        payload: JSON-serialisable event body
+
+    Returns:
+        The pending outbox row
+    """
+    outbox_event = OutboxEvent(
+        event_type=event_type,
+        payload=json.dumps(payload, default=str),
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.now()
+    )
+    db.add(outbox_event)
+    after_commit(db, lambda: outbox_dispatcher.notify())
+    return outbox_event
+
+
+class ClaimedEvent(NamedTuple):
+    """Outbox row handed to a delivery function"""
+    id: int
+    event_type: str
+    payload: dict
+    attempts: int
+
+
+def http_deliver(url: str, timeout: float = 5.0) -> Callable[[ClaimedEvent], None]:
+    """
+    Delivery function POSTing events as JSON to a webhook
+
+    Receivers should de-duplicate on the event id: delivery is at least once.
+
+    Args:
+        url: Webhook URL
+        timeout: Request timeout in seconds
+
+    Returns:
+        Callable raising on any failed delivery
+    """
+    def deliver(claimed: ClaimedEvent) -> None:
+        body = {"id": claimed.id, "type": claimed.event_type, "payload": claimed.payload}
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+
+    return deliver
+
+
+def log_deliver(claimed: ClaimedEvent) -> None:
+    """Delivery function writing events to the application log"""
+    logger.info("Outbox event %s %s: %s", claimed.id, claimed.event_type, json.dumps(claimed.payload))
+
+
+class OutboxDispatcher:
+    """
+    Drains the outbox in batches with bounded concurrency
+
+    Each batch is claimed by pushing its next_attempt_at out by a lease, so a
+    dispatcher that dies mid-batch only delays those events. Failed deliveries
+    are retried with exponential backoff until max_attempts is reached, after
+    which the event is marked failed.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        deliver: Callable[[ClaimedEvent], None],
+        batch_size: int = 50,
+        concurrency: int = 4,
+        max_attempts: int = 8,
+        base_backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 600.0,
+        lease_seconds: float = 60.0,
+        idle_seconds: float = 30.0,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        self.session_factory = session_factory
+        self.deliver = deliver
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Delay before the next try after a number of failed attempts"""
+        delay = self.base_backoff_seconds * (2 ** max(attempts - 1, 0))
+        return timedelta(seconds=min(delay, self.max_backoff_seconds))
+
+    def claim_batch(self) -> List[ClaimedEvent]:
+        """
+        Lease the next batch of events that are due for delivery
+
+        Each row is leased with an UPDATE that only matches while it is still
+        pending and due, and only rows whose update matched are returned, so
+        dispatchers sharing a database never claim the same event.
+        """
+        now = self.clock()
+        db = self.session_factory()
+        try:
+            due = OutboxEvent.status == PENDING, OutboxEvent.next_attempt_at <= now
+            rows = db.query(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload, OutboxEvent.attempts).filter(
+                *due
+            ).order_by(OutboxEvent.id).limit(self.batch_size).all()
+
+            lease_until = now + timedelta(seconds=self.lease_seconds)
+            claimed = []
+            for row in rows:
+                leased = db.execute(
+                    update(OutboxEvent).where(OutboxEvent.id == row.id, *due).values(next_attempt_at=lease_until)
+                ).rowcount
+                if leased:
+                    claimed.append(ClaimedEvent(row.id, row.event_type, json.loads(row.payload), row.attempts or 0))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def record_results(self, results: List[tuple]) -> None:
+        """
+        Store the outcome of a batch in one transaction
+
+        Args:
+            results: (ClaimedEvent, error message or None) pairs
+        """
+        if not results:
+            return
+
+        now = self.clock()
+        db = self.session_factory()
+        try:
+            rows = {
+                row.id: row
+                for row in db.query(OutboxEvent).filter(
+                    OutboxEvent.id.in_([claimed.id for claimed, _ in results])
+                )
+            }
+            for claimed, error in results:
+                row = rows.get(claimed.id)
+                if row is None:
+                    continue
+                row.attempts = claimed.attempts + 1
+                if error is None:
+                    row.status = DELIVERED
+                    row.delivered_at = now
+                    row.last_error = None
+                elif row.attempts >= self.max_attempts:
+                    row.status = FAILED
+                    row.last_error = error
+                else:
+                    row.next_attempt_at = now + self.backoff(row.attempts)
+                    row.last_error = error
+            db.commit()
+        finally:
+            db.close()
+
+    async def dispatch_once(self) -> int:
+        """
+        Claim, deliver and record one batch
+
+        Returns:
+            Number of events attempted
+        """
+        loop = asyncio.get_running_loop()
+        claimed = await loop.run_in_executor(None, self.claim_batch)
+        if not claimed:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def attempt(claimed_event: ClaimedEvent):
+            async with semaphore:
+                try:
+                    await loop.run_in_executor(None, self.deliver, claimed_event)
+                    return claimed_event, None
+                except Exception as e:
+                    return claimed_event, f"{type(e).__name__}: {e}"
+
+        results = await asyncio.gather(*(attempt(claimed_event) for claimed_event in claimed))
+        await loop.run_in_executor(None, self.record_results, list(results))
+        return len(claimed)
+
+    def next_attempt_in(self) -> Optional[float]:
+        """Seconds until the earliest pending event is due, if any"""
+        db = self.session_factory()
+        try:
+            next_attempt_at = db.query(func.min(OutboxEvent.next_attempt_at)).filter(
+                OutboxEvent.status == PENDING
+            ).scalar()
+        finally:
+            db.close()
+        if next_attempt_at is None:
+            return None
+        return max((next_attempt_at - self.clock()).total_seconds(), 0)
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new events were committed; thread-safe"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+
+        while True:
+            self._wake.clear()
+            try:
+                attempted = await self.dispatch_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                attempted = 0
+            if attempted >= self.batch_size:
+                continue
+
+            timeout = await self._loop.run_in_executor(None, self.next_attempt_in)
+            timeout = self.idle_seconds if timeout is None else min(timeout, self.idle_seconds)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+outbox_dispatcher = OutboxDispatcher(
+    SessionLocal,
+    http_deliver(settings.outbox_webhook_url) if settings.outbox_webhook_url else log_deliver,
+    batch_size=settings.outbox_batch_size,
+    concurrency=settings.outbox_concurrency,
+    max_attempts=settings.outbox_max_attempts
+)
@@ -0,0 +1,190 @@
+import argparse
+from datetime import timedelta
+from typing import List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.calendar import MaintenanceCheckpoint
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.backtest import SM2Scheduler
+from app.services.events import card_state, cards_changed
+
+# Cards replayed and written back per transaction
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class RebuildProgress(NamedTuple):
+    """Outcome of a rebuild run"""
+    cards: int
+    reviews: int
+    resumed_from: int
+
+
+def checkpoint_name(deck_name: Optional[str] = None) -> str:
+    """Checkpoint key of a rebuild, one per deck filter"""
+    return f"card-rebuild:{deck_name}" if deck_name else "card-rebuild"
+
+
+def _replay(quality: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> dict:
+    """Replay each card's reviews through SM-2, the k-th review of every card at once"""
+    scheduler = SM2Scheduler()
+    state = scheduler.initial_state(len(starts))
+    for k in range(int(lengths.max())):
+        cards = np.flatnonzero(lengths > k)
+        scheduler.update(state, cards, quality[starts[cards] + k])
+    return state
+
+
+def rebuild_chunk(db: Session, after_card_id: int, chunk_size: int, deck_name: Optional[str] = None) -> tuple:
+    """
+    Rebuild the schedule of the next chunk of reviewed cards
+
+    Args:
+        db: Database session
+        after_card_id: Only cards with a greater ID are rebuilt
+        chunk_size: Maximum number of cards to rebuild
+        deck_name: Restrict to one deck
+
+    Returns:
+        Tuple of (last card ID rebuilt or None when done, cards, reviews)
+    """
+    reviewed = db.query(CardReview.card_id).join(Card, Card.id == CardReview.card_id).filter(
+        CardReview.card_id > after_card_id,
+        CardReview.reviewed_at.isnot(None),
+        CardReview.cram.isnot(True)
+    )
+    if deck_name:
+        reviewed = reviewed.filter(Card.deck_name == deck_name)
+    card_ids = [row[0] for row in reviewed.distinct().order_by(CardReview.card_id).limit(chunk_size)]
+    if not card_ids:
+        return None, 0, 0
+    last_card_id = card_ids[-1]
+
+    history = db.query(CardReview.card_id, CardReview.quality, CardReview.reviewed_at).join(
+        Card, Card.id == CardReview.card_id
+    ).filter(
+        CardReview.card_id > after_card_id,
+        CardReview.card_id <= last_card_id,
+        CardReview.reviewed_at.isnot(None),
+        CardReview.cram.isnot(True)
+    )
+    if deck_name:
+        history = history.filter(Card.deck_name == deck_name)
+    rows = history.order_by(CardReview.card_id, CardReview.reviewed_at, CardReview.id).all()
+
+    review_cards = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    quality = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    starts = np.flatnonzero(np.r_[True, review_cards[1:] != review_cards[:-1]])
+    lengths = np.diff(np.r_[starts, len(rows)])
+    state = _replay(quality, starts, lengths)
+
+    # Plain rows carry the attributes card_state reads, without hydrating cards
+    before = {
+        row.id: card_state(row) for row in db.query(
+            Card.id, Card.deck_name, Card.interval, Card.ease_factor, Card.next_review, Card.last_reviewed
+        ).filter(Card.id >= card_ids[0], Card.id <= last_card_id).all()
+    }
+
+    updates = []
+    changes = []
+    for group, start in enumerate(starts):
+        card_id = int(review_cards[start])
+        last_reviewed = rows[start + lengths[group] - 1][2]
+        interval = int(state["interval"][group])
+        values = {
+            "id": card_id,
+            "interval": interval,
+            "ease_factor": float(state["ease_factor"][group]),
+            "repetitions": int(state["repetitions"][group]),
+            "last_reviewed": last_reviewed,
+            "next_review": last_reviewed + timedelta(days=interval)
+        }
+        updates.append(values)
+        changes.append((before[card_id], before[card_id]._replace(
+            interval=interval,
+            ease_factor=values["ease_factor"],
+            next_review=values["next_review"],
+            last_reviewed=last_reviewed
+        )))
+
+    db.execute(update(Card), updates)
+    cards_changed(db, changes)
+    return last_card_id, len(updates), len(rows)
+
+
+def rebuild_schedules(
+    db: Session,
+    deck_name: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    restart: bool = False
+) -> RebuildProgress:
+    """
+    Recompute every reviewed card's schedule by replaying the review log
+
+    Cards are processed in ID order, a chunk at a time: their reviews are
+    read in (card_id, reviewed_at) order, replayed through SM-2 in batches,
+    and written back with one bulk UPDATE by primary key. Each chunk is
+    committed together with its derived-table changes and a checkpoint, so
+    an interrupted rebuild resumes after the last committed chunk. Cards
+    without logged reviews keep their current schedule, and intervals are
+    not load balanced so the result depends only on the log.
+
+    Args:
+        db: Database session
+        deck_name: Restrict to one deck
+        chunk_size: Cards rebuilt per transaction
+        restart: Ignore an existing checkpoint and start from the first card
+
+    Returns:
+        Number of cards and reviews replayed, and the card ID resumed after
+    """
+    name = checkpoint_name(deck_name)
+    checkpoint = db.get(MaintenanceCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = MaintenanceCheckpoint(name=name, position=0)
+        db.add(checkpoint)
+    elif restart:
+        checkpoint.position = 0
+    resumed_from = checkpoint.position
+
+    total_cards = total_reviews = 0
+    while True:
+        last_card_id, cards, reviews = rebuild_chunk(db, checkpoint.position, chunk_size, deck_name)
+        if last_card_id is None:
+            break
+        checkpoint.position = last_card_id
+        db.commit()
+        total_cards += cards
+        total_reviews += reviews
+
+    db.delete(checkpoint)
+    db.commit()
+    return RebuildProgress(total_cards, total_reviews, resumed_from)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Rebuild card schedules from the review log from the command line"""
+    from app.core.database import SessionLocal, create_tables
+
+    parser = argparse.ArgumentParser(description="Recompute card schedules by replaying card_reviews")
+    parser.add_argument("--deck", help="only rebuild cards of this deck")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="cards rebuilt per transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted rebuild")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        progress = rebuild_schedules(db, args.deck, args.chunk_size, args.restart)
+    finally:
+        db.close()
+
+    if progress.resumed_from:
+        print(f"Resumed after card {progress.resumed_from}")
+    print(f"Rebuilt {progress.cards} cards from {progress.reviews} reviews")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import json
+import logging
+import threading
+import urllib.request
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.study_day import study_day_for
+from app.models.calendar import StudyReminder
+from app.services.due_forecast import due_counts_by_deck
+from app.services.outbox import enqueue
+
+logger = logging.getLogger(__name__)
+
+REMINDER_EVENT = "study_reminder"
+
+
+def next_fire_time(reminder_time: str, after: datetime) -> datetime:
+    """
+    Next moment a daily HH:MM reminder fires, strictly after a given time
+
+    The reminder time is read in the configured user timezone; the result is
+    a naive server-local datetime like every other timestamp the API stores.
+
+    Args:
+        reminder_time: Reminder time in HH:MM format
+        after: Server-local naive datetime to start from
+
+    Returns:
+        Server-local naive datetime of the next firing
+    """
+    hour, minute = map(int, reminder_time.split(":"))
+    tz = ZoneInfo(settings.user_timezone) if settings.user_timezone else None
+
+    local_after = after.astimezone(tz) if tz is not None else after
+    candidate = datetime.combine(local_after.date(), time(hour, minute))
+    if tz is not None:
+        candidate = candidate.replace(tzinfo=tz)
+    if candidate <= local_after:
+        candidate += timedelta(days=1)
+
+    if tz is not None:
+        candidate = candidate.astimezone().replace(tzinfo=None)
+    return candidate
+
+
+class LogSink:
+    """Deliver reminders to the application log"""
+
+    def deliver(self, db: Session, payload: dict) -> None:
+        logger.info("Study reminder: %s", json.dumps(payload))
+
+
+class WebhookSink:
+    """POST reminders as JSON to a (typically local) webhook"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, db: Session, payload: dict) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class OutboxSink:
+    """Write reminders to the outbox table in the firing transaction"""
+
+    def deliver(self, db: Session, payload: dict) -> None:
+        enqueue(db, REMINDER_EVENT, payload)
+
+
+def build_sink(name: str, webhook_url: Optional[str] = None):
+    """
+    Create the reminder sink selected in the settings
+
+    Args:
+        name: One of "log", "webhook" or "outbox"
+        webhook_url: Target URL for the webhook sink
+
+    Returns:
+        Sink instance
+    """
+    if name == "webhook":
+        if not webhook_url:
+            raise ValueError("reminder_webhook_url is required for the webhook sink")
+        return WebhookSink(webhook_url)
+    if name == "outbox":
+        return OutboxSink()
+    if name == "log":
+        return LogSink()
+    raise ValueError(f"Unknown reminder sink: {name}")
+
+
+class ScheduledReminder(NamedTuple):
+    """In-memory copy of an enabled reminder"""
+    version: int
+    time: str
+    deck_names: Tuple[str, ...]
+
+
+class ReminderScheduler:
+    """
+    Fires study reminders from a heap keyed by next fire time
+
+    The scheduler reads every reminder once at start-up and afterwards only
+    reloads the rows it is told have changed. Between firings it sleeps until
+    the earliest entry is due (or a change wakes it up) instead of polling the
+    database.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        sink,
+        clock: Callable[[], datetime] = datetime.now,
+        retry_seconds: float = 60.0
+    ):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.clock = clock
+        self.retry_seconds = retry_seconds
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._reminders: Dict[int, ScheduledReminder] = {}
+        self._versions: Dict[int, int] = {}
+        self._changed: Set[int] = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def load_all(self) -> None:
+        """Schedule every enabled reminder from the database"""
+        self._heap.clear()
+        self._reminders.clear()
+        db = self.session_factory()
+        try:
+            for reminder in db.query(StudyReminder).filter(StudyReminder.enabled.is_(True)):
+                self._schedule(reminder)
+        finally:
+            db.close()
+
+    def notify_changed(self, reminder_id: int) -> None:
+        """
+        Mark a reminder as created or changed; safe to call from any thread
+
+        Args:
+            reminder_id: ID of the changed reminder
+        """
+        with self._lock:
+            self._changed.add(reminder_id)
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def reload_changed(self) -> None:
+        """Reload the reminders marked as changed, and only those"""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        if not changed:
+            return
+
+        db = self.session_factory()
+        try:
+            reminders = {
+                reminder.id: reminder
+                for reminder in db.query(StudyReminder).filter(StudyReminder.id.in_(changed))
+            }
+        finally:
+            db.close()
+
+        for reminder_id in changed:
+            reminder = reminders.get(reminder_id)
+            if reminder is not None and reminder.enabled:
+                self._schedule(reminder)
+            else:
+                # Bumping the version leaves any heap entry stale
+                self._versions[reminder_id] = self._versions.get(reminder_id, 0) + 1
+                self._reminders.pop(reminder_id, None)
+
+    def next_due(self) -> Optional[datetime]:
+        """Fire time of the earliest live heap entry"""
+        while self._heap:
+            fire_at, reminder_id, version = self._heap[0]
+            if self._versions.get(reminder_id) == version:
+                return fire_at
+            heapq.heappop(self._heap)
+        return None
+
+    def fire_due(self, now: Optional[datetime] = None) -> List[int]:
+        """
+        Fire every reminder whose time has come and reschedule it
+
+        A reminder whose delivery fails is logged and retried after
+        retry_seconds (or at its next regular time, if that comes first)
+        without holding up the other reminders due in the same pass.
+
+        Args:
+            now: Current server-local time (defaults to the scheduler clock)
+
+        Returns:
+            IDs of the reminders delivered
+        """
+        now = now or self.clock()
+        fired = []
+        while True:
+            fire_at = self.next_due()
+            if fire_at is None or fire_at > now:
+                break
+            _, reminder_id, version = heapq.heappop(self._heap)
+            reminder = self._reminders[reminder_id]
+            next_at = next_fire_time(reminder.time, now)
+            try:
+                self.fire(reminder_id, reminder, now)
+            except Exception:
+                logger.exception("Failed to deliver study reminder %s", reminder_id)
+                next_at = min(now + timedelta(seconds=self.retry_seconds), next_at)
+            else:
+                fired.append(reminder_id)
+            heapq.heappush(self._heap, (next_at, reminder_id, version))
+        return fired
+
+    def fire(self, reminder_id: int, reminder: ScheduledReminder, now: datetime) -> dict:
+        """
+        Count due cards for the reminder's decks and hand it to the sink
+
+        Args:
+            reminder_id: ID of the reminder
+            reminder: Scheduled reminder
+            now: Firing time
+
+        Returns:
+            The delivered payload
+        """
+        db = self.session_factory()
+        try:
+            deck_names = list(reminder.deck_names) or None
+            due_counts = due_counts_by_deck(db, study_day_for(now), deck_names)
+            payload = {
+                "reminder_id": reminder_id,
+                "time": reminder.time,
+                "fired_at": now.isoformat(),
+                "deck_names": list(reminder.deck_names),
+                "due_counts": due_counts,
+                "total_due": sum(due_counts.values())
+            }
+
+            db_reminder = db.get(StudyReminder, reminder_id)
+            if db_reminder is not None:
+                db_reminder.last_fired_at = now
+            self.sink.deliver(db, payload)
+            db.commit()
+            return payload
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        """Load reminders and fire them until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await self._loop.run_in_executor(None, self.load_all)
+
+        while True:
+            self._wake.clear()
+            await self._loop.run_in_executor(None, self.reload_changed)
+            try:
+                await self._loop.run_in_executor(None, self.fire_due)
+            except Exception:
+                logger.exception("Failed to deliver study reminders")
+
+            fire_at = self.next_due()
+            timeout = None if fire_at is None else max((fire_at - self.clock()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _schedule(self, reminder: StudyReminder) -> None:
+        version = self._versions.get(reminder.id, 0) + 1
+        self._versions[reminder.id] = version
+        self._reminders[reminder.id] = ScheduledReminder(
+            version=version,
+            time=reminder.time,
+            deck_names=tuple(json.loads(reminder.deck_names or "[]"))
+        )
+        fire_at = next_fire_time(reminder.time, self.clock())
+        heapq.heappush(self._heap, (fire_at, reminder.id, version))
+
+
+reminder_scheduler = ReminderScheduler(
+    SessionLocal,
+    build_sink(settings.reminder_sink, settings.reminder_webhook_url)
+)
@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.retrievability import DECAY, FACTOR, SECONDS_PER_DAY, retrievability
+from app.services.schedule_cache import active_schedule_cache
+
+# Retention endpoint modes
+CURRENT_MODE = "current"  # Predicted recall of every card right now
+CURVE_MODE = "curve"      # Forgetting curve fitted to the deck's review outcomes
+
+# Width of the retrievability distribution bins
+RETRIEVABILITY_BIN_WIDTH = 0.1
+
+# Upper bounds (exclusive, in days) of the elapsed-time bins of the forgetting curve
+ELAPSED_BINS: Tuple[Tuple[float, str], ...] = (
+    (1, "<1"),
+    (2, "1"),
+    (4, "2-3"),
+    (8, "4-7"),
+    (15, "8-14"),
+    (31, "15-30"),
+    (91, "31-90"),
+    (181, "91-180"),
+    (366, "181-365"),
+    (np.inf, "366+"),
+)
+
+# Candidate deck stabilities (days) searched when fitting the curve
+STABILITY_GRID = np.geomspace(0.1, 3650, 400)
+
+
+def _deck_schedule(db: Session, deck_name: str) -> Dict[str, np.ndarray]:
+    """Interval and last-review columns of every card in a deck"""
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        return cache.deck_schedule(deck_name)
+
+    rows = db.query(Card.interval, Card.last_reviewed).filter(Card.deck_name == deck_name).all()
+    return {
+        "interval": np.array([row[0] or 0 for row in rows], dtype=np.int32),
+        "last_reviewed": np.array(
+            [row[1].timestamp() if row[1] is not None else np.nan for row in rows], dtype=np.float64
+        )
+    }
+
+
+def current_retention(db: Session, deck_name: str, now: datetime) -> Optional[dict]:
+    """
+    Predicted recall of every card in a deck at a moment
+
+    Retrievability is computed for the whole deck in one vectorised pass
+    over the schedule columns, read from the schedule cache when it is
+    enabled. Cards never reviewed have nothing to recall and are counted
+    separately.
+
+    Args:
+        db: Database session
+        deck_name: Deck to describe
+        now: Server-local time to predict recall at
+
+    Returns:
+        Distribution and expected number of recalled cards, or None if the
+        deck has no cards
+    """
+    columns = _deck_schedule(db, deck_name)
+    total = len(columns["interval"])
+    if not total:
+        return None
+
+    reviewed = ~np.isnan(columns["last_reviewed"])
+    elapsed = (now.timestamp() - columns["last_reviewed"][reviewed]) / SECONDS_PER_DAY
+    recall = retrievability(elapsed, columns["interval"][reviewed])
+
+    bins = int(round(1 / RETRIEVABILITY_BIN_WIDTH))
+    counts = np.bincount(np.minimum((recall * bins).astype(np.int64), bins - 1), minlength=bins)
+    return {
+        "deck_name": deck_name,
+        "as_of": now,
+        "total_cards": total,
+        "reviewed_cards": int(reviewed.sum()),
+        "new_cards": int(total - reviewed.sum()),
+        "expected_recalled": round(float(recall.sum()), 2),
+        "average_retrievability": round(float(recall.mean()) * 100, 2) if len(recall) else None,
+        "distribution": [
+            {
+                "retrievability": f"{index * 100 // bins}-{(index + 1) * 100 // bins}%",
+                "card_count": int(count)
+            }
+            for index, count in enumerate(counts)
+        ]
+    }
+
+
+def fit_stability(elapsed: np.ndarray, reviews: np.ndarray, recalled: np.ndarray) -> Optional[float]:
+    """
+    Deck stability whose forgetting curve best explains binned outcomes
+
+    Evaluates the log-likelihood of every candidate in STABILITY_GRID for
+    all bins at once and returns the most likely one.
+
+    Args:
+        elapsed: Representative elapsed days of each bin
+        reviews: Number of reviews in each bin
+        recalled: Number of those reviews that were recalled
+
+    Returns:
+        Stability in days, or None without reviews
+    """
+    if not reviews.sum():
+        return None
+    predicted = np.power(1.0 + FACTOR * elapsed[None, :] / STABILITY_GRID[:, None], DECAY)
+    predicted = np.clip(predicted, 1e-6, 1 - 1e-6)
+    likelihood = recalled * np.log(predicted) + (reviews - recalled) * np.log(1 - predicted)
+    return float(STABILITY_GRID[np.argmax(likelihood.sum(axis=1))])
+
+
+def forgetting_curve(db: Session, deck_name: str) -> Optional[dict]:
+    """
+    Empirical forgetting curve of a deck from its review outcomes
+
+    Every review after a card's first is binned by the days elapsed since
+    the card's previous review, and the share recalled (quality >= 3) per
+    bin is compared with a fitted FSRS-style curve.
+
+    Args:
+        db: Database session
+        deck_name: Deck to describe
+
+    Returns:
+        Binned retention and the fitted curve, or None if the deck has no cards
+    """
+    if not db.query(func.count(Card.id)).filter(Card.deck_name == deck_name).scalar():
+        return None
+
+    rows = db.query(CardReview.card_id, CardReview.reviewed_at, CardReview.quality).join(
+        Card, Card.id == CardReview.card_id
+    ).filter(
+        Card.deck_name == deck_name,
+        CardReview.reviewed_at.isnot(None),
+        CardReview.cram.isnot(True)
+    ).order_by(CardReview.card_id, CardReview.reviewed_at, CardReview.id).all()
+
+    card_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    reviewed_at = np.fromiter((row[1].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+    outcome = np.fromiter((row[2] >= 3 for row in rows), dtype=bool, count=len(rows))
+
+    # Pair each review with the previous review of the same card
+    follows = card_ids[1:] == card_ids[:-1]
+    elapsed = ((reviewed_at[1:] - reviewed_at[:-1]) / SECONDS_PER_DAY)[follows]
+    outcome = outcome[1:][follows]
+
+    uppers = np.array([upper for upper, _ in ELAPSED_BINS])
+    bins = np.searchsorted(uppers, elapsed, side="right")
+    reviews = np.bincount(bins, minlength=len(ELAPSED_BINS))
+    recalled = np.bincount(bins, weights=outcome, minlength=len(ELAPSED_BINS))
+    mean_elapsed = np.divide(
+        np.bincount(bins, weights=elapsed, minlength=len(ELAPSED_BINS)), reviews,
+        out=np.zeros(len(ELAPSED_BINS)), where=reviews > 0
+    )
+
+    stability = fit_stability(mean_elapsed, reviews, recalled)
+    curve: List[dict] = []
+    for index, (_, label) in enumerate(ELAPSED_BINS):
+        count = int(reviews[index])
+        curve.append({
+            "elapsed_days": label,
+            "reviews": count,
+            "recalled": int(recalled[index]),
+            "retention": round(recalled[index] / count * 100, 2) if count else None,
+            "predicted_retention": round(
+                float(np.power(1.0 + FACTOR * mean_elapsed[index] / stability, DECAY)) * 100, 2
+            ) if count and stability else None
+        })
+
+    return {
+        "deck_name": deck_name,
+        "reviews": int(reviews.sum()),
+        "stability_days": round(stability, 2) if stability else None,
+        "curve": curve
+    }
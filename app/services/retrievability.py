@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.services.schedule_cache import active_schedule_cache
+
+# Queue orderings for due cards
+DUE_ORDER = "due"                        # Earliest next_review first
+RETRIEVABILITY_ORDER = "retrievability"  # Lowest predicted recall first
+QUEUE_ORDERS = (DUE_ORDER, RETRIEVABILITY_ORDER)
+
+# FSRS power forgetting curve, scaled so recall is 90% after one stability
+DECAY = -0.5
+FACTOR = 19 / 81
+
+SECONDS_PER_DAY = 86400.0
+
+
+def retrievability(elapsed_days: np.ndarray, stability_days: np.ndarray) -> np.ndarray:
+    """
+    Predicted probability of recall for many cards at once
+
+    Uses the FSRS forgetting curve R = (1 + 19/81 * t / S) ^ -0.5, taking the
+    SM-2 interval as the stability S: SM-2 schedules a card for when recall
+    has decayed to about 90%, which is what R(S, S) = 0.9 encodes.
+
+    Args:
+        elapsed_days: Days since each card's last review
+        stability_days: Each card's stability (its interval) in days
+
+    Returns:
+        Retrievability between 0 and 1 per card
+    """
+    stability = np.maximum(stability_days.astype(np.float64), 1.0)
+    elapsed = np.maximum(elapsed_days.astype(np.float64), 0.0)
+    return np.power(1.0 + FACTOR * elapsed / stability, DECAY)
+
+
+def most_at_risk(
+    card_ids: np.ndarray,
+    interval: np.ndarray,
+    last_reviewed: np.ndarray,
+    next_review: np.ndarray,
+    now: datetime,
+    limit: int
+) -> List[int]:
+    """
+    IDs of the due cards least likely to be recalled, most at risk first
+
+    Cards never reviewed (NaN last_reviewed) have nothing to forget and
+    come after every reviewed card, oldest due first. Only the top `limit`
+    are sorted: argpartition finds them in O(n).
+
+    Args:
+        card_ids: IDs of the due cards
+        interval: Interval of each card in days
+        last_reviewed: Last review of each card as epoch seconds, NaN if never
+        next_review: Next review of each card as epoch seconds
+        now: Current server-local time
+        limit: Number of cards to return
+
+    Returns:
+        Up to `limit` card IDs
+    """
+    if limit <= 0 or len(card_ids) == 0:
+        return []
+
+    elapsed = (now.timestamp() - last_reviewed) / SECONDS_PER_DAY
+    scores = retrievability(np.nan_to_num(elapsed), interval)
+    scores[np.isnan(last_reviewed)] = np.inf
+
+    if len(scores) > limit:
+        top = np.argpartition(scores, limit - 1)[:limit]
+    else:
+        top = np.arange(len(scores))
+    order = np.lexsort((card_ids[top], next_review[top], scores[top]))
+    return card_ids[top[order]].tolist()
+
+
+def at_risk_due_cards(
+    db: Session,
+    now: datetime,
+    deck_names: Optional[List[str]] = None,
+    limit: int = 20
+) -> Tuple[int, List[int]]:
+    """
+    Due cards ordered by predicted retrievability
+
+    Reads the due cards' schedule columns from the schedule cache when it is
+    enabled and otherwise as plain tuples from SQL, without hydrating ORM
+    objects for cards that will not be returned.
+
+    Args:
+        db: Database session
+        now: Current server-local time
+        deck_names: Restrict to these decks (None for every deck)
+        limit: Maximum number of card IDs to return
+
+    Returns:
+        Total number of due cards and the IDs of the `limit` most at risk
+    """
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        columns = cache.due_schedule(now, deck_names)
+    else:
+        query = db.query(Card.id, Card.interval, Card.next_review, Card.last_reviewed).filter(
+            Card.next_review <= now
+        )
+        if deck_names is not None:
+            query = query.filter(Card.deck_name.in_(deck_names))
+        rows = query.all()
+        columns = {
+            "card_id": np.array([row[0] for row in rows], dtype=np.int64),
+            "interval": np.array([row[1] or 0 for row in rows], dtype=np.int32),
+            "next_review": np.array([row[2].timestamp() for row in rows], dtype=np.float64),
+            "last_reviewed": np.array(
+                [row[3].timestamp() if row[3] is not None else np.nan for row in rows], dtype=np.float64
+            )
+        }
+
+    card_ids = most_at_risk(
+        columns["card_id"], columns["interval"], columns["last_reviewed"], columns["next_review"], now, limit
+    )
+    return len(columns["card_id"]), card_ids
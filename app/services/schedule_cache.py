@@ -0,0 +1,347 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import after_commit
+from app.models.card import Card
+from app.models.calendar import CacheGeneration
+
+# Generation counter bumped by every committed schedule change
+SCHEDULE_GENERATION = "schedule"
+
+# Epoch stored for cards without a next review, so they are never due
+NEVER = np.inf
+
+
+def _epoch(moment: Optional[datetime]) -> float:
+    """Seconds since the epoch of a naive server-local datetime"""
+    return NEVER if moment is None else moment.timestamp()
+
+
+def current_generation(db: Session) -> int:
+    """Committed generation of the schedule data"""
+    generation = db.query(CacheGeneration.generation).filter(
+        CacheGeneration.name == SCHEDULE_GENERATION
+    ).scalar()
+    return generation or 0
+
+
+def bump_generation(db: Session) -> int:
+    """
+    Advance the schedule generation in the caller's transaction
+
+    Every worker compares this counter with the generation its cache was
+    built at, so a write committed by any process invalidates all caches.
+
+    Args:
+        db: Database session performing the schedule change
+
+    Returns:
+        The new generation
+    """
+    result = db.execute(
+        update(CacheGeneration)
+        .where(CacheGeneration.name == SCHEDULE_GENERATION)
+        .values(generation=CacheGeneration.generation + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheGeneration(name=SCHEDULE_GENERATION, generation=1))
+        db.flush()
+        return 1
+    return current_generation(db)
+
+
+class ScheduleCache:
+    """
+    Process-local columnar copy of every card's schedule
+
+    One NumPy array per column (card id, deck code, next review and last
+    review epochs, ease and interval) answers due counts, due lists and forecasts with
+    vectorised masks instead of SQL. The cache is built at a generation of
+    the schedule data; local writes are applied in place when they are the
+    next generation, and anything else (a write by another worker) makes the
+    next read rebuild it.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+        self.generation: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        """Number of cached cards"""
+        return self._size
+
+    def load(self, db: Session) -> None:
+        """Rebuild the arrays from the cards table"""
+        generation = current_generation(db)
+        rows = db.query(
+            Card.id, Card.deck_name, Card.next_review, Card.last_reviewed, Card.ease_factor, Card.interval
+        ).all()
+
+        with self._lock:
+            self._allocate(max(len(rows) * 2, 1024))
+            for card_id, deck_name, next_review, last_reviewed, ease_factor, interval in rows:
+                self._upsert(card_id, deck_name or "default", next_review, last_reviewed, ease_factor, interval)
+            self.generation = generation
+
+    def ensure_current(self, db: Session) -> None:
+        """Rebuild the cache if the committed generation moved past it"""
+        if self.generation != current_generation(db):
+            self.load(db)
+
+    def apply(self, changes: Sequence[tuple], generation: int) -> None:
+        """
+        Apply committed card changes in place
+
+        Args:
+            changes: (before, after) CardState pairs as passed to the write hooks
+            generation: Schedule generation the changes were committed at
+        """
+        with self._lock:
+            if self.generation is None or generation <= self.generation:
+                # Not loaded yet, or a rebuild already read these changes
+                return
+            if generation != self.generation + 1:
+                # Another writer got in between: rebuild on the next read
+                self.generation = None
+                return
+
+            for before, after in changes:
+                if after is not None:
+                    self._upsert(
+                        after.card_id, after.deck_name, after.next_review, after.last_reviewed,
+                        after.ease_factor, after.interval
+                    )
+                elif before is not None:
+                    self._remove(before.card_id)
+            self.generation = generation
+
+    def clear(self) -> None:
+        """Drop every cached card"""
+        with self._lock:
+            self._allocate(1024)
+            self.generation = None
+
+    def due_cards(self, now: datetime, deck_name: Optional[str] = None, limit: int = 20) -> Tuple[int, List[int]]:
+        """
+        Cards due at a moment, earliest first
+
+        Args:
+            now: Server-local time
+            deck_name: Restrict to one deck
+            limit: Maximum number of card IDs to return
+
+        Returns:
+            Total number of due cards and the IDs of the first `limit` of them
+        """
+        with self._lock:
+            mask = self._next_review[:self._size] <= _epoch(now)
+            if deck_name is not None:
+                code = self._deck_index.get(deck_name)
+                if code is None:
+                    return 0, []
+                mask &= self._deck_codes[:self._size] == code
+
+            rows = np.flatnonzero(mask)
+            total = len(rows)
+            if total > limit:
+                # Partial selection keeps the sort down to the rows returned
+                rows = rows[np.argpartition(self._next_review[rows], limit - 1)[:limit]]
+            order = np.lexsort((self._card_ids[rows], self._next_review[rows]))
+            return total, self._card_ids[rows[order]].tolist()
+
+    def due_schedule(self, now: datetime, deck_names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Schedule columns of every card due at a moment
+
+        Args:
+            now: Server-local time
+            deck_names: Restrict to these decks
+
+        Returns:
+            Copies of the card_id, interval, next_review and last_reviewed
+            (epoch seconds, NaN if never reviewed) columns of the due cards
+        """
+        with self._lock:
+            return self._schedule(self._next_review[:self._size] <= _epoch(now), deck_names)
+
+    def deck_schedule(self, deck_name: str) -> Dict[str, np.ndarray]:
+        """
+        Schedule columns of every card in a deck
+
+        Args:
+            deck_name: Deck to read
+
+        Returns:
+            Copies of the same columns as due_schedule
+        """
+        with self._lock:
+            return self._schedule(np.ones(self._size, dtype=bool), [deck_name])
+
+    def due_counts_by_deck(self, before: datetime, deck_names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Number of cards due before a moment, per deck
+
+        Args:
+            before: Server-local time; cards due at or after it are excluded
+            deck_names: Restrict the counts to these decks
+
+        Returns:
+            Mapping of deck name to due card count
+        """
+        with self._lock:
+            mask = self._next_review[:self._size] < _epoch(before)
+            counts = np.bincount(self._deck_codes[:self._size][mask], minlength=len(self._deck_names))
+            wanted = None if deck_names is None else set(deck_names)
+            return {
+                deck: int(count)
+                for deck, count in zip(self._deck_names, counts)
+                if count and (wanted is None or deck in wanted)
+            }
+
+    def forecast(self, boundaries: Sequence[datetime]) -> List[Tuple[int, str, int]]:
+        """
+        Cards due in each of a series of consecutive periods, per deck
+
+        Args:
+            boundaries: Ascending period start times; the last one ends the
+                final period
+
+        Returns:
+            List of (period index, deck name, card count), ordered by period
+            and deck name
+        """
+        edges = np.array([_epoch(boundary) for boundary in boundaries])
+        with self._lock:
+            next_review = self._next_review[:self._size]
+            mask = (next_review >= edges[0]) & (next_review < edges[-1])
+            periods = np.searchsorted(edges, next_review[mask], side="right") - 1
+            decks = self._deck_codes[:self._size][mask]
+
+            deck_count = max(len(self._deck_names), 1)
+            counts = np.bincount(periods * deck_count + decks, minlength=(len(edges) - 1) * deck_count)
+            buckets = [
+                (int(index) // deck_count, self._deck_names[int(index) % deck_count], int(counts[index]))
+                for index in np.flatnonzero(counts)
+            ]
+        return sorted(buckets, key=lambda bucket: (bucket[0], bucket[1]))
+
+    def _schedule(self, mask: np.ndarray, deck_names: Optional[Iterable[str]]) -> Dict[str, np.ndarray]:
+        if deck_names is not None:
+            codes = [self._deck_index[deck] for deck in deck_names if deck in self._deck_index]
+            mask &= np.isin(self._deck_codes[:self._size], codes)
+        return {
+            "card_id": self._card_ids[:self._size][mask],
+            "interval": self._interval[:self._size][mask],
+            "next_review": self._next_review[:self._size][mask],
+            "last_reviewed": self._last_reviewed[:self._size][mask]
+        }
+
+    def _allocate(self, capacity: int) -> None:
+        self._card_ids = np.zeros(capacity, dtype=np.int64)
+        self._deck_codes = np.zeros(capacity, dtype=np.int32)
+        self._next_review = np.full(capacity, NEVER, dtype=np.float64)
+        self._last_reviewed = np.full(capacity, np.nan, dtype=np.float64)
+        self._ease = np.zeros(capacity, dtype=np.float32)
+        self._interval = np.zeros(capacity, dtype=np.int32)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._deck_index: Dict[str, int] = {}
+        self._deck_names: List[str] = []
+
+    def _grow(self) -> None:
+        capacity = len(self._card_ids) * 2
+        fill = {"_next_review": NEVER, "_last_reviewed": np.nan}
+        for name in ("_card_ids", "_deck_codes", "_next_review", "_last_reviewed", "_ease", "_interval"):
+            old = getattr(self, name)
+            new = np.full(capacity, fill.get(name, 0), dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _deck_code(self, deck_name: str) -> int:
+        code = self._deck_index.get(deck_name)
+        if code is None:
+            code = len(self._deck_names)
+            self._deck_index[deck_name] = code
+            self._deck_names.append(deck_name)
+        return code
+
+    def _upsert(self, card_id, deck_name, next_review, last_reviewed, ease_factor, interval) -> None:
+        row = self._rows.get(card_id)
+        if row is None:
+            if self._size == len(self._card_ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[card_id] = row
+        self._card_ids[row] = card_id
+        self._deck_codes[row] = self._deck_code(deck_name)
+        self._next_review[row] = _epoch(next_review)
+        self._last_reviewed[row] = np.nan if last_reviewed is None else last_reviewed.timestamp()
+        self._ease[row] = ease_factor if ease_factor is not None else 2.5
+        self._interval[row] = interval or 0
+
+    def _remove(self, card_id) -> None:
+        row = self._rows.pop(card_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            # Move the last card into the hole to keep the arrays dense
+            arrays = (
+                self._card_ids, self._deck_codes, self._next_review, self._last_reviewed, self._ease, self._interval
+            )
+            for array in arrays:
+                array[row] = array[last]
+            self._rows[int(self._card_ids[row])] = row
+        self._next_review[last] = NEVER
+        self._size = last
+
+
+schedule_cache = ScheduleCache()
+
+
+def active_schedule_cache(db: Session) -> Optional[ScheduleCache]:
+    """
+    The schedule cache, brought up to date, if it is enabled
+
+    Args:
+        db: Database session used to check the generation (and rebuild)
+
+    Returns:
+        The cache, or None when due queries should go to SQL
+    """
+    if not settings.schedule_cache_enabled:
+        return None
+    schedule_cache.ensure_current(db)
+    return schedule_cache
+
+
+def schedule_changed(db: Session, changes: List[tuple]) -> None:
+    """
+    Publish card schedule changes to every worker's cache
+
+    Bumps the generation in the caller's transaction and, once it commits,
+    applies the changes to this process's cache.
+
+    Args:
+        db: Database session performing the changes
+        changes: (before, after) CardState pairs
+    """
+    if not settings.schedule_cache_enabled:
+        return
+    generation = bump_generation(db)
+    after_commit(db, lambda: schedule_cache.apply(changes, generation))
+
+
+def cards_by_id(db: Session, card_ids: List[int]) -> List[Card]:
+    """Load cards by ID in one query, keeping the order of the IDs"""
+    if not card_ids:
+        return []
+    cards = {card.id: card for card in db.query(Card).filter(Card.id.in_(card_ids))}
+    return [cards[card_id] for card_id in card_ids if card_id in cards]
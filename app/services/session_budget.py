@@ -0,0 +1,94 @@
+from datetime import date, datetime
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import CardStats, DeckResponseTime, StudySession
+from app.services.card_stats import DEFAULT_RESPONSE_SECONDS
+from app.services.session_queue import session_queue
+
+# Most cards of the queue looked at when sizing a session to a time budget
+MAX_PLANNED_CARDS = 500
+
+
+def estimate_seconds(db: Session, card_ids: List[int]) -> Dict[int, float]:
+    """
+    Expected seconds to review each of a set of cards
+
+    Uses the card's response time moving average, falling back to its
+    deck's, then to a fixed default. Both averages are maintained by the
+    review hook, so this is a primary-key lookup per card and deck and
+    never reads the review log.
+
+    Args:
+        db: Database session
+        card_ids: Cards to estimate
+
+    Returns:
+        Mapping of card ID to estimated seconds
+    """
+    if not card_ids:
+        return {}
+    rows = db.query(Card.id, Card.deck_name, CardStats.response_time_ewma).outerjoin(
+        CardStats, CardStats.card_id == Card.id
+    ).filter(Card.id.in_(card_ids)).all()
+    deck_names = {deck_name or "default" for _, deck_name, _ in rows}
+    decks = dict(
+        db.query(DeckResponseTime.deck_name, DeckResponseTime.response_time_ewma).filter(
+            DeckResponseTime.deck_name.in_(deck_names)
+        ).all()
+    )
+    return {
+        card_id: card_ewma or decks.get(deck_name or "default") or DEFAULT_RESPONSE_SECONDS
+        for card_id, deck_name, card_ewma in rows
+    }
+
+
+def plan_session_size(db: Session, session: StudySession, now: datetime, day: date) -> int:
+    """
+    Number of queued cards that fit a session's time budget
+
+    Fills greedily in queue order until the next card's estimate would
+    overrun `target_minutes`.
+
+    Args:
+        db: Database session
+        session: Study session with target_minutes set
+        now: Current server-local time
+        day: Current study day
+
+    Returns:
+        Planned number of cards
+    """
+    card_ids = session_queue(db, session, now, day, MAX_PLANNED_CARDS)
+    estimates = estimate_seconds(db, card_ids)
+    budget = session.target_minutes * 60
+    planned = 0
+    for card_id in card_ids:
+        cost = estimates.get(card_id, DEFAULT_RESPONSE_SECONDS)
+        if cost > budget:
+            break
+        budget -= cost
+        planned += 1
+    return planned
+
+
+def within_budget(db: Session, session: StudySession, card: Card) -> bool:
+    """
+    Whether a session's remaining time budget has room for a card
+
+    The budget is charged with the response times actually submitted, so a
+    session that runs slower than planned stops early and one that runs
+    faster keeps going. The first card is always served.
+
+    Args:
+        db: Database session
+        session: Study session with target_minutes set
+        card: Candidate next card
+
+    Returns:
+        True if the card's estimate fits the remaining budget
+    """
+    if not session.cards_studied:
+        return True
+    remaining = session.target_minutes * 60 - (session.seconds_studied or 0.0)
+    return estimate_seconds(db, [card.id]).get(card.id, DEFAULT_RESPONSE_SECONDS) <= remaining
@@ -0,0 +1,43 @@
+from datetime import date, datetime
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import StudySession
+from app.services.daily_limits import MIXED_SESSION, NEW_SESSION, upcoming_limited_cards
+from app.services.deck_queue import merged_due_cards, session_deck_names
+from app.services.retrievability import RETRIEVABILITY_ORDER, at_risk_due_cards
+from app.services.schedule_cache import active_schedule_cache
+
+
+def session_queue(db: Session, session: StudySession, now: datetime, day: date, limit: int) -> List[int]:
+    """
+    Cards a session serves next, in order
+
+    The single queue dispatch behind both the next-card endpoint and the
+    time-budget planner, so a session is sized on the cards it will serve.
+
+    Args:
+        db: Database session
+        session: Study session
+        now: Current server-local time
+        day: Current study day
+        limit: Maximum number of card IDs to return
+
+    Returns:
+        Up to `limit` card IDs
+    """
+    if session.session_type in (NEW_SESSION, MIXED_SESSION):
+        return upcoming_limited_cards(db, session, now, day, limit)
+    if session.queue_order == RETRIEVABILITY_ORDER:
+        return at_risk_due_cards(db, now, session_deck_names(session), limit)[1]
+    if session.deck_names:
+        # Multi-deck sessions merge the decks' due queues, earliest first
+        return merged_due_cards(db, session_deck_names(session), now, limit)
+
+    cache = active_schedule_cache(db)
+    if cache is not None:
+        return cache.due_cards(now, session.deck_name or None, limit)[1]
+    query = db.query(Card.id).filter(Card.next_review <= now)
+    if session.deck_name:
+        query = query.filter(Card.deck_name == session.deck_name)
+    return [row[0] for row in query.order_by(Card.next_review).limit(limit)]
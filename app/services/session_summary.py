@@ -0,0 +1,139 @@
+import json
+from collections import Counter, defaultdict
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.study_session import CardReview, SessionSummary, StudySession
+
+# Response time percentiles reported in a summary
+PERCENTILES = (50, 90, 95)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Linearly interpolated percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def build_session_summary(db: Session, session: StudySession) -> dict:
+    """
+    Summarise the reviews of a study session
+
+    The session's reviews are read once through the card_reviews.session_id
+    index, joined to their cards, and folded into every section of the
+    summary in the same pass. Percentiles need the individual response
+    times, so this is one query rather than one GROUP BY per section.
+
+    Args:
+        db: Database session
+        session: Study session to summarise
+
+    Returns:
+        JSON-serialisable summary
+    """
+    rows = db.query(
+        CardReview.card_id,
+        CardReview.quality,
+        CardReview.response_time,
+        Card.deck_name,
+        Card.front
+    ).outerjoin(
+        Card, Card.id == CardReview.card_id
+    ).filter(
+        CardReview.session_id == session.id
+    ).order_by(CardReview.id).all()
+
+    qualities = Counter()
+    response_times = []
+    decks = defaultdict(Counter)
+    failed = {}
+    for card_id, quality, response_time, deck_name, front in rows:
+        correct = quality >= 3
+        qualities[quality] += 1
+        response_times.append(response_time or 0.0)
+        deck = decks[deck_name or "default"]
+        deck["reviews"] += 1
+        deck["correct"] += correct
+        if not correct:
+            entry = failed.setdefault(card_id, {
+                "card_id": card_id,
+                "front": front,
+                "deck_name": deck_name,
+                "failures": 0,
+                "lowest_quality": quality
+            })
+            entry["failures"] += 1
+            entry["lowest_quality"] = min(entry["lowest_quality"], quality)
+
+    response_times.sort()
+    correct_total = sum(deck["correct"] for deck in decks.values())
+    return {
+        "session_id": session.id,
+        "deck_name": session.deck_name,
+        "session_type": session.session_type,
+        "started_at": session.started_at.isoformat() if session.started_at else None,
+        "ended_at": session.ended_at.isoformat() if session.ended_at else None,
+        "reviews": len(rows),
+        "correct": correct_total,
+        "accuracy": round(correct_total / len(rows) * 100, 2) if rows else 0.0,
+        "quality_distribution": {str(quality): qualities[quality] for quality in range(6)},
+        "response_time": {
+            "mean": round(sum(response_times) / len(response_times), 3) if response_times else 0.0,
+            "max": response_times[-1] if response_times else 0.0,
+            **{f"p{percent}": round(_percentile(response_times, percent), 3) for percent in PERCENTILES}
+        },
+        "decks": [
+            {
+                "deck_name": deck_name,
+                "reviews": counts["reviews"],
+                "correct": counts["correct"],
+                "accuracy": round(counts["correct"] / counts["reviews"] * 100, 2)
+            }
+            for deck_name, counts in sorted(decks.items())
+        ],
+        "failed_cards": list(failed.values())
+    }
+
+
+def freeze_session_summary(db: Session, session: StudySession) -> dict:
+    """
+    Store a session's summary so later reads are a primary-key lookup
+
+    Call after the session's reviews have been flushed. Freezing again (for
+    a review submitted after the session ended) replaces the stored summary.
+
+    Args:
+        db: Database session
+        session: Ended study session
+
+    Returns:
+        The stored summary
+    """
+    summary = build_session_summary(db, session)
+    row = db.get(SessionSummary, session.id)
+    if row is None:
+        row = SessionSummary(session_id=session.id)
+        db.add(row)
+    row.summary = json.dumps(summary)
+    return summary
+
+
+def get_session_summary(db: Session, session: StudySession) -> dict:
+    """
+    Summary of a session: the frozen copy once it has ended, else built live
+
+    Args:
+        db: Database session
+        session: Study session
+
+    Returns:
+        Summary with a "frozen" flag telling which of the two it is
+    """
+    row: Optional[SessionSummary] = db.get(SessionSummary, session.id)
+    if row is not None:
+        return {**json.loads(row.summary), "frozen": True}
+    return {**build_session_summary(db, session), "frozen": False}
@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.study_day import study_day_for
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.card_stats import DEFAULT_RESPONSE_SECONDS
+from app.services.retrievability import retrievability
+from app.services.spaced_repetition import SM2Algorithm
+
+# Recall models for simulated reviews
+RETRIEVABILITY_MODEL = "retrievability"  # FSRS curve from interval and elapsed days
+CONSTANT_MODEL = "constant"              # Fixed recall probability for every review
+
+# Qualities given to simulated recalled and forgotten reviews
+RECALLED_QUALITY = 4
+FORGOTTEN_QUALITY = 1
+
+# Day index of cards not yet introduced, so they are never due
+NOT_INTRODUCED = np.iinfo(np.int64).max
+
+
+def average_response_time(db: Session, deck_name: str) -> float:
+    """
+    Mean seconds per review for a deck, from its review history
+
+    Falls back to the mean over all decks, then to a fixed default.
+
+    Args:
+        db: Database session
+        deck_name: Deck to look up
+
+    Returns:
+        Average response time in seconds
+    """
+    deck_mean = db.query(func.avg(CardReview.response_time)).join(
+        Card, Card.id == CardReview.card_id
+    ).filter(Card.deck_name == deck_name, CardReview.response_time > 0).scalar()
+    if deck_mean:
+        return float(deck_mean)
+    overall_mean = db.query(func.avg(CardReview.response_time)).filter(CardReview.response_time > 0).scalar()
+    return float(overall_mean) if overall_mean else DEFAULT_RESPONSE_SECONDS
+
+
+def simulate_deck(
+    db: Session,
+    deck_name: str,
+    today: date,
+    days: int = 365,
+    new_cards_per_day: int = 20,
+    additional_new_cards: int = 0,
+    recall_model: str = RETRIEVABILITY_MODEL,
+    recall_probability: float = 0.9,
+    seed: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Simulate a deck's daily review workload with the SM-2 scheduler
+
+    Every card is one element of a set of NumPy arrays. Each simulated day
+    selects the due cards with a mask, samples recall for all of them at
+    once and reschedules them with the batch SM-2 update, so the cost is
+    O(days * cards) array operations with no Python loop per card.
+
+    Args:
+        db: Database session
+        deck_name: Deck to simulate
+        today: First simulated study day
+        days: Number of days to simulate
+        new_cards_per_day: New cards introduced per day
+        additional_new_cards: Extra new cards to add, e.g. a planned import
+        recall_model: RETRIEVABILITY_MODEL or CONSTANT_MODEL
+        recall_probability: Recall probability of the constant model, and
+            of the first review of a new card under either model
+        seed: Seed for reproducible simulations
+
+    Returns:
+        Daily workload and totals, or None if the deck has no cards and
+        none are being added
+    """
+    rows = db.query(
+        Card.interval, Card.ease_factor, Card.repetitions, Card.next_review, Card.last_reviewed
+    ).filter(Card.deck_name == deck_name).order_by(Card.id).all()
+    if not rows and not additional_new_cards:
+        return None
+
+    size = len(rows) + additional_new_cards
+    interval = np.ones(size, dtype=np.int64)
+    ease = np.full(size, 2.5)
+    repetitions = np.zeros(size, dtype=np.int64)
+    due = np.full(size, NOT_INTRODUCED, dtype=np.int64)
+    last = np.zeros(size, dtype=np.int64)
+    is_new = np.ones(size, dtype=bool)
+
+    for index, (card_interval, card_ease, card_repetitions, next_review, last_reviewed) in enumerate(rows):
+        if last_reviewed is None:
+            continue
+        is_new[index] = False
+        interval[index] = card_interval or 1
+        ease[index] = card_ease if card_ease is not None else 2.5
+        repetitions[index] = card_repetitions or 0
+        due[index] = max((study_day_for(next_review) - today).days, 0) if next_review else 0
+        last[index] = (study_day_for(last_reviewed) - today).days
+
+    new_queue = np.flatnonzero(is_new)
+    algorithm = SM2Algorithm()
+    rng = np.random.default_rng(seed)
+    seconds_per_review = average_response_time(db, deck_name)
+
+    daily = []
+    introduced = 0
+    for day in range(days):
+        # Introduce today's new cards in deck order
+        batch = new_queue[introduced:introduced + new_cards_per_day]
+        introduced += len(batch)
+        due[batch] = day
+
+        cards = np.flatnonzero(due <= day)
+        first_review = is_new[cards]
+        if recall_model == CONSTANT_MODEL:
+            recall = np.full(len(cards), recall_probability)
+        else:
+            recall = retrievability(day - last[cards], interval[cards])
+        recall[first_review] = recall_probability
+        recalled = rng.random(len(cards)) < recall
+
+        quality = np.where(recalled, RECALLED_QUALITY, FORGOTTEN_QUALITY)
+        interval[cards], ease[cards], repetitions[cards] = algorithm.calculate_next_review_batch(
+            quality, ease[cards], interval[cards], repetitions[cards]
+        )
+        due[cards] = day + interval[cards]
+        last[cards] = day
+        is_new[cards] = False
+
+        reviews = len(cards) - len(batch)
+        recalled_reviews = int(np.count_nonzero(recalled[~first_review]))
+        daily.append({
+            "date": (today + timedelta(days=day)).isoformat(),
+            "reviews": reviews,
+            "new_cards": int(len(batch)),
+            "lapses": reviews - recalled_reviews,
+            "time_minutes": round(len(cards) * seconds_per_review / 60, 1),
+            "retention": round(recalled_reviews / reviews * 100, 2) if reviews else None
+        })
+
+    total_reviews = sum(entry["reviews"] for entry in daily)
+    total_lapses = sum(entry["lapses"] for entry in daily)
+    return {
+        "deck_name": deck_name,
+        "days": days,
+        "cards": size,
+        "seconds_per_review": round(seconds_per_review, 2),
+        "total_reviews": total_reviews,
+        "average_daily_reviews": round(total_reviews / days, 2),
+        "peak_daily_reviews": max(entry["reviews"] for entry in daily),
+        "total_time_minutes": round(sum(entry["time_minutes"] for entry in daily), 1),
+        "average_retention": round((total_reviews - total_lapses) / total_reviews * 100, 2) if total_reviews else None,
+        "daily": daily
+    }
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Callable, Optional, Tuple
+import numpy as np
 
 
 class SM2Algorithm:
@@ -63,7 +64,8 @@ class SM2Algorithm:
         ease_factor: float, 
         interval: int, 
         repetitions: int,
-        base_date: datetime = None
+        base_date: datetime = None,
+        balance: Optional[Callable[[int, datetime], int]] = None
     ) -> Tuple[datetime, float, int, int]:
         """
         Calculate the next review date using SM-2 algorithm
@@ -74,6 +76,8 @@ class SM2Algorithm:
             interval: Current interval in days
             repetitions: Number of successful repetitions
             base_date: Base date to calculate from (defaults to now)
+            balance: Optional callable adjusting the new interval given the
+                base date, e.g. to move it to a less loaded day
             
         Returns:
             Tuple of (next_review_date, new_ease_factor, new_interval, new_repetitions)
@@ -84,7 +88,48 @@ class SM2Algorithm:
         new_interval, new_ease_factor, new_repetitions = self.calculate_next_review(
             quality, ease_factor, interval, repetitions
         )
+        if balance is not None:
+            new_interval = balance(new_interval, base_date)
         
         next_review_date = base_date + timedelta(days=new_interval)
         
         return next_review_date, new_ease_factor, new_interval, new_repetitions
+    
+    def calculate_next_review_batch(
+        self,
+        quality: np.ndarray,
+        ease_factor: np.ndarray,
+        interval: np.ndarray,
+        repetitions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorised calculate_next_review for many cards at once
+        
+        Applies exactly the same rules element-wise, so simulations and
+        backtests can schedule whole decks without a Python loop per card.
+        
+        Args:
+            quality: Quality of recall per card (0-5)
+            ease_factor: Current ease factor per card
+            interval: Current interval per card in days
+            repetitions: Number of successful repetitions per card
+            
+        Returns:
+            Tuple of (new_interval, new_ease_factor, new_repetitions) arrays
+        """
+        quality = np.asarray(quality)
+        ease_factor = np.asarray(ease_factor, dtype=np.float64)
+        interval = np.asarray(interval)
+        repetitions = np.asarray(repetitions)
+        correct = quality >= 3
+        
+        grown = np.round(interval * ease_factor).astype(np.int64)
+        new_interval = np.where(repetitions == 0, 1, np.where(repetitions == 1, 6, grown))
+        new_interval = np.where(correct, new_interval, 1)
+        new_repetitions = np.where(correct, repetitions + 1, 0)
+        
+        lapse = 5 - quality
+        new_ease_factor = ease_factor + (0.1 - lapse * (0.08 + lapse * 0.02))
+        new_ease_factor = np.maximum(self.MIN_EASE_FACTOR, new_ease_factor)
+        
+        return new_interval, new_ease_factor, new_repetitions
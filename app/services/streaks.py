@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from app.models.calendar import DailyActivity, LearningStreak
+
+# Primary key of the single learning streak row
+STREAK_ID = 1
+
+
+def get_streak(db: Session) -> LearningStreak:
+    """Fetch the learning streak row, creating an empty one if needed"""
+    streak = db.get(LearningStreak, STREAK_ID)
+    if streak is None:
+        streak = LearningStreak(id=STREAK_ID, current_streak=0, longest_streak=0)
+        db.add(streak)
+        db.flush()
+    return streak
+
+
+def advance_streak(db: Session, day: date) -> LearningStreak:
+    """
+    Extend the learning streak with a study day in O(1)
+
+    Days at or before the last recorded study day leave the streak untouched;
+    use rebuild_streak to account for backfilled history.
+
+    Args:
+        db: Database session
+        day: Study day on which activity happened
+
+    Returns:
+        The updated streak row
+    """
+    streak = get_streak(db)
+    last = streak.last_study_date
+    if last is not None and day <= last:
+        return streak
+
+    if last is not None and day - last == timedelta(days=1):
+        streak.current_streak = (streak.current_streak or 0) + 1
+    else:
+        streak.current_streak = 1
+    streak.longest_streak = max(streak.longest_streak or 0, streak.current_streak)
+    streak.last_study_date = day
+    return streak
+
+
+def record_study_activity(
+    db: Session,
+    day: date,
+    cards_studied: int = 0,
+    cards_correct: int = 0,
+    sessions_completed: int = 0,
+    study_time_minutes: int = 0
+) -> DailyActivity:
+    """
+    Add activity to the daily rollup of a study day and extend the streak
+
+    Args:
+        db: Database session
+        day: Study day the activity belongs to
+        cards_studied: Reviews to add
+        cards_correct: Correct reviews to add
+        sessions_completed: Completed sessions to add
+        study_time_minutes: Study minutes to add
+
+    Returns:
+        The day's activity row
+    """
+    activity = db.query(DailyActivity).filter(DailyActivity.date == day).first()
+    if activity is None:
+        activity = DailyActivity(
+            date=day, cards_studied=0, cards_correct=0,
+            sessions_completed=0, study_time_minutes=0
+        )
+        db.add(activity)
+
+    activity.cards_studied += cards_studied
+    activity.cards_correct += cards_correct
+    activity.sessions_completed += sessions_completed
+    activity.study_time_minutes += study_time_minutes
+
+    advance_streak(db, day)
+    db.flush()
+    return activity
+
+
+def rebuild_streak(db: Session) -> LearningStreak:
+    """
+    Recompute the learning streak from the daily activity rollups
+
+    Args:
+        db: Database session
+
+    Returns:
+        The repaired streak row
+    """
+    streak = get_streak(db)
+    streak.current_streak = 0
+    streak.longest_streak = 0
+    streak.last_study_date = None
+
+    for (day,) in db.query(DailyActivity.date).order_by(DailyActivity.date):
+        advance_streak(db, day)
+
+    db.commit()
+    return streak
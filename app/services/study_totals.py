@@ -0,0 +1,174 @@
+import argparse
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.study_session import StudySession, StudyTotals
+
+# Scope of the totals across all decks
+ALL_DECKS = "all"
+
+
+def deck_scope(deck_name: str) -> str:
+    """Scope key of one deck's totals"""
+    return f"deck:{deck_name}"
+
+
+class Totals(NamedTuple):
+    """Session totals for one scope"""
+    sessions_started: int
+    cards_studied: int
+    cards_correct: int
+
+
+class Mismatch(NamedTuple):
+    """Scope whose stored totals differ from the study_sessions table"""
+    scope: str
+    stored: Optional[Totals]
+    expected: Totals
+
+
+def _scopes(deck_name: Optional[str]) -> List[str]:
+    return [ALL_DECKS] if deck_name is None else [ALL_DECKS, deck_scope(deck_name)]
+
+
+def add_study_totals(
+    db: Session,
+    deck_name: Optional[str],
+    sessions_started: int = 0,
+    cards_studied: int = 0,
+    cards_correct: int = 0
+) -> None:
+    """
+    Add session activity to the all-decks totals and the session deck's totals
+
+    Args:
+        db: Database session
+        deck_name: Deck of the study session, if it has one
+        sessions_started: Sessions to add
+        cards_studied: Reviews to add
+        cards_correct: Correct reviews to add
+    """
+    for scope in _scopes(deck_name):
+        totals = db.get(StudyTotals, scope)
+        if totals is None:
+            totals = StudyTotals(scope=scope, sessions_started=0, cards_studied=0, cards_correct=0)
+            db.add(totals)
+        totals.sessions_started += sessions_started
+        totals.cards_studied += cards_studied
+        totals.cards_correct += cards_correct
+    db.flush()
+
+
+def get_study_totals(db: Session, deck_name: Optional[str] = None) -> Totals:
+    """
+    Stored totals for all decks or one deck, by primary key
+
+    Args:
+        db: Database session
+        deck_name: Deck to read (defaults to all decks)
+
+    Returns:
+        The totals, zero if nothing was recorded yet
+    """
+    totals = db.get(StudyTotals, ALL_DECKS if deck_name is None else deck_scope(deck_name))
+    if totals is None:
+        return Totals(0, 0, 0)
+    return Totals(totals.sessions_started, totals.cards_studied, totals.cards_correct)
+
+
+def compute_study_totals(db: Session) -> Dict[str, Totals]:
+    """
+    Recompute every scope's totals from the study_sessions table
+
+    Args:
+        db: Database session
+
+    Returns:
+        Mapping of scope to its expected totals
+    """
+    expected = {ALL_DECKS: Totals(0, 0, 0)}
+    rows = db.query(
+        StudySession.deck_name,
+        func.count(StudySession.id),
+        func.coalesce(func.sum(StudySession.cards_studied), 0),
+        func.coalesce(func.sum(StudySession.cards_correct), 0)
+    ).group_by(StudySession.deck_name)
+
+    for deck_name, sessions, studied, correct in rows:
+        for scope in _scopes(deck_name):
+            current = expected.get(scope, Totals(0, 0, 0))
+            expected[scope] = Totals(
+                current.sessions_started + sessions,
+                current.cards_studied + studied,
+                current.cards_correct + correct
+            )
+    return expected
+
+
+def check_study_totals(db: Session, repair: bool = False) -> List[Mismatch]:
+    """
+    Compare the stored totals with a recomputation, optionally fixing them
+
+    Args:
+        db: Database session
+        repair: Overwrite mismatched rows with the recomputed totals
+
+    Returns:
+        The scopes that did not match
+    """
+    expected = compute_study_totals(db)
+    stored = {row.scope: row for row in db.query(StudyTotals)}
+
+    mismatches = []
+    for scope in sorted(set(expected) | set(stored)):
+        want = expected.get(scope, Totals(0, 0, 0))
+        row = stored.get(scope)
+        have = None if row is None else Totals(row.sessions_started, row.cards_studied, row.cards_correct)
+        if have == want:
+            continue
+        if have is None and want == Totals(0, 0, 0) and scope != ALL_DECKS:
+            continue
+        mismatches.append(Mismatch(scope, have, want))
+
+        if repair:
+            if row is None:
+                row = StudyTotals(scope=scope)
+                db.add(row)
+            row.sessions_started, row.cards_studied, row.cards_correct = want
+
+    if repair:
+        db.commit()
+    return mismatches
+
+
+def ensure_study_totals(db: Session) -> None:
+    """Seed the totals from the study_sessions table if they were never built"""
+    if db.get(StudyTotals, ALL_DECKS) is None:
+        check_study_totals(db, repair=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Check the stored study totals from the command line"""
+    from app.core.database import SessionLocal, create_tables
+
+    parser = argparse.ArgumentParser(description="Check the running study totals against study_sessions")
+    parser.add_argument("--repair", action="store_true", help="overwrite totals that do not match")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        mismatches = check_study_totals(db, repair=args.repair)
+    finally:
+        db.close()
+
+    for mismatch in mismatches:
+        print(f"{mismatch.scope}: stored {mismatch.stored}, expected {mismatch.expected}")
+    if not mismatches:
+        print("Study totals are consistent")
+        return 0
+    return 0 if args.repair else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,9 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.core.database import get_db
 from app.models.card import Base
+from app.services.activity_index import activity_index
+from app.services.analytics_cache import analytics_cache
+from app.services.schedule_cache import schedule_cache
 
 # Create test database engine
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_mnemosyne.db"
@@ -38,18 +41,36 @@ def setup_test_database():
 def setup_and_teardown():
     """Setup and teardown for each test"""
     # Import all models to ensure they're registered
-    from app.models.card import Card
-    from app.models.study_session import StudySession, CardReview
-    from app.models.calendar import DailyActivity, StudyReminder
+    from app.models.card import Card, DeckLimits
+    from app.models.study_session import (
+        StudySession, CardReview, CardStats, DeckResponseTime, SessionSummary, StudyTotals
+    )
+    from app.models.calendar import (
+        DailyActivity, StudyReminder, DeckSnapshot, DueForecast, LearningStreak,
+        OutboxEvent, CacheGeneration, MaintenanceCheckpoint, DeckTreeTotals, DeckTreeForecast
+    )
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
     yield
     # Drop all tables after each test
     Base.metadata.drop_all(bind=engine)
+    analytics_cache.clear()
+    activity_index.clear()
+    schedule_cache.clear()
 
 
 @pytest.fixture
 def client():
     """Create test client"""
     return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    """Database session bound to the test database"""
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
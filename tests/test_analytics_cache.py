@@ -0,0 +1,108 @@
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.analytics_cache import AnalyticsCache, CARDS, REVIEWS, SESSIONS
+
+client = TestClient(app)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAnalyticsCache:
+    """Test the analytics response cache"""
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits and misses"""
+        cache = AnalyticsCache()
+
+        assert cache.get("streak") is None
+        cache.set("streak", (), {"current_streak": 3})
+        assert cache.get("streak") == {"current_streak": 3}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        """Test entries are dropped once their TTL has passed"""
+        clock = FakeClock()
+        cache = AnalyticsCache(ttl_seconds=10, clock=clock)
+        cache.set("upcoming", (7,), "forecast")
+
+        clock.now = 9.9
+        assert cache.get("upcoming", (7,)) == "forecast"
+        clock.now = 10.0
+        assert cache.get("upcoming", (7,)) is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache evicts the least recently used entry when full"""
+        cache = AnalyticsCache(max_entries=2)
+        cache.set("a", (), 1)
+        cache.set("b", (), 2)
+        cache.get("a")
+        cache.set("c", (), 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidation_is_scoped_by_topic_and_deck(self):
+        """Test writes only drop entries for their topics and decks"""
+        cache = AnalyticsCache()
+        cache.set("deck-progress", (30,), "math", deck="Math", depends_on=(CARDS, REVIEWS))
+        cache.set("deck-progress", (30,), "science", deck="Science", depends_on=(CARDS, REVIEWS))
+        cache.set("due-count", ("2024-01-01",), "all", depends_on=(CARDS,))
+        cache.set("heatmap", ("2024-01",), "sessions", depends_on=(SESSIONS,))
+
+        dropped = cache.invalidate((CARDS,), decks=["Math"])
+
+        assert dropped == 2
+        assert cache.get("deck-progress", (30,), deck="Math") is None
+        assert cache.get("due-count", ("2024-01-01",)) is None
+        assert cache.get("deck-progress", (30,), deck="Science") == "science"
+        assert cache.get("heatmap", ("2024-01",)) == "sessions"
+
+    def test_response_computed_before_a_write_is_not_cached_after_it(self):
+        """Test a reader that stores a pre-write response after the invalidation does not cache it"""
+        cache = AnalyticsCache()
+        generation = cache.generation()
+        assert cache.get("due-count", ("2024-01-01",)) is None
+        stale = "computed before the write"
+
+        # The write commits and its invalidation runs before the reader stores its response
+        cache.invalidate((CARDS,), decks=["Math"])
+        cache.set("due-count", ("2024-01-01",), stale, depends_on=(CARDS,), generation=generation)
+
+        assert cache.get("due-count", ("2024-01-01",)) is None
+        assert cache.stats()["stale_sets"] == 1
+
+        # Writes to other topics do not stop a response from being stored
+        generation = cache.generation()
+        cache.invalidate((SESSIONS,))
+        cache.set("due-count", ("2024-01-01",), "fresh", depends_on=(CARDS,), generation=generation)
+        assert cache.get("due-count", ("2024-01-01",)) == "fresh"
+
+    def test_card_writes_invalidate_cached_endpoints(self):
+        """Test a committed card write invalidates a cached due count"""
+        today = date.today().isoformat()
+        assert client.get(f"/api/calendar/due-count?date={today}").json()["due_count"] == 0
+        assert client.get(f"/api/calendar/due-count?date={today}").json()["due_count"] == 0
+
+        client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": "Math"})
+
+        assert client.get(f"/api/calendar/due-count?date={today}").json()["due_count"] == 1
+        stats = client.get("/api/cache/stats").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["invalidations"] == 1
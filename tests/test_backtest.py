@@ -0,0 +1,74 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models.card import Card
+from app.models.study_session import CardReview
+from app.services.backtest import main, run_backtest
+
+
+class TestBacktest:
+    """Test replaying the review log through schedulers"""
+
+    def _log_reviews(self, db, deck_name, history):
+        start = datetime(2024, 1, 1, 9, 0)
+        card = Card(front="Q", back="A", deck_name=deck_name)
+        db.add(card)
+        db.flush()
+        for days, quality in history:
+            db.add(CardReview(card_id=card.id, quality=quality, reviewed_at=start + timedelta(days=days)))
+        db.commit()
+        return card.id
+
+    def test_scores_predictions_after_first_review(self, db):
+        """Test each review after a card's first is scored against its outcome"""
+        self._log_reviews(db, "Math", [(0, 4), (1, 4), (7, 1)])
+
+        (result,) = run_backtest(db, ["sm2"])
+
+        assert (result.cards, result.reviews, result.predictions) == (1, 3, 2)
+        # Both predictions are 90%: recalled after one interval, forgotten after exactly one interval
+        assert result.predicted_retention == pytest.approx(90.0)
+        assert result.observed_retention == pytest.approx(50.0)
+        assert result.rmse == pytest.approx(((0.1 ** 2 + 0.9 ** 2) / 2) ** 0.5, abs=1e-4)
+        assert result.projected_daily_reviews == pytest.approx(1.0)
+
+    def test_chunking_does_not_change_results(self, db):
+        """Test histories split across chunks replay the same as in one batch"""
+        self._log_reviews(db, "Math", [(0, 5), (1, 4), (7, 4), (20, 2), (21, 5)])
+        self._log_reviews(db, "Math", [(0, 3), (3, 1)])
+        self._log_reviews(db, "Science", [(0, 4), (2, 4), (9, 5), (30, 3)])
+
+        whole = run_backtest(db, ["sm2", "leitner"], chunk_size=1000)
+        chunked = run_backtest(db, ["sm2", "leitner"], chunk_size=2)
+
+        assert chunked == whole
+        assert [result.cards for result in whole] == [3, 3]
+        assert run_backtest(db, ["sm2"], deck_name="Science")[0].reviews == 4
+
+    def test_orphaned_reviews_are_skipped(self, db):
+        """Test review rows without a card do not break the replay"""
+        self._log_reviews(db, "Math", [(0, 4), (1, 4), (7, 1)])
+        db.add(CardReview(card_id=None, quality=4, reviewed_at=datetime(2024, 1, 2, 9, 0)))
+        db.commit()
+
+        (result,) = run_backtest(db, ["sm2"])
+
+        assert (result.cards, result.reviews, result.predictions) == (1, 3, 2)
+
+    def test_empty_log(self, db):
+        """Test a backtest without reviews reports no predictions"""
+        (result,) = run_backtest(db, ["leitner"])
+
+        assert (result.cards, result.predictions, result.log_loss) == (0, 0, None)
+
+    def test_command_line(self, db, monkeypatch, capsys):
+        """Test the command prints one row per scheduler"""
+        import app.core.database as database
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+        monkeypatch.setattr(database, "create_tables", lambda: None)
+        self._log_reviews(db, "Math", [(0, 4), (1, 4)])
+
+        assert main(["--scheduler", "sm2", "--scheduler", "leitner"]) == 0
+        output = capsys.readouterr().out
+        assert "sm2" in output and "leitner" in output
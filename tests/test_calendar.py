@@ -1,7 +1,13 @@
+import asyncio
 import pytest
 from datetime import datetime, date, timedelta
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
 from app.main import app
+from app.core.config import settings
+from app.core.study_day import study_day_for, study_day_start
+from app.services import deck_snapshots
+from tests.conftest import TestingSessionLocal
 
 client = TestClient(app)
 
@@ -120,3 +126,257 @@ class TestCalendarIntegration:
         assert "period_days" in data
         assert "upcoming_reviews" in data
         assert isinstance(data["upcoming_reviews"], list)
+
+    def test_deck_progress_counts_every_review(self):
+        """Test deck progress keeps every review of the day, not just the last"""
+        card_data = {"front": "Snap Q", "back": "Snap A", "deck_name": "Snapshots"}
+        card_id = client.post("/api/cards/", json=card_data).json()["id"]
+        client.post("/api/cards/", json={"front": "Snap Q2", "back": "Snap A2", "deck_name": "Snapshots"})
+        
+        review_data = {"quality": 4, "response_time": 2.0}
+        client.post(f"/api/cards/{card_id}/review", json=review_data)
+        client.post(f"/api/cards/{card_id}/review", json=review_data)
+        
+        response = client.get("/api/calendar/deck-progress?deck_name=Snapshots&days=7")
+        
+        assert response.status_code == 200
+        today = response.json()["progress_data"][-1]
+        assert today["date"] == date.today().isoformat()
+        assert today["total_cards"] == 2
+        assert today["reviewed_cards"] == 2
+        assert today["new_cards"] == 1
+
+    def test_deck_progress_carries_history_forward(self, db):
+        """Test past days report their own snapshot rather than today's count"""
+        from app.models.calendar import DeckSnapshot
+        
+        today = date.today()
+        db.add(DeckSnapshot(
+            deck_name="History", date=today - timedelta(days=3), card_count=5,
+            reviewed_count=4, new_count=2, mature_count=1
+        ))
+        db.commit()
+        
+        response = client.get("/api/calendar/deck-progress?deck_name=History&days=5")
+        
+        assert response.status_code == 200
+        progress = response.json()["progress_data"]
+        assert len(progress) == 5
+        assert progress[0]["total_cards"] == 0
+        assert progress[1]["total_cards"] == 5
+        assert progress[1]["reviewed_cards"] == 4
+        assert progress[2]["total_cards"] == 5
+        assert progress[2]["reviewed_cards"] == 0
+        assert progress[4]["total_cards"] == 0  # Live count: the deck is empty today
+
+    def test_due_count_follows_schedule_changes(self):
+        """Test due counts track creates, reviews and deletes per deck"""
+        math_id = client.post("/api/cards/", json={"front": "Q1", "back": "A1", "deck_name": "Math"}).json()["id"]
+        client.post("/api/cards/", json={"front": "Q2", "back": "A2", "deck_name": "Math"})
+        science_id = client.post("/api/cards/", json={"front": "Q3", "back": "A3", "deck_name": "Science"}).json()["id"]
+        
+        today = date.today().isoformat()
+        data = client.get(f"/api/calendar/due-count?date={today}").json()
+        assert data["due_count"] == 3
+        assert data["by_deck"] == {"Math": 2, "Science": 1}
+        
+        # A successful review pushes the card to tomorrow
+        client.post(f"/api/cards/{math_id}/review", json={"quality": 5, "response_time": 1.0})
+        client.delete(f"/api/cards/{science_id}")
+        
+        data = client.get(f"/api/calendar/due-count?date={today}").json()
+        assert data["due_count"] == 1
+        assert data["by_deck"] == {"Math": 1}
+        
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        data = client.get(f"/api/calendar/due-count?date={tomorrow}").json()
+        assert data["by_deck"] == {"Math": 2}
+
+    def test_upcoming_reviews_grouped_by_date(self):
+        """Test upcoming reviews come back grouped by date with their decks"""
+        card_ids = client.post("/api/cards/bulk", json={"cards": [
+            {"front": "U1", "back": "A1", "deck_name": "Future"},
+            {"front": "U2", "back": "A2", "deck_name": "Other"},
+        ]}).json()["ids"]
+        for card_id in card_ids:
+            client.post(f"/api/cards/{card_id}/review", json={"quality": 4, "response_time": 2.0})
+        
+        data = client.get("/api/calendar/upcoming?days=7").json()
+        
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        assert data["upcoming_reviews"] == [
+            {"date": tomorrow, "card_count": 2, "decks": ["Future", "Other"]}
+        ]
+
+
+    def test_streak_starts_with_first_session(self):
+        """Test starting a session begins a streak on today's study day"""
+        client.post("/api/study/sessions/", json={"deck_name": "Math", "session_type": "review"})
+        
+        data = client.get("/api/calendar/streak").json()
+        
+        assert data["current_streak"] == 1
+        assert data["longest_streak"] == 1
+        assert data["last_study_date"] == date.today().isoformat()
+
+    def test_streak_advances_and_repairs_from_rollups(self, db):
+        """Test incremental streak updates agree with a rebuild from daily activity"""
+        from app.models.calendar import DailyActivity
+        from app.services.streaks import advance_streak, rebuild_streak
+        
+        today = date.today()
+        days = [today - timedelta(days=n) for n in (6, 5, 4, 1, 0)]
+        for day in days:
+            db.add(DailyActivity(date=day, cards_studied=1, cards_correct=1))
+            streak = advance_streak(db, day)
+        db.commit()
+        
+        assert (streak.current_streak, streak.longest_streak) == (2, 3)
+        
+        # Corrupt the stored streak and repair it from the rollups
+        streak.current_streak = 40
+        streak.longest_streak = 40
+        db.commit()
+        repaired = rebuild_streak(db)
+        
+        assert (repaired.current_streak, repaired.longest_streak) == (2, 3)
+        assert repaired.last_study_date == today
+
+    def test_range_analytics_sums_history_and_live_reviews(self, db):
+        """Test range totals combine stored rollups with reviews made after loading"""
+        from app.models.calendar import DailyActivity
+        
+        today = date.today()
+        for n in (40, 10, 3):
+            db.add(DailyActivity(date=today - timedelta(days=n), cards_studied=n, cards_correct=n // 2,
+                                 sessions_completed=1, study_time_minutes=5))
+        db.commit()
+        start = (today - timedelta(days=10)).isoformat()
+        
+        data = client.get(f"/api/calendar/range?start={start}&end={today.isoformat()}").json()
+        assert (data["cards_studied"], data["cards_correct"], data["sessions_completed"]) == (13, 6, 2)
+        assert data["days"] == 11
+        
+        card = client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": "Math"}).json()
+        client.post(f"/api/cards/{card['id']}/review", json={"quality": 5, "response_time": 2.0})
+        
+        data = client.get(
+            f"/api/calendar/range?start={start}&end={today.isoformat()}&daily=true"
+        ).json()
+        assert (data["cards_studied"], data["cards_correct"]) == (14, 7)
+        assert data["accuracy"] == 50.0
+        assert [day["date"] for day in data["activity_data"]] == [
+            (today - timedelta(days=10)).isoformat(),
+            (today - timedelta(days=3)).isoformat(),
+            today.isoformat()
+        ]
+        
+        deck = client.get(f"/api/calendar/range?start={start}&end={today.isoformat()}&deck=Math").json()
+        assert (deck["cards_studied"], deck["cards_correct"]) == (1, 1)
+        assert deck["sessions_completed"] is None
+
+    def test_snapshot_rollover_survives_a_failed_run(self, monkeypatch):
+        """Test a failed rollover is retried instead of ending the background task"""
+        attempts = []
+
+        def session_factory():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                raise OperationalError("INSERT", {}, Exception("database is locked"))
+            return TestingSessionLocal()
+
+        delays = []
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            if len(delays) == 2:
+                raise asyncio.CancelledError
+
+        monkeypatch.setattr(deck_snapshots.asyncio, "sleep", fake_sleep)
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(deck_snapshots.run_snapshot_rollover(session_factory))
+
+        assert len(attempts) == 2
+        assert delays[0] == deck_snapshots.ROLLOVER_RETRY_SECONDS
+
+
+class TestActivityIndex:
+    """Test the prefix-sum index behind range analytics"""
+
+    def test_fenwick_range_sums_match_slices(self):
+        """Test range sums agree with summing the values directly"""
+        from app.services.activity_index import FenwickTree
+        
+        values = [3, 0, 7, 1, 0, 0, 9, 2, 4, 5, 1]
+        tree = FenwickTree.from_values(values)
+        tree.add(4, 6)
+        values[4] += 6
+        
+        for start in range(len(values)):
+            for end in range(start, len(values) + 1):
+                assert tree.range_sum(start, end) == sum(values[start:end])
+
+    def test_series_grows_in_both_directions(self):
+        """Test adding days outside the loaded range keeps existing totals"""
+        from app.services.activity_index import ActivitySeries
+        
+        day = date(2024, 6, 1)
+        series = ActivitySeries(("cards_studied",), [(day, (4,))])
+        series.add(day + timedelta(days=100), {"cards_studied": 2})
+        series.add(day - timedelta(days=30), {"cards_studied": 1})
+        
+        assert series.totals(date(2024, 1, 1), date(2024, 12, 31)) == {"cards_studied": 7}
+        assert series.totals(day, day) == {"cards_studied": 4}
+        assert series.totals(date(2023, 1, 1), date(2023, 12, 31)) == {"cards_studied": 0}
+
+
+class TestStudyDay:
+    """Test bucketing of timestamps into the learner's study day"""
+
+    def test_rollover_hour_keeps_late_night_on_previous_day(self, monkeypatch):
+        """Test reviews before the rollover hour count for the previous day"""
+        monkeypatch.setattr(settings, "day_rollover_hour", 4)
+        
+        assert study_day_for(datetime(2024, 3, 10, 3, 59)) == date(2024, 3, 9)
+        assert study_day_for(datetime(2024, 3, 10, 4, 0)) == date(2024, 3, 10)
+        assert study_day_start(date(2024, 3, 10)) == datetime(2024, 3, 10, 4, 0)
+
+    def test_user_timezone_shifts_study_day(self, monkeypatch):
+        """Test aware timestamps are bucketed in the configured timezone"""
+        from zoneinfo import ZoneInfo
+        monkeypatch.setattr(settings, "user_timezone", "Asia/Tokyo")
+        
+        moment = datetime(2024, 3, 10, 20, 0, tzinfo=ZoneInfo("UTC"))
+        assert study_day_for(moment) == date(2024, 3, 11)
+
+    def test_weekly_progress_groups_by_study_day(self):
+        """Test weekly progress reports sessions on the study day they started"""
+        session_data = {"deck_name": "Math", "session_type": "review", "max_cards": 5}
+        client.post("/api/study/sessions/", json=session_data)
+        client.post("/api/study/sessions/", json=session_data)
+        
+        today = date.today()
+        response = client.get(f"/api/calendar/weekly-progress?start_date={today.isoformat()}")
+        
+        daily_stats = response.json()["daily_stats"]
+        assert daily_stats[0]["date"] == today.isoformat()
+        assert daily_stats[0]["sessions"] == 2
+        assert all(day["sessions"] == 0 for day in daily_stats[1:])
+
+    def test_series_loaded_during_a_write_is_not_cached(self, db):
+        """Test a load that may or may not see an in-flight write is reloaded afterwards"""
+        from app.services.activity_index import activity_index
+        from app.services.streaks import record_study_activity
+        
+        today = date.today()
+        activity_index.clear()
+        record_study_activity(db, today, cards_studied=1)
+        activity_index.record_on_commit(db, today, None, cards_studied=1)
+        
+        assert activity_index.series(db).totals(today, today)["cards_studied"] == 1
+        db.commit()
+        
+        # The load above was not kept, so the committed write is counted once
+        assert activity_index.series(db).totals(today, today)["cards_studied"] == 1
+        activity_index.clear()
+        assert activity_index.series(db).totals(today, today)["cards_studied"] == 1
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.card_stats import backfill_card_stats
 
 client = TestClient(app)
 
@@ -87,6 +88,23 @@ class TestCardCreation:
         
         assert response.status_code == 422  # Validation error
 
+    def test_create_cards_bulk(self):
+        """Test creating several cards in one request"""
+        payload = {"cards": [
+            {"front": f"Bulk Q{i}", "back": f"Bulk A{i}", "deck_name": "Bulk"}
+            for i in range(5)
+        ]}
+        
+        response = client.post("/api/cards/bulk", json=payload)
+        
+        assert response.status_code == 201
+        data = response.json()
+        assert data["created"] == 5
+        assert len(data["ids"]) == 5
+        
+        list_response = client.get("/api/cards/?deck_name=Bulk")
+        assert list_response.json()["total"] == 5
+
 
 class TestCardRetrieval:
     """Test card retrieval functionality"""
@@ -223,8 +241,149 @@ class TestCardDeletion:
         get_response = client.get(f"/api/cards/{card_id}")
         assert get_response.status_code == 404
 
+    def test_reused_card_id_starts_with_empty_history(self, db):
+        """Test a card given a deleted card's ID inherits none of its reviews"""
+        card_id = client.post("/api/cards", json={"front": "Old", "back": "A"}).json()["id"]
+        for quality in (1, 2):
+            client.post(f"/api/cards/{card_id}/review", json={"quality": quality, "response_time": 2.0})
+        client.delete(f"/api/cards/{card_id}")
+        
+        new_id = client.post("/api/cards", json={"front": "New", "back": "B"}).json()["id"]
+        assert new_id == card_id
+        
+        assert backfill_card_stats(db) == 0
+        data = client.get(f"/api/cards/{new_id}/reviews").json()
+        assert data["reviews"] == []
+        assert (data["stats"]["review_count"], data["stats"]["lapse_count"]) == (0, 0)
+
     def test_delete_card_not_found(self):
         """Test deleting a card that doesn't exist"""
         response = client.delete("/api/cards/999")
         
         assert response.status_code == 404
+
+
+class TestCardReviewHistory:
+    """Test per-card review history and totals"""
+
+    def test_review_history_pages_with_cursor(self):
+        """Test reviews are listed newest first across cursor pages"""
+        card_id = client.post("/api/cards", json={"front": "Q", "back": "A"}).json()["id"]
+        qualities = [5, 1, 4, 2, 5]
+        for quality in qualities:
+            client.post(f"/api/cards/{card_id}/review", json={"quality": quality, "response_time": 2.0})
+        
+        seen = []
+        cursor = None
+        while True:
+            url = f"/api/cards/{card_id}/reviews?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = client.get(url).json()
+            seen.extend(review["quality"] for review in data["reviews"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert seen == list(reversed(qualities))
+        assert data["stats"]["review_count"] == 5
+        assert data["stats"]["lapse_count"] == 2
+        assert data["stats"]["average_response_time"] == 2.0
+
+    def test_card_stats_for_unreviewed_card(self):
+        """Test a card that was never reviewed has empty totals"""
+        card_id = client.post("/api/cards", json={"front": "Q", "back": "A"}).json()["id"]
+        
+        data = client.get(f"/api/cards/{card_id}/stats").json()
+        
+        assert data["review_count"] == 0
+        assert data["last_reviewed_at"] is None
+
+    def test_review_history_rejects_bad_cursor(self):
+        """Test a malformed cursor is a client error"""
+        card_id = client.post("/api/cards", json={"front": "Q", "back": "A"}).json()["id"]
+        
+        response = client.get(f"/api/cards/{card_id}/reviews?cursor=nonsense")
+        
+        assert response.status_code == 400
+
+
+class TestSpreadBacklog:
+    """Test spreading overdue cards over the coming days"""
+
+    @pytest.mark.parametrize("cache_enabled", [False, True])
+    def test_spread_backlog_by_priority(self, cache_enabled, monkeypatch, db):
+        """Test the backlog is split evenly with the priority deck kept for today"""
+        from sqlalchemy import func
+        from app.core.config import settings
+        from app.models.calendar import DueForecast
+
+        monkeypatch.setattr(settings, "schedule_cache_enabled", cache_enabled)
+        cards = [{"front": f"Q{i}", "back": "A", "deck_name": "Math"} for i in range(20)]
+        cards += [{"front": f"S{i}", "back": "A", "deck_name": "Science"} for i in range(10)]
+        client.post("/api/cards/bulk", json={"cards": cards})
+        self._make_overdue(db)
+        assert client.get("/api/cards/due").json()["total"] == 30
+
+        response = client.post("/api/cards/spread-backlog", json={"days": 3, "deck_priorities": {"Science": 2}})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["overdue_cards"], data["rescheduled_cards"]) == (30, 20)
+        assert [day["card_count"] for day in data["per_day"]] == [10, 10, 10]
+
+        due_now = client.get("/api/cards/due").json()
+        assert due_now["total"] == 10
+        assert {card["deck_name"] for card in due_now["cards"]} == {"Science"}
+
+        forecast = db.query(DueForecast.deck_name, func.sum(DueForecast.card_count)).group_by(DueForecast.deck_name).all()
+        assert dict(forecast) == {"Math": 20, "Science": 10}
+        assert db.query(func.count(DueForecast.due_date.distinct())).filter(DueForecast.deck_name == "Math").scalar() == 2
+
+    @pytest.mark.parametrize("priority", [-1, 0, "nan"])
+    def test_spread_backlog_rejects_non_positive_priorities(self, priority):
+        """Test deck weights must be positive so they cannot reverse or flatten the urgency order"""
+        response = client.post("/api/cards/spread-backlog", json={"deck_priorities": {"Math": priority}})
+
+        assert response.status_code == 422
+
+    def test_spread_backlog_leaves_new_cards_alone(self, db):
+        """Test unseen cards are not part of the backlog and keep their due date"""
+        from app.models.card import Card
+
+        client.post("/api/cards/bulk", json={"cards": [
+            {"front": f"Q{i}", "back": "A", "deck_name": "Math"} for i in range(6)
+        ]})
+        self._make_overdue(db)
+        new_ids = client.post("/api/cards/bulk", json={"cards": [
+            {"front": f"N{i}", "back": "A", "deck_name": "Math"} for i in range(6)
+        ]}).json()["ids"]
+        before = {card.id: card.next_review for card in db.query(Card).filter(Card.id.in_(new_ids))}
+
+        data = client.post("/api/cards/spread-backlog", json={"days": 3}).json()
+
+        assert (data["overdue_cards"], data["rescheduled_cards"]) == (6, 4)
+        assert [day["card_count"] for day in data["per_day"]] == [2, 2, 2]
+        db.expire_all()
+        assert {card.id: card.next_review for card in db.query(Card).filter(Card.id.in_(new_ids))} == before
+
+    def _make_overdue(self, db):
+        """Turn every card into a reviewed card that has been due for a few days"""
+        from datetime import datetime, timedelta
+        from app.models.card import Card
+        from app.services.due_forecast import rebuild_due_forecast
+        from app.services.schedule_cache import bump_generation
+
+        now = datetime.now()
+        for card in db.query(Card):
+            card.interval = 5
+            card.last_reviewed = now - timedelta(days=8)
+            card.next_review = now - timedelta(days=3)
+        bump_generation(db)
+        db.commit()
+        rebuild_due_forecast(db)
+
+    def test_spread_backlog_without_overdue_cards(self):
+        """Test spreading an empty backlog changes nothing"""
+        data = client.post("/api/cards/spread-backlog", json={"days": 2}).json()
+
+        assert (data["overdue_cards"], data["rescheduled_cards"]) == (0, 0)
+        assert [day["card_count"] for day in data["per_day"]] == [0, 0]
@@ -0,0 +1,235 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+class TestDeckStats:
+    """Test the deck statistics endpoint"""
+
+    def _create_cards(self, deck_name, count):
+        return [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": deck_name}).json()["id"]
+            for i in range(count)
+        ]
+
+    def test_deck_stats_histograms_and_retention(self, db):
+        """Test maturity counts, histograms and retention for one deck"""
+        from app.models.card import Card
+
+        card_ids = self._create_cards("Math", 4)
+        self._create_cards("Science", 2)
+        session_id = client.post("/api/study/sessions/", json={"deck_name": "Math"}).json()["id"]
+        for card_id, quality in zip(card_ids[:3], (5, 4, 1)):
+            client.post(f"/api/study/sessions/{session_id}/review",
+                        json={"card_id": card_id, "quality": quality, "response_time": 1.0})
+
+        # Make one reviewed card mature and overdue
+        mature = db.get(Card, card_ids[0])
+        mature.interval = 40
+        mature.next_review = datetime.now() - timedelta(days=3)
+        db.commit()
+
+        response = client.get("/api/decks/Math/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_cards"] == 4
+        assert (data["new_cards"], data["young_cards"], data["mature_cards"]) == (1, 2, 1)
+        assert data["overdue_cards"] == 1
+        assert sum(bin["card_count"] for bin in data["ease_histogram"]) == 3
+        assert {bin["interval_days"]: bin["card_count"] for bin in data["interval_histogram"]}["31-90"] == 1
+        assert sum(bin["card_count"] for bin in data["interval_histogram"]) == 3  # New cards are left out
+        assert data["recent_reviews"] == 3
+        assert data["average_retention"] == pytest.approx(66.67)
+
+    def test_deck_stats_cached_until_deck_changes(self):
+        """Test stats are served from cache until a card in the deck changes"""
+        self._create_cards("Math", 1)
+        self._create_cards("Science", 1)
+        assert client.get("/api/decks/Math/stats").json()["total_cards"] == 1
+
+        self._create_cards("Science", 1)
+        assert client.get("/api/decks/Math/stats").json()["total_cards"] == 1
+        assert client.get("/api/cache/stats").json()["hits"] == 1
+
+        self._create_cards("Math", 1)
+        assert client.get("/api/decks/Math/stats").json()["total_cards"] == 2
+
+    def test_deck_stats_unknown_deck(self):
+        """Test stats for a deck without cards return 404"""
+        response = client.get("/api/decks/Nothing/stats")
+
+        assert response.status_code == 404
+
+
+class TestDeckSimulation:
+    """Test the deck workload simulator"""
+
+    def test_simulate_new_deck_workload(self):
+        """Test new cards are introduced daily and reviewed afterwards"""
+        for i in range(10):
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"})
+        payload = {"days": 30, "new_cards_per_day": 5, "recall_model": "constant", "recall_probability": 1.0}
+
+        response = client.post("/api/decks/Math/simulate", json=payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["cards"] == 10
+        assert len(data["daily"]) == 30
+        assert [day["new_cards"] for day in data["daily"][:3]] == [5, 5, 0]
+        # Introduced on day 0, with perfect recall every card is due again after 1 and 6 days
+        assert data["daily"][1]["reviews"] == 5
+        assert data["daily"][7]["reviews"] == 5
+        assert data["total_reviews"] == sum(day["reviews"] for day in data["daily"])
+        assert data["average_retention"] == 100.0
+        assert data["seconds_per_review"] == 8.0
+
+    def test_simulation_is_reproducible_with_seed(self):
+        """Test the same seed gives the same simulated workload"""
+        payload = {"days": 60, "new_cards_per_day": 10, "additional_new_cards": 200, "seed": 7}
+
+        first = client.post("/api/decks/Planned/simulate", json=payload).json()
+        second = client.post("/api/decks/Planned/simulate", json=payload).json()
+
+        assert first == second
+        assert first["cards"] == 200
+        assert 0 < first["average_retention"] < 100
+
+    def test_simulate_unknown_deck(self):
+        """Test simulating a deck without cards returns 404"""
+        response = client.post("/api/decks/Nothing/simulate", json={})
+
+        assert response.status_code == 404
+
+
+class TestDeckRetention:
+    """Test the deck retention endpoint"""
+
+    @pytest.mark.parametrize("cache_enabled", [False, True])
+    def test_current_retrievability(self, cache_enabled, monkeypatch, db):
+        """Test predicted recall of reviewed cards and the expected recalled count"""
+        from app.core.config import settings
+        from app.models.card import Card
+
+        monkeypatch.setattr(settings, "schedule_cache_enabled", cache_enabled)
+        card_ids = [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"}).json()["id"]
+            for i in range(3)
+        ]
+        # Two cards reviewed one interval ago sit at about 90% recall
+        for card_id in card_ids[:2]:
+            card = db.get(Card, card_id)
+            card.interval = 10
+            card.last_reviewed = datetime.now() - timedelta(days=10)
+        db.commit()
+
+        response = client.get("/api/decks/Math/retention")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["total_cards"], data["reviewed_cards"], data["new_cards"]) == (3, 2, 1)
+        assert data["expected_recalled"] == pytest.approx(1.8, abs=0.02)
+        assert data["average_retrievability"] == pytest.approx(90.0, abs=1.0)
+        assert data["distribution"][9] == {"retrievability": "90-100%", "card_count": 2}
+
+    def test_forgetting_curve_fit(self, db):
+        """Test outcomes are binned by elapsed days and a curve is fitted"""
+        from app.models.card import Card
+        from app.models.study_session import CardReview
+
+        start = datetime(2024, 1, 1, 9, 0)
+        for index in range(10):
+            card = Card(front=f"Q{index}", back="A", deck_name="Math")
+            db.add(card)
+            db.flush()
+            # Reviewed again after 5 days (4-7 bin), 9 in 10 recalled
+            for days, quality in ((0, 4), (5, 4 if index else 1)):
+                db.add(CardReview(card_id=card.id, quality=quality, reviewed_at=start + timedelta(days=days)))
+        db.commit()
+
+        data = client.get("/api/decks/Math/retention?mode=curve").json()
+
+        assert data["reviews"] == 10
+        bins = {entry["elapsed_days"]: entry for entry in data["curve"]}
+        assert (bins["4-7"]["reviews"], bins["4-7"]["retention"]) == (10, 90.0)
+        assert bins["4-7"]["predicted_retention"] == pytest.approx(90.0, abs=1.0)
+        assert data["stability_days"] == pytest.approx(5.0, rel=0.1)
+
+    def test_retention_cached_until_review(self):
+        """Test retention is cached per deck and invalidated by a review"""
+        card_id = client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": "Math"}).json()["id"]
+        assert client.get("/api/decks/Math/retention").json()["reviewed_cards"] == 0
+        assert client.get("/api/decks/Math/retention").json()["reviewed_cards"] == 0
+        assert client.get("/api/cache/stats").json()["hits"] == 1
+
+        client.post(f"/api/cards/{card_id}/review", json={"quality": 4})
+
+        assert client.get("/api/decks/Math/retention").json()["reviewed_cards"] == 1
+
+    def test_retention_unknown_deck(self):
+        """Test retention for a deck without cards returns 404"""
+        assert client.get("/api/decks/Nothing/retention").status_code == 404
+        assert client.get("/api/decks/Nothing/retention?mode=curve").status_code == 404
+
+
+class TestDeckTree:
+    """Test nested decks with rolled-up counts"""
+
+    def _create(self, deck_name):
+        return client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck_name}).json()["id"]
+
+    def test_counts_roll_up_to_ancestors(self):
+        """Test totals, new and due counts of every ancestor follow card changes"""
+        verbs = [self._create("Languages::Spanish::Verbs") for _ in range(2)]
+        self._create("Languages::Spanish")
+        french = self._create("Languages::French")
+        self._create("Math")
+
+        counts = client.get("/api/decks/Languages/counts").json()
+        assert (counts["card_count"], counts["new_count"], counts["due_count"], counts["deck_card_count"]) == (4, 4, 4, 0)
+
+        client.post(f"/api/cards/{verbs[0]}/review", json={"quality": 5})
+        client.put(f"/api/cards/{french}", json={"deck_name": "Languages::Spanish::Verbs"})
+        client.delete(f"/api/cards/{verbs[1]}")
+
+        spanish = client.get("/api/decks/Languages::Spanish/counts").json()
+        assert (spanish["card_count"], spanish["new_count"], spanish["due_count"], spanish["deck_card_count"]) == (3, 2, 2, 1)
+        assert client.get("/api/decks/Languages::French/counts").status_code == 404
+
+        tree = client.get("/api/decks/tree").json()["decks"]
+        assert [node["path"] for node in tree] == ["Languages", "Math"]
+        spanish_node = tree[0]["children"][0]
+        assert spanish_node["name"] == "Spanish"
+        assert [child["path"] for child in spanish_node["children"]] == ["Languages::Spanish::Verbs"]
+        assert spanish_node["children"][0]["card_count"] == 2
+
+    def test_subtree_matches_deck_names_exactly(self):
+        """Test "_" in a deck name is not a wildcard and names differing in case are separate subtrees"""
+        for deck in ("My_Deck::Verbs", "MyXDeck::Nouns", "spanish::Verbs", "Spanish::Nouns", "spanish"):
+            self._create(deck)
+
+        tree = client.get("/api/decks/tree?root=My_Deck").json()["decks"]
+        assert [node["path"] for node in tree] == ["My_Deck"]
+        assert [child["path"] for child in tree[0]["children"]] == ["My_Deck::Verbs"]
+
+        session = client.post("/api/study/sessions/", json={"deck_tree": "spanish"}).json()
+        assert session["deck_names"] == ["spanish", "spanish::Verbs"]
+
+    def test_rebuild_matches_incremental_rollups(self, db):
+        """Test rebuilding the tree from scratch gives the incrementally kept counts"""
+        from app.services.deck_tree import deck_tree, rebuild_deck_tree
+        from app.core.study_day import current_study_day
+
+        ids = [self._create(deck) for deck in ("A::B", "A::B", "A::C::D", "A", "B")]
+        client.post(f"/api/cards/{ids[0]}/review", json={"quality": 4})
+        client.put(f"/api/cards/{ids[2]}", json={"deck_name": "B::E"})
+
+        incremental = deck_tree(db, current_study_day())
+        rebuild_deck_tree(db)
+
+        assert deck_tree(db, current_study_day()) == incremental
+        assert client.get("/api/decks/tree?root=A").json()["decks"][0]["card_count"] == 3
@@ -26,3 +26,48 @@ def test_api_info():
     assert data["name"] == "Mnemosyne API"
     assert data["version"] == "1.0.0"
     assert "endpoints" in data
+
+def test_existing_database_is_upgraded(tmp_path):
+    """Test tables created by an older version gain the new columns and study days"""
+    from datetime import datetime
+    from sqlalchemy import create_engine, inspect, text
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import add_missing_columns
+    from app.core.study_day import backfill_study_days, study_day_for
+    from app.models.card import Base
+    from app.models.study_session import CardReview, StudySession
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    started_at = datetime(2026, 3, 1, 12, 0)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE study_sessions (id INTEGER PRIMARY KEY, deck_name VARCHAR(100), "
+            "session_type VARCHAR(50), max_cards INTEGER, cards_studied INTEGER, cards_correct INTEGER, "
+            "started_at DATETIME, ended_at DATETIME)"
+        ))
+        connection.execute(text(
+            "CREATE TABLE card_reviews (id INTEGER PRIMARY KEY, session_id INTEGER, card_id INTEGER, "
+            "quality INTEGER NOT NULL, response_time FLOAT, reviewed_at DATETIME)"
+        ))
+        connection.execute(text("INSERT INTO study_sessions (id, started_at) VALUES (1, :at)"), {"at": started_at})
+        connection.execute(text(
+            "INSERT INTO card_reviews (id, session_id, card_id, quality, reviewed_at) VALUES (1, 1, 1, 4, :at)"
+        ), {"at": started_at})
+
+    Base.metadata.create_all(bind=engine)
+    assert add_missing_columns(engine, Base.metadata) > 0
+    assert add_missing_columns(engine, Base.metadata) == 0
+    assert "ix_card_reviews_card_id_reviewed_at" in {
+        index["name"] for index in inspect(engine).get_indexes("card_reviews")
+    }
+
+    db = sessionmaker(bind=engine)()
+    try:
+        assert backfill_study_days(db) == 2
+        assert db.get(StudySession, 1).study_day == study_day_for(started_at)
+        review = db.get(CardReview, 1)
+        assert review.study_day == study_day_for(started_at)
+        assert review.cram is False
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,181 @@
+import pytest
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.models.calendar import OutboxEvent
+from app.services.outbox import OutboxDispatcher, enqueue, http_deliver, log_deliver
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+
+class StandInReceiver:
+    """Local HTTP receiver standing in for a real webhook"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.received = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if receiver.failures > 0:
+                    receiver.failures -= 1
+                    self.send_response(503)
+                else:
+                    receiver.received.append(body)
+                    self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/events"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def receiver():
+    """Running stand-in receiver, shut down after the test"""
+    stand_in = StandInReceiver()
+    yield stand_in
+    stand_in.close()
+
+
+class Clock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = datetime.now()
+
+    def __call__(self):
+        return self.now
+
+
+def outbox_rows():
+    db = TestingSessionLocal()
+    try:
+        return db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    finally:
+        db.close()
+
+
+class TestOutbox:
+    """Test the transactional outbox and its dispatcher"""
+
+    def test_ending_a_session_writes_an_outbox_event(self):
+        """Test the session_ended event is committed with the session end"""
+        session_id = client.post("/api/study/sessions/", json={"deck_name": "Math"}).json()["id"]
+        client.put(f"/api/study/sessions/{session_id}/end")
+        
+        rows = outbox_rows()
+        assert [row.event_type for row in rows] == ["session_ended"]
+        assert json.loads(rows[0].payload)["session_id"] == session_id
+        assert rows[0].status == "pending"
+
+    def test_rolled_back_events_are_never_written(self, db):
+        """Test events enqueued in a rolled back transaction disappear"""
+        enqueue(db, "session_ended", {"session_id": 1})
+        db.rollback()
+        
+        assert outbox_rows() == []
+
+    def test_dispatcher_delivers_batches(self, db, receiver):
+        """Test the dispatcher drains the outbox in batches"""
+        for i in range(5):
+            enqueue(db, "study_reminder", {"reminder_id": i})
+        db.commit()
+        
+        dispatcher = OutboxDispatcher(
+            TestingSessionLocal, http_deliver(receiver.url), batch_size=3, concurrency=2
+        )
+        assert asyncio.run(dispatcher.dispatch_once()) == 3
+        assert asyncio.run(dispatcher.dispatch_once()) == 2
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+        
+        assert sorted(body["payload"]["reminder_id"] for body in receiver.received) == [0, 1, 2, 3, 4]
+        assert all(row.status == "delivered" for row in outbox_rows())
+
+    def test_failed_deliveries_back_off_and_retry(self, db, receiver):
+        """Test failures are retried after an exponential backoff"""
+        receiver.failures = 2
+        enqueue(db, "session_ended", {"session_id": 7})
+        db.commit()
+        
+        clock = Clock()
+        dispatcher = OutboxDispatcher(
+            TestingSessionLocal, http_deliver(receiver.url), base_backoff_seconds=10, clock=clock
+        )
+        
+        asyncio.run(dispatcher.dispatch_once())
+        row = outbox_rows()[0]
+        assert (row.status, row.attempts) == ("pending", 1)
+        assert row.next_attempt_at == clock.now + timedelta(seconds=10)
+        assert "503" in row.last_error
+        
+        # Not retried before the backoff has elapsed
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+        
+        clock.now += timedelta(seconds=10)
+        asyncio.run(dispatcher.dispatch_once())
+        assert outbox_rows()[0].next_attempt_at == clock.now + timedelta(seconds=20)
+        
+        clock.now += timedelta(seconds=20)
+        asyncio.run(dispatcher.dispatch_once())
+        row = outbox_rows()[0]
+        assert (row.status, row.attempts) == ("delivered", 3)
+        assert receiver.received[0]["payload"] == {"session_id": 7}
+
+    def test_events_fail_after_max_attempts(self, db):
+        """Test an undeliverable event is eventually marked failed"""
+        enqueue(db, "session_ended", {"session_id": 8})
+        db.commit()
+        
+        def refuse(claimed):
+            raise ConnectionError("receiver down")
+        
+        clock = Clock()
+        dispatcher = OutboxDispatcher(TestingSessionLocal, refuse, max_attempts=2, clock=clock)
+        asyncio.run(dispatcher.dispatch_once())
+        clock.now += timedelta(hours=1)
+        asyncio.run(dispatcher.dispatch_once())
+        
+        row = outbox_rows()[0]
+        assert (row.status, row.attempts) == ("failed", 2)
+        assert row.last_error == "ConnectionError: receiver down"
+
+    def test_concurrent_dispatchers_never_claim_the_same_event(self, db):
+        """Test events another dispatcher leased after this one selected them are not claimed again"""
+        for i in range(3):
+            enqueue(db, "study_reminder", {"reminder_id": i})
+        db.commit()
+        
+        other = OutboxDispatcher(TestingSessionLocal, log_deliver)
+        other_claims = []
+        
+        def racing_session():
+            session = TestingSessionLocal()
+            
+            @event.listens_for(session, "do_orm_execute")
+            def claim_first(state):
+                # The other dispatcher leases the batch between this one's select and update
+                if state.is_update and not other_claims:
+                    other_claims.extend(other.claim_batch())
+            
+            return session
+        
+        claimed = OutboxDispatcher(racing_session, log_deliver).claim_batch()
+        
+        assert [claimed_event.payload["reminder_id"] for claimed_event in other_claims] == [0, 1, 2]
+        assert claimed == []
@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from app.main import app
+from app.models.calendar import DueForecast, MaintenanceCheckpoint
+from app.models.card import Card
+from app.services.rebuild import checkpoint_name, rebuild_schedules
+
+client = TestClient(app)
+
+SCHEDULE = ("ease_factor", "interval", "repetitions", "next_review", "last_reviewed")
+
+
+class TestRebuildSchedules:
+    """Test recomputing card schedules from the review log"""
+
+    def _reviewed_cards(self, histories, deck_name="Math"):
+        card_ids = []
+        for qualities in histories:
+            card_id = client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck_name}).json()["id"]
+            for quality in qualities:
+                client.post(f"/api/cards/{card_id}/review", json={"quality": quality, "response_time": 2.0})
+            card_ids.append(card_id)
+        return card_ids
+
+    def _schedules(self, db, card_ids):
+        db.expire_all()
+        return {card_id: tuple(getattr(db.get(Card, card_id), column) for column in SCHEDULE) for card_id in card_ids}
+
+    def _corrupt(self, db, card_ids):
+        for card_id in card_ids:
+            card = db.get(Card, card_id)
+            card.ease_factor, card.interval, card.repetitions = 1.3, 99, 9
+        db.commit()
+
+    def test_rebuild_restores_reviewed_schedules(self, db):
+        """Test replaying the log reproduces the schedules the reviews produced"""
+        card_ids = self._reviewed_cards([(5, 4, 4), (4, 1), (3, 5, 2, 4, 5)])
+        new_card = self._reviewed_cards([()])[0]
+        expected = self._schedules(db, card_ids + [new_card])
+        self._corrupt(db, card_ids)
+
+        progress = rebuild_schedules(db, chunk_size=2)
+
+        assert (progress.cards, progress.reviews, progress.resumed_from) == (3, 10, 0)
+        assert self._schedules(db, card_ids + [new_card]) == expected
+        assert db.get(MaintenanceCheckpoint, checkpoint_name()) is None
+
+    def test_rebuild_keeps_due_forecast_in_step(self, db):
+        """Test the derived due forecast matches the rebuilt cards"""
+        card_ids = self._reviewed_cards([(4, 4), (5,)])
+        self._corrupt(db, card_ids)
+
+        rebuild_schedules(db)
+
+        forecast = db.query(func.sum(DueForecast.card_count)).filter(DueForecast.deck_name == "Math").scalar()
+        assert forecast == db.query(Card).filter(Card.deck_name == "Math").count()
+
+    def test_rebuild_resumes_after_checkpoint(self, db):
+        """Test an interrupted rebuild skips the cards it already committed"""
+        card_ids = self._reviewed_cards([(4,), (4,), (4,)])
+        self._corrupt(db, card_ids)
+        db.add(MaintenanceCheckpoint(name=checkpoint_name(), position=card_ids[0]))
+        db.commit()
+
+        progress = rebuild_schedules(db)
+
+        assert (progress.cards, progress.resumed_from) == (2, card_ids[0])
+        db.expire_all()
+        assert [db.get(Card, card_id).interval for card_id in card_ids] == [99, 1, 1]
+
+    def test_rebuild_one_deck(self, db):
+        """Test a deck filter leaves other decks untouched"""
+        math = self._reviewed_cards([(4, 4)])
+        science = self._reviewed_cards([(4, 4)], deck_name="Science")
+        self._corrupt(db, math + science)
+
+        progress = rebuild_schedules(db, deck_name="Science")
+
+        assert progress.cards == 1
+        db.expire_all()
+        assert (db.get(Card, math[0]).interval, db.get(Card, science[0]).interval) == (99, 6)
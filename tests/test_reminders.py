@@ -0,0 +1,121 @@
+import pytest
+import json
+from datetime import datetime, date, time, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.calendar import OutboxEvent, StudyReminder
+from app.services.reminders import ReminderScheduler, OutboxSink, next_fire_time
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+
+class ListSink:
+    """Sink collecting delivered payloads in memory"""
+
+    def __init__(self):
+        self.payloads = []
+
+    def deliver(self, db, payload):
+        self.payloads.append(payload)
+
+
+class FlakySink(ListSink):
+    """Sink failing the first delivery of chosen reminders"""
+
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = set(failing)
+
+    def deliver(self, db, payload):
+        if payload["reminder_id"] in self.failing:
+            self.failing.discard(payload["reminder_id"])
+            raise ConnectionError("webhook down")
+        super().deliver(db, payload)
+
+
+def morning():
+    """Today at 08:00, before the reminders used in these tests"""
+    return datetime.combine(date.today(), time(8, 0))
+
+
+class TestReminderScheduler:
+    """Test firing of study reminders"""
+
+    def test_next_fire_time(self):
+        """Test reminders fire at the next occurrence of their time"""
+        after = datetime(2024, 5, 1, 8, 30)
+        
+        assert next_fire_time("09:00", after) == datetime(2024, 5, 1, 9, 0)
+        assert next_fire_time("08:30", after) == datetime(2024, 5, 2, 8, 30)
+        assert next_fire_time("07:15", after) == datetime(2024, 5, 2, 7, 15)
+
+    def test_fires_with_due_counts_for_listed_decks(self):
+        """Test a due reminder reports due cards for its decks only"""
+        client.post("/api/cards/", json={"front": "Q1", "back": "A1", "deck_name": "Math"})
+        client.post("/api/cards/", json={"front": "Q2", "back": "A2", "deck_name": "Math"})
+        client.post("/api/cards/", json={"front": "Q3", "back": "A3", "deck_name": "Science"})
+        reminder_id = client.post("/api/calendar/reminder", json={
+            "time": "09:00", "enabled": True, "deck_names": ["Math"]
+        }).json()["id"]
+        
+        sink = ListSink()
+        scheduler = ReminderScheduler(TestingSessionLocal, sink, clock=morning)
+        scheduler.load_all()
+        
+        fire_at = datetime.combine(date.today(), time(9, 0))
+        assert scheduler.next_due() == fire_at
+        assert scheduler.fire_due(now=fire_at - timedelta(minutes=1)) == []
+        assert scheduler.fire_due(now=fire_at) == [reminder_id]
+        
+        assert sink.payloads[0]["due_counts"] == {"Math": 2}
+        assert sink.payloads[0]["total_due"] == 2
+        assert scheduler.next_due() == fire_at + timedelta(days=1)
+
+    def test_failed_delivery_is_retried_without_holding_up_others(self):
+        """Test a reminder whose delivery fails is retried and the rest of the pass still fires"""
+        reminder = {"time": "09:00", "enabled": True, "deck_names": []}
+        failing, other = [client.post("/api/calendar/reminder", json=reminder).json()["id"] for _ in range(2)]
+        sink = FlakySink([failing])
+        scheduler = ReminderScheduler(TestingSessionLocal, sink, clock=morning, retry_seconds=60)
+        scheduler.load_all()
+        
+        fire_at = datetime.combine(date.today(), time(9, 0))
+        assert scheduler.fire_due(now=fire_at) == [other]
+        assert scheduler.next_due() == fire_at + timedelta(minutes=1)
+        
+        assert scheduler.fire_due(now=fire_at + timedelta(minutes=1)) == [failing]
+        assert [payload["reminder_id"] for payload in sink.payloads] == [other, failing]
+        assert scheduler.next_due() == fire_at + timedelta(days=1)
+
+    def test_reloads_only_changed_reminders(self):
+        """Test reminders created after start-up are picked up when notified"""
+        scheduler = ReminderScheduler(TestingSessionLocal, ListSink(), clock=morning)
+        scheduler.load_all()
+        assert scheduler.next_due() is None
+        
+        reminder_id = client.post("/api/calendar/reminder", json={
+            "time": "10:30", "enabled": True, "deck_names": []
+        }).json()["id"]
+        scheduler.notify_changed(reminder_id)
+        scheduler.reload_changed()
+        
+        assert scheduler.next_due() == datetime.combine(date.today(), time(10, 30))
+
+    def test_outbox_sink_writes_in_firing_transaction(self):
+        """Test the outbox sink stores the notification with the firing"""
+        client.post("/api/calendar/reminder", json={
+            "time": "09:00", "enabled": True, "deck_names": []
+        })
+        scheduler = ReminderScheduler(TestingSessionLocal, OutboxSink(), clock=morning)
+        scheduler.load_all()
+        scheduler.fire_due(now=datetime.combine(date.today(), time(9, 0)))
+        
+        db = TestingSessionLocal()
+        try:
+            event = db.query(OutboxEvent).one()
+            assert event.event_type == "study_reminder"
+            assert json.loads(event.payload)["total_due"] == 0
+            assert db.query(StudyReminder).one().last_fired_at is not None
+        finally:
+            db.close()
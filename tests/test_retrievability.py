@@ -0,0 +1,64 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.services.retrievability import most_at_risk, retrievability
+
+client = TestClient(app)
+
+
+class TestRetrievability:
+    """Test retrievability-ordered due queues"""
+
+    def test_recall_is_ninety_percent_after_one_interval(self):
+        """Test the forgetting curve is anchored at 90% after one stability"""
+        values = retrievability(np.array([0.0, 10.0, 40.0]), np.array([10, 10, 10]))
+
+        assert values[0] == pytest.approx(1.0)
+        assert values[1] == pytest.approx(0.9)
+        assert values[2] < values[1]
+
+    def test_top_k_is_most_at_risk_first(self):
+        """Test selection returns the lowest retrievability first and new cards last"""
+        now = datetime(2024, 6, 1, 12, 0)
+        day = 86400.0
+        card_ids = np.array([1, 2, 3, 4, 5])
+        interval = np.array([10, 1, 30, 5, 1])
+        last_reviewed = now.timestamp() - np.array([12, 9, 31, 5, np.nan]) * day
+        next_review = last_reviewed + interval * day
+
+        assert most_at_risk(card_ids, interval, last_reviewed, next_review, now, 2) == [2, 1]
+        assert most_at_risk(card_ids, interval, last_reviewed, next_review, now, 10) == [2, 1, 3, 4, 5]
+
+    @pytest.mark.parametrize("cache_enabled", [False, True])
+    def test_due_cards_in_retrievability_order(self, cache_enabled, monkeypatch, db):
+        """Test the due endpoint and session queue serve the most at-risk card first"""
+        from app.models.card import Card
+
+        monkeypatch.setattr(settings, "schedule_cache_enabled", cache_enabled)
+        now = datetime.now()
+        ids = [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"}).json()["id"]
+            for i in range(3)
+        ]
+        # Long interval due longest ago, short interval due recently, and a new card
+        for card_id, (interval, days_ago) in zip(ids, ((100, 110), (1, 2))):
+            card = db.get(Card, card_id)
+            card.interval = interval
+            card.last_reviewed = now - timedelta(days=days_ago)
+            card.next_review = card.last_reviewed + timedelta(days=interval)
+        db.commit()
+
+        by_date = client.get("/api/cards/due").json()
+        by_risk = client.get("/api/cards/due?order=retrievability").json()
+
+        assert [card["id"] for card in by_date["cards"]] == [ids[0], ids[1], ids[2]]
+        assert [card["id"] for card in by_risk["cards"]] == [ids[1], ids[0], ids[2]]
+        assert by_risk["total"] == 3
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "queue_order": "retrievability"}).json()
+        next_card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()
+        assert session["queue_order"] == "retrievability"
+        assert next_card["card"]["id"] == ids[1]
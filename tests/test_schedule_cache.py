@@ -0,0 +1,88 @@
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.services.schedule_cache import ScheduleCache, current_generation
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    """Serve due queries from the schedule cache"""
+    monkeypatch.setattr(settings, "schedule_cache_enabled", True)
+
+
+def create_card(deck_name="Math"):
+    return client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck_name}).json()["id"]
+
+
+class TestScheduleCache:
+    """Test the columnar schedule cache"""
+
+    def test_due_queries_served_from_cache(self, cache_enabled, db):
+        """Test due lists, counts and forecasts are answered from the arrays"""
+        from app.models.card import Card
+
+        now = datetime.now()
+        ids = [create_card("Math") for _ in range(3)] + [create_card("Physics")]
+        for card_id, offset in zip(ids, (-2, -1, 3, 1)):
+            db.get(Card, card_id).next_review = now + timedelta(days=offset)
+        db.commit()
+
+        due = client.get("/api/cards/due?limit=1").json()
+        assert due["total"] == 2
+        assert [card["id"] for card in due["cards"]] == [ids[0]]
+
+        counts = client.get(f"/api/calendar/due-count?date={(date.today() + timedelta(days=1)).isoformat()}").json()
+        assert counts["by_deck"] == {"Math": 2, "Physics": 1}
+
+        upcoming = client.get("/api/calendar/upcoming?days=7").json()["upcoming_reviews"]
+        assert [(day["date"], day["card_count"]) for day in upcoming] == [
+            ((date.today() + timedelta(days=1)).isoformat(), 1),
+            ((date.today() + timedelta(days=3)).isoformat(), 1)
+        ]
+
+    def test_local_writes_apply_in_place(self, cache_enabled, db):
+        """Test committed writes update the cache without a rebuild"""
+        from app.services.schedule_cache import schedule_cache
+
+        first = create_card()
+        client.get("/api/cards/due")
+        generation = schedule_cache.generation
+
+        second = create_card()
+        client.delete(f"/api/cards/{first}")
+
+        assert schedule_cache.generation == generation + 2 == current_generation(db)
+        assert schedule_cache.due_cards(datetime.now()) == (1, [second])
+
+    def test_other_worker_writes_trigger_rebuild(self, cache_enabled, db):
+        """Test a cache notices writes committed by another process"""
+        create_card()
+        worker = ScheduleCache()
+        worker.ensure_current(db)
+        assert worker.due_cards(datetime.now())[0] == 1
+
+        create_card()
+        db.rollback()  # End the read transaction to see the new commit
+        worker.ensure_current(db)
+
+        assert worker.due_cards(datetime.now())[0] == 2
+        assert worker.generation == current_generation(db)
+
+    def test_removal_keeps_arrays_dense(self):
+        """Test removing a card moves the last card into its slot"""
+        from app.services.events import CardState
+
+        now = datetime.now()
+        cache = ScheduleCache(capacity=2)
+        cache.generation = 0
+        states = [CardState(card_id, "Math", 1, 2.5, now - timedelta(hours=card_id), None) for card_id in (1, 2, 3)]
+        cache.apply([(None, state) for state in states], generation=1)
+        cache.apply([(states[0], None)], generation=2)
+
+        assert cache.size == 2
+        assert cache.due_cards(now) == (2, [3, 2])
+        assert cache.due_counts_by_deck(now + timedelta(seconds=1)) == {"Math": 2}
@@ -114,6 +114,27 @@ class TestSM2Algorithm:
         assert new_repetitions == 1
         assert new_ease_factor > ease_factor  # Should increase significantly
 
+    def test_sm2_batch_matches_scalar(self):
+        """Test the vectorised update agrees with the scalar one element-wise"""
+        algorithm = SM2Algorithm()
+        cases = [
+            (quality, ease_factor, interval, repetitions)
+            for quality in range(6)
+            for ease_factor in (1.3, 2.5, 2.8)
+            for interval, repetitions in ((1, 0), (1, 1), (6, 2), (15, 5))
+        ]
+        quality, ease_factor, interval, repetitions = (list(column) for column in zip(*cases))
+
+        new_interval, new_ease_factor, new_repetitions = algorithm.calculate_next_review_batch(
+            quality, ease_factor, interval, repetitions
+        )
+
+        for index, case in enumerate(cases):
+            expected = algorithm.calculate_next_review(*case)
+            assert new_interval[index] == expected[0]
+            assert new_ease_factor[index] == pytest.approx(expected[1])
+            assert new_repetitions[index] == expected[2]
+
 
 class TestCardReviewAPI:
     """Test card review API endpoints"""
@@ -252,3 +273,60 @@ class TestDueCards:
         # Verify the returned card is from Deck1
         assert data["cards"][0]["deck_name"] == "Deck1"
         assert data["cards"][0]["front"] == "Q1"
+
+
+class TestLoadBalancer:
+    """Test load-balanced interval fuzzing"""
+
+    def test_short_intervals_are_not_fuzzed(self):
+        """Test intervals of a couple of days keep their exact value"""
+        from app.services.load_balancer import fuzz_range
+        
+        assert fuzz_range(1) == (1, 1)
+        assert fuzz_range(2) == (2, 2)
+        assert fuzz_range(6) == (5, 7)
+        assert fuzz_range(100) == (95, 105)
+
+    def test_balancer_picks_least_loaded_day(self, db):
+        """Test the interval moves to the day with the fewest cards due"""
+        from app.models.calendar import DueForecast
+        from app.services.due_forecast import due_day
+        from app.services.load_balancer import LoadBalancer
+        
+        base = datetime(2024, 6, 1, 10, 0)
+        for offset, count in ((19, 7), (20, 9), (21, 2), (22, 5)):
+            db.add(DueForecast(deck_name="Math", due_date=due_day(base + timedelta(days=offset)), card_count=count))
+        db.add(DueForecast(deck_name="Other", due_date=due_day(base + timedelta(days=21)), card_count=50))
+        db.commit()
+        
+        assert LoadBalancer(seed=1).balance(db, "Math", 20, base) == 21
+
+    def test_seed_makes_tie_breaks_reproducible(self, db):
+        """Test equally loaded days are chosen the same way for the same seed"""
+        from app.services.load_balancer import LoadBalancer
+        
+        base = datetime(2024, 6, 1, 10, 0)
+        first = [LoadBalancer(seed=7).balance(db, "Math", 200, base) for _ in range(3)]
+        balancer = LoadBalancer(seed=7)
+        second = [balancer.balance(db, "Math", 200, base) for _ in range(3)]
+        
+        assert first[0] == second[0]
+        assert all(190 <= interval <= 210 for interval in second)
+
+    def test_bulk_reviews_spread_over_window(self, monkeypatch):
+        """Test reviewing many cards with the same interval spreads their due days"""
+        from app.core.config import settings
+        
+        monkeypatch.setattr(settings, "load_balance_enabled", True)
+        ids = client.post("/api/cards/bulk", json={
+            "cards": [{"front": f"Q{i}", "back": "A", "deck_name": "Math"} for i in range(12)]
+        }).json()["ids"]
+        
+        intervals = []
+        for card_id in ids:
+            client.post(f"/api/cards/{card_id}/review", json={"quality": 5})
+            intervals.append(client.post(f"/api/cards/{card_id}/review", json={"quality": 5}).json()["interval"])
+        
+        # SM-2 would put all twelve on day 6; the window is days 5-7
+        assert set(intervals) == {5, 6, 7}
+        assert max(intervals.count(interval) for interval in set(intervals)) == 4
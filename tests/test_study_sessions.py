@@ -120,3 +120,462 @@ class TestStudySession:
         assert "total_sessions" in data
         assert "total_cards_studied" in data
         assert "average_accuracy" in data
+
+    def test_session_summary_frozen_at_end(self):
+        """Test the session summary aggregates reviews and is frozen when the session ends"""
+        math = client.post("/api/cards/", json={"front": "2+2=?", "back": "4", "deck_name": "Math"}).json()["id"]
+        physics = client.post("/api/cards/", json={"front": "F=?", "back": "ma", "deck_name": "Physics"}).json()["id"]
+        session_id = client.post("/api/study/sessions/", json={"session_type": "review"}).json()["id"]
+        for card_id, quality, response_time in ((math, 5, 1.0), (physics, 1, 3.0), (physics, 4, 2.0)):
+            client.post(f"/api/study/sessions/{session_id}/review",
+                        json={"card_id": card_id, "quality": quality, "response_time": response_time})
+        
+        live = client.get(f"/api/study/sessions/{session_id}/summary").json()
+        assert live["frozen"] is False
+        
+        client.put(f"/api/study/sessions/{session_id}/end")
+        data = client.get(f"/api/study/sessions/{session_id}/summary").json()
+        
+        assert data["frozen"] is True
+        assert (data["reviews"], data["correct"]) == (3, 2)
+        assert data["quality_distribution"]["1"] == 1
+        assert data["response_time"]["p50"] == 2.0
+        assert data["response_time"]["max"] == 3.0
+        assert [deck["deck_name"] for deck in data["decks"]] == ["Math", "Physics"]
+        assert [card["card_id"] for card in data["failed_cards"]] == [physics]
+
+    def test_session_summary_not_found(self):
+        """Test the summary of a missing session returns 404"""
+        response = client.get("/api/study/sessions/999/summary")
+        
+        assert response.status_code == 404
+
+    def test_study_stats_from_running_totals(self, db):
+        """Test stats follow session events and agree with an offline recomputation"""
+        from app.models.study_session import StudyTotals
+        from app.services.study_totals import ALL_DECKS, check_study_totals
+        
+        card_id = client.post("/api/cards/", json={"front": "2+2=?", "back": "4", "deck_name": "Math"}).json()["id"]
+        session_id = client.post("/api/study/sessions/", json={"deck_name": "Math"}).json()["id"]
+        client.post("/api/study/sessions/", json={"session_type": "review"})
+        for quality in (5, 2):
+            client.post(f"/api/study/sessions/{session_id}/review",
+                        json={"card_id": card_id, "quality": quality, "response_time": 1.0})
+        
+        overall = client.get("/api/study/stats").json()
+        math = client.get("/api/study/stats?deck_name=Math").json()
+        
+        assert (overall["total_sessions"], overall["total_cards_studied"]) == (2, 2)
+        assert overall["average_accuracy"] == 50.0
+        assert (math["total_sessions"], math["total_cards_studied"]) == (1, 2)
+        assert check_study_totals(db) == []
+        
+        # Corrupt the stored totals and repair them
+        db.get(StudyTotals, ALL_DECKS).cards_studied = 99
+        db.commit()
+        assert [mismatch.scope for mismatch in check_study_totals(db, repair=True)] == [ALL_DECKS]
+        assert client.get("/api/study/stats").json()["total_cards_studied"] == 2
+
+
+class TestDailyLimits:
+    """Test new-card limits and new/review interleaving"""
+
+    def _study(self, session_id, count):
+        """Review the next `count` cards of a session, returning their IDs"""
+        card_ids = []
+        for _ in range(count):
+            card = client.get(f"/api/study/sessions/{session_id}/next-card").json()["card"]
+            if card is None:
+                break
+            client.post(f"/api/study/sessions/{session_id}/review",
+                        json={"card_id": card["id"], "quality": 4, "response_time": 1.0})
+            card_ids.append(card["id"])
+        return card_ids
+
+    def test_new_session_respects_deck_limit(self):
+        """Test a new-card session serves unseen cards in order until the daily limit"""
+        card_ids = [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"}).json()["id"]
+            for i in range(4)
+        ]
+        response = client.put("/api/decks/Math/limits", json={"new_cards_per_day": 2})
+        assert response.json()["new_cards_per_day"] == 2
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "session_type": "new"}).json()
+
+        assert self._study(session["id"], 4) == card_ids[:2]
+        limits = client.get("/api/decks/Math/limits").json()
+        assert (limits["new_cards_today"], limits["reviews_today"]) == (2, 0)
+        assert client.get(f"/api/study/sessions/{session['id']}/next-card").json()["session_complete"] is True
+
+    def test_mixed_session_interleaves_new_cards(self, monkeypatch, db):
+        """Test a mixed session serves one new card after every N reviews"""
+        from datetime import timedelta
+        from app.core.config import settings
+        from app.models.card import Card
+
+        monkeypatch.setattr(settings, "new_card_interleave", 2)
+        card_ids = [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"}).json()["id"]
+            for i in range(6)
+        ]
+        reviewed, unseen = card_ids[:3], card_ids[3:]
+        for card_id in reviewed:
+            card = db.get(Card, card_id)
+            card.repetitions, card.interval = 2, 6
+            card.last_reviewed = datetime.now() - timedelta(days=7)
+            card.next_review = datetime.now() - timedelta(days=1)
+        db.commit()
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "session_type": "mixed"}).json()
+
+        # Two reviews, one new card, then the last review, then new cards once reviews run out
+        assert self._study(session["id"], 6) == reviewed[:2] + unseen[:1] + reviewed[2:] + unseen[1:]
+        limits = client.get("/api/decks/Math/limits").json()
+        assert (limits["new_cards_today"], limits["reviews_today"]) == (3, 3)
+
+    def test_review_limit_stops_mixed_reviews(self, db):
+        """Test a deck at its review limit only serves new cards"""
+        from datetime import timedelta
+        from app.models.card import Card
+
+        card_ids = [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": "Math"}).json()["id"]
+            for i in range(2)
+        ]
+        card = db.get(Card, card_ids[0])
+        card.last_reviewed = datetime.now() - timedelta(days=2)
+        card.next_review = datetime.now() - timedelta(days=1)
+        db.commit()
+        client.put("/api/decks/Math/limits", json={"reviews_per_day": 0})
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "session_type": "mixed"}).json()
+
+        assert self._study(session["id"], 3) == card_ids[1:]
+
+
+class TestMultiDeckSessions:
+    """Test sessions over a set of decks"""
+
+    def test_multi_deck_queue_is_merged_by_due_date(self, db):
+        """Test the session serves its decks' due cards earliest first and skips other decks"""
+        from datetime import timedelta
+        from app.models.card import Card
+        from app.services.deck_queue import merged_due_cards
+
+        now = datetime.now()
+        due = {}
+        for deck_name, days_ago in (("Math", 5), ("Science", 4), ("Math", 3), ("History", 6), ("Science", 1)):
+            card = Card(front="Q", back="A", deck_name=deck_name, next_review=now - timedelta(days=days_ago))
+            db.add(card)
+            db.flush()
+            due[(deck_name, days_ago)] = card.id
+        db.commit()
+
+        expected = [due[("Math", 5)], due[("Science", 4)], due[("Math", 3)], due[("Science", 1)]]
+        assert merged_due_cards(db, ["Science", "Math"], now, 10) == expected
+        assert merged_due_cards(db, ["Science", "Math"], now, 2) == expected[:2]
+
+        session = client.post("/api/study/sessions/", json={"deck_names": ["Science", "Math"]}).json()
+        assert session["deck_names"] == ["Math", "Science"]
+        served = []
+        for _ in range(5):
+            card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()["card"]
+            if card is None:
+                break
+            client.post(f"/api/study/sessions/{session['id']}/review", json={"card_id": card["id"], "quality": 4})
+            served.append(card["id"])
+        assert served == expected
+
+    @pytest.mark.parametrize("cache_enabled", [False, True])
+    def test_multi_deck_session_honors_retrievability_order(self, cache_enabled, monkeypatch, db):
+        """Test a multi-deck session ordered by retrievability serves its most at-risk card first"""
+        from datetime import timedelta
+        from app.core.config import settings
+        from app.models.card import Card
+        from app.services.schedule_cache import bump_generation
+
+        monkeypatch.setattr(settings, "schedule_cache_enabled", cache_enabled)
+        now = datetime.now()
+        cards = {}
+        # (deck, interval, days since review, days overdue)
+        for key, (deck_name, interval, elapsed, overdue) in {
+            "fresh": ("Math", 10, 11, 9),
+            "at_risk": ("Science", 1, 30, 1),
+            "other_deck": ("History", 1, 90, 10),
+        }.items():
+            card = Card(front="Q", back="A", deck_name=deck_name, interval=interval, repetitions=1,
+                        last_reviewed=now - timedelta(days=elapsed), next_review=now - timedelta(days=overdue))
+            db.add(card)
+            db.flush()
+            cards[key] = card.id
+        bump_generation(db)
+        db.commit()
+
+        session = client.post("/api/study/sessions/", json={
+            "deck_names": ["Math", "Science"], "queue_order": "retrievability"
+        }).json()
+        card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()["card"]
+
+        assert card["id"] == cards["at_risk"]
+
+    def test_multi_deck_new_session(self):
+        """Test new-card sessions draw unseen cards from every listed deck"""
+        ids = [
+            client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck}).json()["id"]
+            for deck in ("Math", "History", "Science")
+        ]
+        session = client.post("/api/study/sessions/", json={
+            "deck_names": ["Math", "Science"], "session_type": "new"
+        }).json()
+
+        card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()["card"]
+        client.post(f"/api/study/sessions/{session['id']}/review", json={"card_id": card["id"], "quality": 4})
+        second = client.get(f"/api/study/sessions/{session['id']}/next-card").json()["card"]
+
+        assert (card["id"], second["id"]) == (ids[0], ids[2])
+
+    def test_new_cards_merge_per_deck_scans_by_id(self, db):
+        """Test unseen cards of several decks come back oldest first, skipping lapsed ones"""
+        from app.models.card import Card
+        from app.services.deck_queue import merged_new_cards
+
+        ids = [
+            client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck}).json()["id"]
+            for deck in ("Math", "Science", "History", "Math", "Science")
+        ]
+        # A lapsed card is back at repetitions = 0 but is not new
+        lapsed = db.get(Card, ids[3])
+        lapsed.repetitions = 0
+        lapsed.last_reviewed = datetime.now()
+        db.commit()
+
+        assert merged_new_cards(db, ["Science", "Math"], 10) == [ids[0], ids[1], ids[4]]
+        assert merged_new_cards(db, ["Science", "Math"], 2) == [ids[0], ids[1]]
+        assert merged_new_cards(db, [], 5) == []
+
+    def test_deck_name_and_deck_names_conflict(self):
+        """Test a session cannot name a single deck and a deck list"""
+        response = client.post("/api/study/sessions/", json={"deck_name": "Math", "deck_names": ["Science"]})
+
+        assert response.status_code == 400
+
+    def test_deck_tree_session(self):
+        """Test a session over a deck subtree studies every nested deck"""
+        for deck in ("Languages::Spanish", "Languages", "Math", "Languages::French::Verbs"):
+            client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": deck})
+
+        session = client.post("/api/study/sessions/", json={"deck_tree": "Languages"}).json()
+
+        assert session["deck_names"] == ["Languages", "Languages::French::Verbs", "Languages::Spanish"]
+        assert client.post("/api/study/sessions/", json={"deck_tree": "Nothing"}).status_code == 404
+
+
+class TestTimeBudgetedSessions:
+    """Test sessions sized to a time budget"""
+
+    def _cards(self, count, deck_name="Math"):
+        return [
+            client.post("/api/cards/", json={"front": f"Q{i}", "back": "A", "deck_name": deck_name}).json()["id"]
+            for i in range(count)
+        ]
+
+    def test_response_time_averages_are_maintained(self, db):
+        """Test reviews update the card and deck moving averages, skipping untimed reviews"""
+        from app.models.study_session import CardStats, DeckResponseTime
+
+        card_id = self._cards(1)[0]
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "max_cards": 5}).json()
+        for response_time in (10.0, 20.0, 0.0):
+            client.post(f"/api/study/sessions/{session['id']}/review", json={
+                "card_id": card_id, "quality": 4, "response_time": response_time
+            })
+
+        assert db.get(CardStats, card_id).response_time_ewma == pytest.approx(13.0)
+        deck = db.get(DeckResponseTime, "Math")
+        assert deck.response_time_ewma == pytest.approx(13.0)
+        assert deck.review_count == 2
+
+    def test_session_is_sized_to_the_budget(self, db):
+        """Test the planned size fills the budget from card, deck and default estimates"""
+        from app.models.study_session import CardStats, DeckResponseTime
+
+        card_ids = self._cards(10)
+        db.add(DeckResponseTime(deck_name="Math", response_time_ewma=30.0, review_count=5))
+        db.add(CardStats(card_id=card_ids[0], review_count=1, lapse_count=0,
+                         total_response_time=60.0, response_time_ewma=60.0))
+        db.commit()
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "target_minutes": 2}).json()
+        assert session["target_minutes"] == 2
+        assert session["max_cards"] == 3  # 60s + 30s + 30s
+
+        # No timing history at all falls back to the default estimate
+        self._cards(20, deck_name="Science")
+        session = client.post("/api/study/sessions/", json={"deck_name": "Science", "target_minutes": 1}).json()
+        assert session["max_cards"] == 7
+
+    def test_budget_plans_on_the_cards_served(self, db):
+        """Test the planner and next-card share one queue, card for card"""
+        from app.core.study_day import study_day_for
+        from app.models.study_session import StudySession
+        from app.services.session_queue import session_queue
+
+        self._cards(3)
+        self._cards(3, deck_name="Science")
+        session = client.post("/api/study/sessions/", json={
+            "deck_names": ["Math", "Science"], "session_type": "mixed", "target_minutes": 5
+        }).json()
+        now = datetime.now()
+        planned = session_queue(db, db.get(StudySession, session["id"]), now, study_day_for(now), 10)
+
+        served = []
+        for _ in range(len(planned)):
+            card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()["card"]
+            client.post(f"/api/study/sessions/{session['id']}/review", json={"card_id": card["id"], "quality": 1})
+            served.append(card["id"])
+        assert served == planned
+
+    def test_budget_adapts_to_actual_response_times(self, db):
+        """Test a session that runs slower than estimated ends when its time is used up"""
+        from app.models.study_session import DeckResponseTime
+
+        self._cards(10)
+        db.add(DeckResponseTime(deck_name="Math", response_time_ewma=10.0, review_count=5))
+        db.commit()
+
+        session = client.post("/api/study/sessions/", json={"deck_name": "Math", "target_minutes": 1}).json()
+        assert session["max_cards"] == 6
+
+        served = 0
+        while True:
+            next_card = client.get(f"/api/study/sessions/{session['id']}/next-card").json()
+            if next_card["session_complete"]:
+                break
+            client.post(f"/api/study/sessions/{session['id']}/review", json={
+                "card_id": next_card["card"]["id"], "quality": 4, "response_time": 25.0
+            })
+            served += 1
+
+        assert served == 2
+
+
+class TestCramSessions:
+    """Test cram sessions that stream cards and log results in batches"""
+
+    def test_cram_sessions_allow_large_max_cards(self):
+        """Test only cram sessions may go above 100 cards"""
+        cram = client.post("/api/study/sessions/", json={"session_type": "cram", "max_cards": 5000})
+        review = client.post("/api/study/sessions/", json={"session_type": "review", "max_cards": 500})
+
+        assert cram.status_code == 201
+        assert cram.json()["max_cards"] == 5000
+        assert review.status_code == 422
+
+    def test_cram_stream_batches(self):
+        """Test the stream serves the session's decks as NDJSON batches and can resume"""
+        import json
+        response = client.post("/api/cards/bulk", json={"cards": [
+            {"front": f"Q{i}", "back": "A", "deck_name": "Math" if i < 25 else "History"} for i in range(27)
+        ]})
+        math_ids = response.json()["ids"][:25]
+        session = client.post("/api/study/sessions/", json={
+            "deck_name": "Math", "session_type": "cram", "max_cards": 1000
+        }).json()
+
+        response = client.get(f"/api/study/sessions/{session['id']}/cram", params={"batch_size": 10})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        batches = [json.loads(line)["cards"] for line in response.text.splitlines()]
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert [card["id"] for batch in batches for card in batch] == math_ids
+
+        resumed = client.get(f"/api/study/sessions/{session['id']}/cram", params={"after_id": math_ids[19]})
+        assert [card["id"] for card in json.loads(resumed.text)["cards"]] == math_ids[20:]
+
+    def test_cram_stream_outlives_the_request_session(self, db):
+        """Test the stream reads through its own session, released once the stream ends"""
+        import json
+        from app.models.study_session import StudySession
+        from app.services.cram import cram_stream
+        from tests.conftest import engine
+
+        ids = client.post("/api/cards/bulk", json={"cards": [
+            {"front": f"Q{i}", "back": "A", "deck_name": "Math"} for i in range(3)
+        ]}).json()["ids"]
+        session_id = client.post("/api/study/sessions/", json={"deck_name": "Math", "session_type": "cram"}).json()["id"]
+
+        # The request's session is closed before the body streams
+        lines = cram_stream(db.get_bind(), db.get(StudySession, session_id), 0, 2)
+        db.close()
+
+        assert [card["id"] for line in lines for card in json.loads(line)["cards"]] == ids
+        assert engine.pool.checkedout() == 0
+
+    def test_cram_results_leave_schedules_alone(self, db):
+        """Test cram results are logged in bulk without rescheduling or using daily limits"""
+        from app.models.card import Card
+        from app.models.calendar import DeckSnapshot
+        from app.models.study_session import CardReview, CardStats
+
+        ids = client.post("/api/cards/bulk", json={"cards": [
+            {"front": f"Q{i}", "back": "A", "deck_name": "Math"} for i in range(3)
+        ]}).json()["ids"]
+        before = {card.id: (card.next_review, card.interval, card.ease_factor, card.last_reviewed)
+                  for card in db.query(Card)}
+        session = client.post("/api/study/sessions/", json={"session_type": "cram", "max_cards": 500}).json()
+
+        response = client.post(f"/api/study/sessions/{session['id']}/cram/results", json={"results": [
+            {"card_id": ids[0], "quality": 5, "response_time": 2.0},
+            {"card_id": ids[1], "quality": 1, "response_time": 4.0},
+            {"card_id": ids[0], "quality": 4, "response_time": 3.0}
+        ]})
+
+        assert response.status_code == 200
+        assert response.json() == {"session_id": session["id"], "logged": 3, "cards_studied": 3, "cards_correct": 2}
+        db.expire_all()
+        assert {card.id: (card.next_review, card.interval, card.ease_factor, card.last_reviewed)
+                for card in db.query(Card)} == before
+        assert db.query(CardReview).filter(CardReview.cram.is_(True)).count() == 3
+        assert db.get(CardStats, ids[0]).review_count == 2
+        # The failed cram answer is logged but is not a lapse
+        assert (db.get(CardStats, ids[1]).review_count, db.get(CardStats, ids[1]).lapse_count) == (1, 0)
+        snapshot = db.query(DeckSnapshot).filter(DeckSnapshot.deck_name == "Math").first()
+        assert not snapshot.reviewed_count
+
+    def test_cram_activity_agrees_with_a_reloaded_index(self):
+        """Test range totals count cram reviews the same before and after the index reloads"""
+        from app.core.study_day import current_study_day
+        from app.services.activity_index import activity_index
+
+        card_id = client.post("/api/cards/", json={"front": "Q", "back": "A", "deck_name": "Math"}).json()["id"]
+        today = current_study_day().isoformat()
+        ranges = {
+            "all": f"/api/calendar/range?start={today}&end={today}",
+            "deck": f"/api/calendar/range?start={today}&end={today}&deck=Math"
+        }
+        activity_index.clear()
+        for url in ranges.values():
+            client.get(url)
+
+        session = client.post("/api/study/sessions/", json={"session_type": "cram"}).json()
+        client.post(f"/api/study/sessions/{session['id']}/cram/results", json={"results": [
+            {"card_id": card_id, "quality": 4}, {"card_id": card_id, "quality": 2}
+        ]})
+        live = {name: client.get(url).json()["cards_studied"] for name, url in ranges.items()}
+
+        activity_index.clear()
+        reloaded = {name: client.get(url).json()["cards_studied"] for name, url in ranges.items()}
+
+        assert live == reloaded == {"all": 2, "deck": 0}
+
+    def test_cram_session_rejects_card_by_card_study(self):
+        """Test cram sessions do not serve next-card and reject unknown cards"""
+        session = client.post("/api/study/sessions/", json={"session_type": "cram"}).json()
+        review = client.post("/api/study/sessions/", json={"session_type": "review"}).json()
+
+        assert client.get(f"/api/study/sessions/{session['id']}/next-card").status_code == 400
+        assert client.get(f"/api/study/sessions/{review['id']}/cram").status_code == 400
+        response = client.post(f"/api/study/sessions/{session['id']}/cram/results", json={
+            "results": [{"card_id": 99999, "quality": 4}]
+        })
+        assert response.status_code == 404